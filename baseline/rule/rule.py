@@ -1,112 +1,88 @@
-import pandas as pd
-
-print('block-type')
-rule = pd.read_csv("./b.csv")
-
-label = rule.label
-sim = rule.cmt2cd_sim_change
-
-label = list(label)
-sim = list(sim)
-
-pred = list()
-for v in sim:
-    if v >= 0.05:
-        pred.append(1)
-    else:
-        pred.append(0)
-
-TP = 0
-FP = 0
-TN = 0
-FN = 0
-
-for i in range(0, len(label)):
-    if label[i] == 1 and pred[i] == 1:
-        TP += 1
-    if label[i] == 1 and pred[i] == 0:
-        FN += 1
-    if label[i] == 0 and pred[i] == 1:
-        FP += 1
-    if label[i] == 0 and pred[i] == 0:
-        TN += 1
-
-pre = TP / (TP + FP)
-recall = TP / (TP + FN)
-print('pre:', TP / (TP + FP))
-print('recall:', TP / (TP + FN))
-print('f1', 2 * pre * recall / (pre + recall))
-
-print('method-type')
-rule = pd.read_csv("./m.csv")
-
-label = rule.label
-sim = rule.cmt2cd_sim_change
-
-label = list(label)
-sim = list(sim)
+import argparse
+import os
 
-pred = list()
-for v in sim:
-    if v >= 0.05:
-        pred.append(1)
-    else:
-        pred.append(0)
-
-TP = 0
-FP = 0
-TN = 0
-FN = 0
-
-for i in range(0, len(label)):
-    if label[i] == 1 and pred[i] == 1:
-        TP += 1
-    if label[i] == 1 and pred[i] == 0:
-        FN += 1
-    if label[i] == 0 and pred[i] == 1:
-        FP += 1
-    if label[i] == 0 and pred[i] == 0:
-        TN += 1
-
-pre = TP / (TP + FP)
-recall = TP / (TP + FN)
-print('pre:', TP / (TP + FP))
-print('recall:', TP / (TP + FN))
-print('f1', 2 * pre * recall / (pre + recall))
-
-print('B & M-type')
-rule = pd.read_csv("./b&m.csv")
-
-label = rule.label
-sim = rule.cmt2cd_sim_change
-
-label = list(label)
-sim = list(sim)
+import numpy as np
+import pandas as pd
 
-pred = list()
-for v in sim:
-    if v >= 0.05:
-        pred.append(1)
+# (name, csv) of every data slice the rule is evaluated on
+SLICES = [('block-type', './b.csv'), ('method-type', './m.csv'), ('B & M-type', './b&m.csv')]
+THRESHOLD = 0.05
+
+
+def ratio(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape), where=b != 0)
+
+
+# 输入 标签, cmt2cd_sim_change, 阈值
+# 输出 sim >= 阈值 判为过时时的 TP, FP, TN, FN
+def confusion(label, sim, threshold):
+    label = np.asarray(label) == 1
+    pred = np.asarray(sim, dtype=np.float64) >= threshold
+    tp = int(np.count_nonzero(label & pred))
+    fp = int(np.count_nonzero(~label & pred))
+    fn = int(np.count_nonzero(label & ~pred))
+    tn = len(label) - tp - fp - fn
+    return tp, fp, tn, fn
+
+
+# 所有候选阈值 (sim 的每个不同取值) 一次算出混淆矩阵: sim 降序排序后对标签做累加,
+# 每个取值最后一次出现处的累加和就是阈值取该值时的 TP / FP. sim 为空值的样本永远判为 0
+# 输出 每个阈值一行: threshold, TP, FP, TN, FN, precision, recall, f1
+def threshold_curve(label, sim):
+    label = np.asarray(label) == 1
+    sim = np.asarray(sim, dtype=np.float64)
+    known = ~np.isnan(sim)
+    positives = int(np.count_nonzero(label))
+    negatives = len(label) - positives
+    order = np.argsort(-sim[known], kind='stable')
+    sim = sim[known][order]
+    tp_sum = np.cumsum(label[known][order])
+    last = np.r_[np.flatnonzero(sim[1:] != sim[:-1]), len(sim) - 1] if len(sim) else np.zeros(0, dtype=int)
+    tp = tp_sum[last]
+    fp = last + 1 - tp
+    precision = ratio(tp, tp + fp)
+    recall = ratio(tp, positives)
+    return pd.DataFrame({'threshold': sim[last], 'TP': tp, 'FP': fp, 'TN': negatives - fp, 'FN': positives - tp,
+                         'precision': precision, 'recall': recall,
+                         'f1': ratio(2 * precision * recall, precision + recall)})
+
+
+def evaluate(name, path, threshold=THRESHOLD, curve_dir=None):
+    print(name)
+    rule = pd.read_csv(path, usecols=['label', 'cmt2cd_sim_change'])
+    label = rule.label.to_numpy()
+    sim = rule.cmt2cd_sim_change.to_numpy()
+
+    # 没有判为过时的样本 (或没有正例) 时 precision / recall 记为 0, 与 threshold_curve 一致
+    tp, fp, tn, fn = confusion(label, sim, threshold)
+    pre = float(ratio(tp, tp + fp))
+    recall = float(ratio(tp, tp + fn))
+    print('pre:', pre)
+    print('recall:', recall)
+    print('f1', float(ratio(2 * pre * recall, pre + recall)))
+
+    curve = threshold_curve(label, sim)
+    if len(curve) == 0:
+        # 空的切片, 或者 cmt2cd_sim_change 全为空值
+        print('best threshold: none, no sample has a cmt2cd_sim_change')
     else:
-        pred.append(0)
-
-TP = 0
-FP = 0
-TN = 0
-FN = 0
-
-for i in range(0, len(label)):
-    if label[i] == 1 and pred[i] == 1:
-        TP += 1
-    if label[i] == 1 and pred[i] == 0:
-        FN += 1
-    if label[i] == 0 and pred[i] == 1:
-        FP += 1
-    if label[i] == 0 and pred[i] == 0:
-        TN += 1
-
-pre = TP / (TP + FP)
-recall = TP / (TP + FN)
-print('pre:', TP / (TP + FP))
-print('recall:', TP / (TP + FN))
-print('f1', 2 * pre * recall / (pre + recall))
+        best = curve.iloc[int(np.argmax(curve.f1.to_numpy()))]
+        print('best threshold: %f  pre: %f  recall: %f  f1: %f' % (best.threshold, best.precision, best.recall,
+                                                                    best.f1))
+    if curve_dir is not None:
+        os.makedirs(curve_dir, exist_ok=True)
+        curve.to_csv(os.path.join(curve_dir, os.path.splitext(os.path.basename(path))[0] + '_curve.csv'), index=False)
+    return curve
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='rule baseline: a comment is outdated when cmt2cd_sim_change >= threshold')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='threshold of the reported rule')
+    parser.add_argument('--curve-dir', default=None,
+                        help='folder to write the precision / recall / f1 of every threshold to, one csv per slice')
+    args = parser.parse_args()
+
+    for name, path in SLICES:
+        evaluate(name, path, args.threshold, args.curve_dir)
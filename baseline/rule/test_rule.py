@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rule import confusion, evaluate, ratio, threshold_curve
+
+
+class TestRule(unittest.TestCase):
+    def check_curve(self, label, sim):
+        curve = threshold_curve(label, sim)
+        known = np.asarray(sim, dtype=np.float64)
+        self.assertEqual(curve.threshold.tolist(), sorted(set(known[~np.isnan(known)].tolist()), reverse=True))
+        for row in curve.itertuples():
+            tp, fp, tn, fn = confusion(label, sim, row.threshold)
+            self.assertEqual((row.TP, row.FP, row.TN, row.FN), (tp, fp, tn, fn))
+            self.assertAlmostEqual(row.precision, float(ratio(tp, tp + fp)))
+            self.assertAlmostEqual(row.recall, float(ratio(tp, tp + fn)))
+        return curve
+
+    def test_curve_matches_confusion(self):
+        rng = np.random.RandomState(0)
+        for _ in range(20):
+            n = rng.randint(1, 60)
+            # few distinct values, so most thresholds are ties
+            sim = rng.randint(0, 6, n) / 10
+            sim[rng.rand(n) < 0.2] = np.nan
+            self.check_curve(rng.randint(0, 2, n), sim)
+
+    def test_all_negative(self):
+        curve = self.check_curve([0, 0, 0, 0], [0.3, 0.1, 0.3, np.nan])
+        self.assertEqual(curve.TP.tolist(), [0, 0])
+        self.assertEqual(curve.f1.tolist(), [0.0, 0.0])
+
+    def test_no_threshold(self):
+        self.assertEqual(len(threshold_curve([], [])), 0)
+        self.assertEqual(len(threshold_curve([1, 0], [np.nan, np.nan])), 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'b.csv')
+            pd.DataFrame({'label': [1, 0], 'cmt2cd_sim_change': [np.nan, np.nan]}).to_csv(path, index=False)
+            self.assertEqual(len(evaluate('block-type', path)), 0)
+            pd.DataFrame({'label': [], 'cmt2cd_sim_change': []}).to_csv(path, index=False)
+            self.assertEqual(len(evaluate('block-type', path)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
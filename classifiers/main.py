@@ -1,3 +1,7 @@
+import argparse
+import json
+import os
+import sys
 import numpy as np
 import scipy
 import pandas as pd
@@ -13,106 +17,20 @@ from sklearn.metrics import ConfusionMatrixDisplay, confusion_matrix
 from sklearn import naive_bayes
 from sklearn import tree
 from sklearn import svm
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
-from sklearn.calibration import CalibrationDisplay
-import matplotlib.pyplot as plt
 from sklearn.svm import SVC
 from sklearn.svm import LinearSVC
+from joblib import Parallel, delayed
 
-block = pd.read_csv("../csv/block.csv")
-method = pd.read_csv("../csv/method.csv")
-block_method = pd.concat([block, method], axis=0)
-# ------------------------ new version ------------------------
-block_new = block.drop(
-    ['lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged', 'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-method_new = method.drop(
-    ['lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged', 'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-block_method_new = pd.concat([block_new, method_new], axis=0)
-# code features
-code_new = block_method_new.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount',
-     'VERSIONCount', 'FIXEDCount', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment',
-     'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# comment features
-comment_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete', 'NNCode', 'VBCode', 'DTCode',
-     'INCode', 'JJCode', 'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# relation features
-relation_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCommentBylineNumOf"OldCCSet',
-     'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment',
-     'RBComment', 'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode',
-     'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode'
-     ], axis=1)
-# ------------------------ prev_version ------------------------
-block_prev = block.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-method_prev = method.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-block_method_prev = pd.concat([block_prev, method_prev], axis=0)
-# code features
-code_prev = block_method_prev.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount',
-     'BUGCount',
-     'VERSIONCount', 'FIXEDCount',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# comment features
-comment_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfChanged', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete',
-     'cmt2cd_sim_before', 'cmt2cd_sim_after', 'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# relation features
-relation_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfOldCommentBylineNumOf"OldCCSet',
-     'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'lineNumOfChanged', 'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete'
-     ], axis=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', '3-extract_features'))
+from utils.calibration import calibrate_model
+from utils.dataset import load_dataset, select, to_dataframe
+
+# block.csv and method.csv are parsed once into compact typed tables cached next to them (<csv>.npy);
+# the feature sets are column views, see utils.dataset.FEATURE_SETS
+block_method = load_dataset("../csv/block.csv", "../csv/method.csv")
 # ------------ use which ------------
 
-df = block_method_new
+df = to_dataframe(select(block_method, 'block_method_new'))
 y = df.label
 x = df.drop('label', axis=1)
 
@@ -130,6 +48,7 @@ class NaivelyCalibratedLinearSVC(LinearSVC):
         df = self.decision_function(X)
         self.df_min_ = df.min()
         self.df_max_ = df.max()
+        return self
 
     def predict_proba(self, X):
         """Min-max scale output of `decision_function` to [0,1]."""
@@ -147,18 +66,26 @@ lr = linear_model.LogisticRegression()
 
 
 class NaivelyCalibratedXGBoost(XGBClassifier):
-    """LinearSVC with `predict_proba` method that naively scales
-    `decision_function` output."""
-
-    def fit(self, X, y):
-        eval_set = [(xtest, ytest)]
-        super().fit(X, y, early_stopping_rounds=10, eval_metric="logloss", eval_set=eval_set, verbose=False)
+    """XGBClassifier with `predict_proba` method that naively scales
+    its raw margin output. An eval set for early stopping is passed to
+    `fit` by the caller (`eval_set=[(X_valid, y_valid)]`) and must not be
+    the split the model is evaluated on; `early_stopping_rounds` and
+    `eval_metric` are constructor arguments."""
+
+    def fit(self, X, y, **kwargs):
+        kwargs.setdefault("verbose", False)
+        super().fit(X, y, **kwargs)
         df = self.decision_function(X)
         self.df_min_ = df.min()
         self.df_max_ = df.max()
+        return self
+
+    def decision_function(self, X):
+        """Raw margin (log-odds) of the positive class."""
+        return self.predict(X, output_margin=True)
 
     def predict_proba(self, X):
-        """Min-max scale output of `decision_function` to [0,1]."""
+        """Min-max scale the raw margin to [0,1]."""
         df = self.decision_function(X)
         calibrated_df = (df - self.df_min_) / (self.df_max_ - self.df_min_)
         proba_pos_class = np.clip(calibrated_df, 0, 1)
@@ -167,7 +94,8 @@ class NaivelyCalibratedXGBoost(XGBClassifier):
         return proba
 
 
-xgb = XGBClassifier()
+# plotted and reported with the same naive min-max calibration as the SVC
+xgb = NaivelyCalibratedXGBoost()
 tcf = tree.DecisionTreeClassifier()
 
 clf_list = [
@@ -179,42 +107,87 @@ clf_list = [
     (xgb, "XGBoost")
 ]
 
-fig = plt.figure(figsize=(10, 10))
-gs = GridSpec(6, 2)
-colors = plt.cm.get_cmap("Dark2")
-
-
-ax_calibration_curve = fig.add_subplot(gs[:2, :2])
-calibration_displays = {}
-for i, (clf, name) in enumerate(clf_list):
-    clf.fit(xtrain, ytrain)
-    display = CalibrationDisplay.from_estimator(
-        clf,
-        xtest,
-        ytest,
-        n_bins=10,
-        name=name,
-        ax=ax_calibration_curve,
-        color=colors(i),
-    )
-    calibration_displays[name] = display
-
-ax_calibration_curve.grid()
-ax_calibration_curve.set_title("Calibration plots")
-# Add histogram
-grid_positions = [(2, 0), (2, 1), (3, 0), (3, 1), (4, 0), (4, 1)]
-for i, (_, name) in enumerate(clf_list):
-    row, col = grid_positions[i]
-    ax = fig.add_subplot(gs[row, col])
-
-    ax.hist(
-        calibration_displays[name].y_prob,
-        range=(0, 1),
-        bins=10,
-        label=name,
-        color=colors(i),
-    )
-    ax.set(title=name, xlabel="Mean predicted probability", ylabel="Count")
-
-plt.tight_layout()
-plt.show()
+
+def plot_calibration():
+    import matplotlib.pyplot as plt
+    from matplotlib.gridspec import GridSpec
+    from sklearn.calibration import CalibrationDisplay
+
+    fig = plt.figure(figsize=(10, 10))
+    gs = GridSpec(6, 2)
+    colors = plt.cm.get_cmap("Dark2")
+
+    ax_calibration_curve = fig.add_subplot(gs[:2, :2])
+    calibration_displays = {}
+    for i, (clf, name) in enumerate(clf_list):
+        clf.fit(xtrain, ytrain)
+        display = CalibrationDisplay.from_estimator(
+            clf,
+            xtest,
+            ytest,
+            n_bins=10,
+            name=name,
+            ax=ax_calibration_curve,
+            color=colors(i),
+        )
+        calibration_displays[name] = display
+
+    ax_calibration_curve.grid()
+    ax_calibration_curve.set_title("Calibration plots")
+    # Add histogram
+    grid_positions = [(2, 0), (2, 1), (3, 0), (3, 1), (4, 0), (4, 1)]
+    for i, (_, name) in enumerate(clf_list):
+        row, col = grid_positions[i]
+        ax = fig.add_subplot(gs[row, col])
+
+        ax.hist(
+            calibration_displays[name].y_prob,
+            range=(0, 1),
+            bins=10,
+            label=name,
+            color=colors(i),
+        )
+        ax.set(title=name, xlabel="Mean predicted probability", ylabel="Count")
+
+    plt.tight_layout()
+    plt.show()
+
+
+def calibration_report(out_dir, methods=("isotonic", "sigmoid"), cv=5, n_bins=10, n_jobs=-1):
+    """Headless counterpart of plot_calibration for CI: the classifiers are fitted
+    in parallel, each as is and wrapped in CalibratedClassifierCV (calibrator
+    fitted on out-of-fold predictions) once per method. Writes the Brier score
+    and ECE of each to calibration.json / calibration_summary.csv and the
+    reliability-bin tables the plot would draw to reliability.csv."""
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(calibrate_model)(name, clf, xtrain, ytrain, xtest, ytest, methods=methods, cv=cv, n_bins=n_bins)
+        for clf, name in clf_list)
+    summary = pd.DataFrame([row for rows, _ in results for row in rows])
+    bins = pd.concat([table for _, table in results], ignore_index=True)
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "calibration.json"), "w") as f:
+        json.dump({"seed": seed, "cv": cv, "n_bins": n_bins, "n_test": int(len(ytest)),
+                   "models": summary.to_dict(orient="records")}, f, indent=2)
+    summary.to_csv(os.path.join(out_dir, "calibration_summary.csv"), index=False)
+    bins.to_csv(os.path.join(out_dir, "reliability.csv"), index=False)
+    print(summary.to_string(index=False))
+    return summary, bins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calibration of the classifiers on block_method_new")
+    parser.add_argument("--report", metavar="DIR", default=None,
+                        help="write calibration.json, calibration_summary.csv and reliability.csv to DIR "
+                             "instead of plotting")
+    parser.add_argument("--method", nargs="+", choices=["isotonic", "sigmoid"], default=["isotonic", "sigmoid"],
+                        help="CalibratedClassifierCV methods of the report")
+    parser.add_argument("--cv", type=int, default=5, help="folds of the out-of-fold calibration")
+    parser.add_argument("--bins", type=int, default=10, help="reliability bins")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="classifiers fitted at the same time")
+    args = parser.parse_args()
+
+    if args.report is None:
+        plot_calibration()
+    else:
+        calibration_report(args.report, args.method, args.cv, args.bins, args.n_jobs)
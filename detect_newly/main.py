@@ -1,3 +1,6 @@
+import argparse
+import os
+import sys
 import random
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neighbors import KNeighborsClassifier
@@ -17,149 +20,69 @@ from sklearn.metrics import roc_curve, auc, roc_auc_score, precision_score, reca
 from sklearn.metrics import classification_report
 from sklearn.metrics import ConfusionMatrixDisplay, confusion_matrix
 from sklearn.utils import shuffle
+from sklearn.pipeline import make_pipeline
 from xgboost import XGBClassifier
 
 import matplotlib.pyplot as plt
 
-ejbca = pd.read_csv("../RQ4/ejbca.csv")
-freecol = pd.read_csv("../RQ4/freecol.csv")
-opennms = pd.read_csv("../RQ4/opennms.csv")
-to_dect = pd.concat([ejbca, freecol, opennms], axis=0)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', '3-extract_features'))
+from utils.dataset import load_dataset, select, to_dataframe
+from utils.model_zoo import run_zoo, zoo_table
+from utils.preprocessing import Standardizer
+from utils.scoring import load_model, predict_positive, save_model, write_flagged
 
-block = pd.read_csv("../csv/block.csv")
-method = pd.read_csv("../csv/method.csv")
-block_method = pd.concat([block, method], axis=0)
-# ------------------------ new version ------------------------
-to_dect = to_dect.drop(
-    ['lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged', 'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-block_new = block.drop(
-    ['lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged', 'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-method_new = method.drop(
-    ['lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged', 'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-block_method_new = pd.concat([block_new, method_new], axis=0)
-# code features
-code_new = block_method_new.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount',
-     'VERSIONCount', 'FIXEDCount', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment',
-     'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# comment features
-comment_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete', 'NNCode', 'VBCode', 'DTCode',
-     'INCode', 'JJCode', 'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# relation features
-relation_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCommentBylineNumOf"OldCCSet',
-     'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment',
-     'RBComment', 'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode',
-     'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode'
-     ], axis=1)
-# ------------------------ prev_version ------------------------
-block_prev = block.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-method_prev = method.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-block_method_prev = pd.concat([block_prev, method_prev], axis=0)
-# code features
-code_prev = block_method_prev.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount',
-     'BUGCount',
-     'VERSIONCount', 'FIXEDCount',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# comment features
-comment_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfChanged', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete',
-     'cmt2cd_sim_before', 'cmt2cd_sim_after', 'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# relation features
-relation_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfOldCommentBylineNumOf"OldCCSet',
-     'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'lineNumOfChanged', 'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete'
-     ], axis=1)
+# the csv files are parsed once into compact typed tables cached next to them (<csv>.npy);
+# the feature sets are column views, see utils.dataset.FEATURE_SETS
+to_dect = load_dataset("../RQ4/ejbca.csv", "../RQ4/freecol.csv", "../RQ4/opennms.csv")
+block_method = load_dataset("../csv/block.csv", "../csv/method.csv")
 # ------------ use which ------------
 
-df = block_method_new
+df = to_dataframe(select(block_method, 'block_method_new'))
 print('-----------df.RESULT.value_counts()---------------')
-to_dect_y = to_dect.label
+to_dect_y = to_dect['label']
 y = df.label
 print(df.label.value_counts())
-to_dect_x = to_dect.drop(['label', 'filename'], axis=1)
+to_dect_x = to_dataframe(select(to_dect, 'block_method_new', drop=['label']))
 x = df.drop(['label'], axis=1)
 
 xtrain, xtest, ytrain, ytest = train_test_split(x, y, test_size=0.3, random_state=10)
 
 
-def detect_newly():
-    nbc = GaussianNB()
-    knnc = KNeighborsClassifier()
-    svmc = SVC()
-    lrc = LogisticRegression()
-    dtc = DecisionTreeClassifier()
-    rfc = RandomForestClassifier()
-    xgb = XGBClassifier()
+# every model standardizes its input with the training split's statistics, saved with it in the pipeline
+MODELS = [
+    ('NaiveBayes', make_pipeline(Standardizer(), GaussianNB())),
+    ('KNN', make_pipeline(Standardizer(), KNeighborsClassifier())),
+    ('SVM', make_pipeline(Standardizer(), SVC())),
+    ('LogisticRegression', make_pipeline(Standardizer(), LogisticRegression())),
+    ('DecisionTree', make_pipeline(Standardizer(), DecisionTreeClassifier())),
+    ('RandomForest', make_pipeline(Standardizer(), RandomForestClassifier())),
+    ('XGBoost', make_pipeline(Standardizer(), XGBClassifier(n_jobs=-1))),
+]
+# the model whose predictions on the new projects are written out
+DETECTOR = 'RandomForest'
+MODEL_PATH = 'detector.joblib'
 
-    nbc.fit(xtrain, ytrain)
-    knnc.fit(xtrain, ytrain)
-    svmc.fit(xtrain, ytrain)
-    lrc.fit(xtrain, ytrain)
-    dtc.fit(xtrain, ytrain)
-    rfc.fit(xtrain, ytrain)
-    xgb.fit(xtrain, ytrain)
 
-    nbc_pre = nbc.predict(xtest)
-    knnc_pre = knnc.predict(xtest)
-    svm_pre = svmc.predict(xtest)
-    lrc_pre = lrc.predict(xtest)
-    dtc_pre = dtc.predict(xtest)
-    rfc_pre = rfc.predict(xtest)
-    xgb_pre = xgb.predict(xtest)
-    to_dect_pre = rfc.predict(to_dect_x)
+# compare=False only trains the detector, the other models' predictions are not used for anything;
+# compare=True trains them all concurrently and prints their scores, time and memory on xtest.
+# the detector is saved to model_path for score.py, which scores new projects without the training csv files
+def detect_newly(compare=False, cores=None, model_path=MODEL_PATH):
+    models = [(name, model) for name, model in MODELS if compare or name == DETECTOR]
+    rows = run_zoo(models, xtrain, ytrain, xtest, ytest, cores=cores, return_estimators=True)
+    print(zoo_table(rows).to_string(index=False))
+    detector = [row for row in rows if row['name'] == DETECTOR][0]['estimator']
+    save_model(model_path, detector, x.columns, feature_set='block_method_new')
 
-    with open('detected_outdated.txt', 'a') as f:
-        f.write(str(to_dect.iloc[to_dect_pre == 1].filename))
+    with open('detected_outdated.txt', 'w') as f:
+        n_flagged = write_flagged(f, to_dect['filename'], predict_positive(load_model(model_path), to_dect_x))
+    print('%d of %d files detected as outdated' % (n_flagged, len(to_dect_x)))
 
 
-detect_newly()
-
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='detect outdated comments in the RQ4 projects')
+    parser.add_argument('--compare', action='store_true', help='also train and score every other model')
+    parser.add_argument('--cores', type=int, default=None,
+                        help='cores shared by the models trained at the same time, default all')
+    parser.add_argument('--model', default=MODEL_PATH, help='where to save the trained detector')
+    args = parser.parse_args()
+    detect_newly(args.compare, args.cores, args.model)
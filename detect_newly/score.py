@@ -0,0 +1,27 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', '3-extract_features'))
+from utils.scoring import load_model, score_file
+
+# python score.py <features csv / feature table> [...] --out detected_outdated.txt
+# scores new projects with the model saved by main.py, the training csv files are not needed
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='flag outdated comments with the detector saved by main.py')
+    parser.add_argument('features', nargs='+',
+                        help='csv files (RQ4 layout, with a filename column) or feature tables written by My.py')
+    parser.add_argument('--model', default='detector.joblib', help='model saved by main.py')
+    parser.add_argument('--out', default='detected_outdated.txt', help='filename<TAB>probability of every flagged file')
+    parser.add_argument('--threshold', type=float, default=0.5, help='flag files whose probability is above this')
+    parser.add_argument('--chunksize', type=int, default=100000, help='rows scored at a time')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bundle = load_model(args.model)
+    with open(args.out, 'w') as out:
+        for path in args.features:
+            n_rows, n_flagged = score_file(bundle, path, out, args.threshold, args.chunksize)
+            print('%s: %d of %d files flagged' % (path, n_flagged, n_rows))
+    print('done in %.1fs' % (time.perf_counter() - start))
@@ -1,4 +1,8 @@
 #import random
+import argparse
+import os
+import sys
+import time
 from sklearn.naive_bayes import GaussianNB
 #from sklearn.neighbors import KNeighborsClassifier
 from sklearn.svm import SVC
@@ -15,271 +19,131 @@ from sklearn.metrics import roc_curve, auc, roc_auc_score, precision_score, reca
 from sklearn.metrics import classification_report
 from sklearn.metrics import ConfusionMatrixDisplay, confusion_matrix
 from sklearn.utils import shuffle
+from sklearn.pipeline import make_pipeline
 from xgboost import XGBClassifier
 import seaborn as sns
 
 import matplotlib.pyplot as plt
 
-block = pd.read_csv("/Users/graysonsiegler/Documents/Documents - Grayson’s MacBook Pro/RIT/REU/grayson-CoCC/csv/block.csv")
-method = pd.read_csv("/Users/graysonsiegler/Documents/Documents - Grayson’s MacBook Pro/RIT/REU/grayson-CoCC/csv/method.csv")
-#top = pd.read_csv('block_method_top.csv')
-#block_method = pd.concat([block, method], axis=0)
-# ------------------------ new version ------------------------
-block_new = block.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged',
-     'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-method_new = method.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged',
-     'cmt2cd_sim_before', 'cmt2cd_sim_after'], axis=1)
-block_method_new = pd.concat([block_new, method_new], axis=0)
-remove_word_anaysis = block_method_new.drop(['NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment',
-                                             'RBComment', 'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'NNCode',
-                                             'VBCode', 'DTCode', 'INCode', 'JJCode',
-                                             'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode'], axis=1)
-# code features
-code_new = block_method_new.drop(
-    ['TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount',
-     'VERSIONCount', 'FIXEDCount', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment',
-     'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# comment features
-comment_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete', 'NNCode', 'VBCode', 'DTCode',
-     'INCode', 'JJCode', 'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'
-     ], axis=1)
-# relation features
-relation_new = block_method_new.drop(
-    ['changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet',
-     'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment',
-     'RBComment', 'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode',
-     'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode'
-     ], axis=1)
-# ------------------------ prev_version ------------------------
-
-block_prev = block.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-method_prev = method.drop(
-    ['changeNum', 'NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment', 'RBComment', 'PRPComment',
-     'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode', 'JJCode', 'RBCode', 'PRPCode',
-     'MDCode', 'LSCode', 'RPCode', 'bothHavePairNumChange', 'all_token_change_sim'], axis=1)
-block_method_prev = pd.concat([block_prev, method_prev], axis=0)
-# code features
-code_prev = block_method_prev.drop(
-    ['lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount',
-     'BUGCount',
-     'VERSIONCount', 'FIXEDCount',
-     'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# comment features
-comment_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfChanged', 'changedLineByAllCodeLine',
-     'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert', 'forUpdate', 'forMove', 'forDelete', 'foreachInsert',
-     'foreachUpdate', 'foreachMove', 'foreachDelete', 'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete',
-     'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete', 'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete',
-     'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete', 'methodInvInsert', 'methodInvUpdate', 'methodInvMove',
-     'methodInvDelete', 'assignInsert', 'assignUpdate', 'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate',
-     'varDecMove', 'varDecDelete', 'elseInsert', 'elseUpdate', 'elseMove', 'elseDelete',
-     'cmt2cd_sim_before', 'cmt2cd_sim_after', 'cmt2cd_sim_change', 'cmt2ch_sim_change'
-     ], axis=1)
-# relation features
-relation_prev = block_method_prev.drop(
-    ['attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
-     'parameterInsert', 'parameterRenaming', 'parameterTypeChange', 'containReturn',
-     'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfOldCommentBylineNumOf"OldCCSet',
-     'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount',
-     'lineNumOfChanged', 'changedLineByAllCodeLine', 'ifInsert', 'ifUpdate', 'ifMove', 'ifDelete', 'forInsert',
-     'forUpdate', 'forMove', 'forDelete', 'foreachInsert', 'foreachUpdate', 'foreachMove', 'foreachDelete',
-     'whileInsert', 'whileUpdate', 'whileMove', 'whileDelete', 'catchInsert', 'catchUpdate', 'catchMove', 'catchDelete',
-     'tryInsert', 'tryUpdate', 'tryMove', 'tryDelete', 'throwInsert', 'throwUpdate', 'throwMove', 'throwDelete',
-     'methodInvInsert', 'methodInvUpdate', 'methodInvMove', 'methodInvDelete', 'assignInsert', 'assignUpdate',
-     'assignMove', 'assignDelete', 'varDecInsert', 'varDecUpdate', 'varDecMove', 'varDecDelete', 'elseInsert',
-     'elseUpdate', 'elseMove', 'elseDelete'
-     ], axis=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', '3-extract_features'))
+from utils.dataset import load_dataset, select, to_dataframe
+from utils.model_zoo import run_zoo, zoo_table
+from utils.preprocessing import Standardizer
+from utils.tuning import FoldCache, halving_search
+
+# block.csv and method.csv are parsed once into compact typed tables cached next to them (<csv>.npy);
+# the feature sets (block_method_new, code_new, comment_new, relation_new and the *_prev ones) are
+# column views, see utils.dataset.FEATURE_SETS
+block_method = load_dataset("/Users/graysonsiegler/Documents/Documents - Grayson’s MacBook Pro/RIT/REU/grayson-CoCC/csv/block.csv",
+                            "/Users/graysonsiegler/Documents/Documents - Grayson’s MacBook Pro/RIT/REU/grayson-CoCC/csv/method.csv")
 # ------------ use which ------------
-df = block_method_new
+# this script's new version also leaves out lineNumOfOldCommentBylineNumOf"OldCCSet
+df = to_dataframe(select(block_method, 'block_method_new', drop=['lineNumOfOldCommentBylineNumOf"OldCCSet']))
 
-# df = df.drop(['NNComment', 'VBComment', 'DTComment', 'INComment', 'JJComment',
-#               'RBComment', 'PRPComment', 'MDComment', 'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode', 'INCode',
-#               'JJCode',
-#               'RBCode', 'PRPCode', 'MDCode', 'LSCode', 'RPCode'], axis=1)
+# df = to_dataframe(select(block_method, 'block_method_new', drop=['lineNumOfOldCommentBylineNumOf"OldCCSet',
+#                                                                  'NNComment', 'VBComment', 'DTComment', 'INComment',
+#                                                                  'JJComment', 'RBComment', 'PRPComment', 'MDComment',
+#                                                                  'LSComment', 'RPComment', 'NNCode', 'VBCode', 'DTCode',
+#                                                                  'INCode', 'JJCode', 'RBCode', 'PRPCode', 'MDCode',
+#                                                                  'LSCode', 'RPCode']))
 
 sns.heatmap(df.corr())
 print('-----------df.RESULT.value_counts()---------------')
 y = df.label
 print(df.label.value_counts())
 x = df.drop(['label'], axis=1)
-num_fea = x.dtypes[x.dtypes != 'object'].index
-x[num_fea] = x[num_fea].apply(lambda a: (a - a.mean()) / (a.std()))
-x[num_fea] = x[num_fea].fillna(0)
+# features are z-scored inside each model's pipeline (Standardizer), with statistics of the training split only
 
 xtrain, xtest, ytrain, ytest = train_test_split(x, y, test_size=0.3, random_state=10)
 
 
-def different_model():
-    nbc = GaussianNB(var_smoothing=1e-5)
-    svmc = SVC()
-    lrc = LogisticRegression(penalty='l1', C=100, solver='liblinear')
-    dtc = DecisionTreeClassifier(criterion='gini', max_depth=20, min_samples_split=5, min_samples_leaf=1)
-    rfc = RandomForestClassifier(criterion='gini', max_depth=None, max_features='sqrt', min_samples_leaf=1, min_samples_split=2, n_estimators=200)
-    xgb = XGBClassifier(objective='binary:logistic', learning_rate=1, max_depth=7, n_estimators=200, subsample=1,
-                        colsample_bytree=1)
-
-    nbc.fit(xtrain, ytrain)
-    svmc.fit(xtrain, ytrain)
-    lrc.fit(xtrain, ytrain)
-    dtc.fit(xtrain, ytrain)
-    rfc.fit(xtrain, ytrain)
-    xgb.fit(xtrain, ytrain)
-
-    nbc_pre = nbc.predict(xtest)
-    svm_pre = svmc.predict(xtest)
-    lrc_pre = lrc.predict(xtest)
-    dtc_pre = dtc.predict(xtest)
-    rfc_pre = rfc.predict(xtest)
-    xgb_pre = xgb.predict(xtest)
+def different_model(cores=None):
+    # each pipeline standardizes with the statistics of xtrain and is applied as is to xtest;
+    # xgboost uses every core by default, n_jobs=-1 says so to the scheduler of run_zoo
+    models = [
+        ('NaiveBayes', make_pipeline(Standardizer(), GaussianNB(var_smoothing=1e-5))),
+        ('SVM', make_pipeline(Standardizer(), SVC())),
+        ('LogisticRegression', make_pipeline(Standardizer(), LogisticRegression(penalty='l1', C=100, solver='liblinear'))),
+        ('DecisionTree', make_pipeline(Standardizer(), DecisionTreeClassifier(criterion='gini', max_depth=20, min_samples_split=5, min_samples_leaf=1))),
+        ('RandomForest', make_pipeline(Standardizer(), RandomForestClassifier(criterion='gini', max_depth=None, max_features='sqrt', min_samples_leaf=1, min_samples_split=2, n_estimators=200))),
+        ('XGBoost', make_pipeline(Standardizer(), XGBClassifier(objective='binary:logistic', learning_rate=1, max_depth=7,
+                                                                n_estimators=200, subsample=1, colsample_bytree=1,
+                                                                n_jobs=-1))),
+    ]
+    # each model is fitted in its own process, as many at a time as their n_jobs fit into the cores
+    rows = run_zoo(models, xtrain, ytrain, xtest, ytest, cores=cores)
 
     print('-------------------- best performance --------------------')
     print('precision, f1, recall')
-    print('NaiveBayes:\t', precision_score(ytest, nbc_pre), f1_score(ytest, nbc_pre), recall_score(ytest, nbc_pre))
-    # print('KNN:\t', precision_score(ytest, knnc_pre), f1_score(ytest, knnc_pre), recall_score(ytest, knnc_pre))
-    print('SVM:\t', precision_score(ytest, svm_pre), f1_score(ytest, svm_pre), recall_score(ytest, svm_pre))
-    print('LogisticRegression:\t', precision_score(ytest, lrc_pre), f1_score(ytest, lrc_pre),
-          recall_score(ytest, lrc_pre))
-    print('DecisionTree:\t', precision_score(ytest, dtc_pre), f1_score(ytest, dtc_pre), recall_score(ytest, dtc_pre))
-    print('RandomForest:\t', precision_score(ytest, rfc_pre), f1_score(ytest, rfc_pre), recall_score(ytest, rfc_pre))
-    print('XGBoost:\t', precision_score(ytest, xgb_pre), f1_score(ytest, xgb_pre), recall_score(ytest, xgb_pre))
-
-    
-    '''
-    print('-------------------- GaussianNB --------------------')
-    param_grid = {'var_smoothing': [1e-9, 1e-8, 1e-7, 1e-6, 1e-5]}
-    gnb = GaussianNB()
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(gnb, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-
-    
-    print('-------------------- LogisticRegression --------------------')
-    param_grid = {
+    for row in rows:
+        if 'error' in row:
+            print(row['name'] + ':\t', row['error'])
+        else:
+            print(row['name'] + ':\t', row['precision'], row['f1'], row['recall'])
+    print('-------------------- time and memory --------------------')
+    print(zoo_table(rows).to_string(index=False))
+
+
+# successive halving grid search of every model family (--tune), fold scores are cached in cache_path
+PARAM_GRIDS = {
+    'GaussianNB': (GaussianNB(), {'var_smoothing': [1e-9, 1e-8, 1e-7, 1e-6, 1e-5]}),
+    'LogisticRegression': (LogisticRegression(), {
         'penalty': ['l1', 'l2'],
         'C': [0.001, 0.01, 0.1, 1, 10, 100],
         'solver': ['liblinear', 'saga']
-    }
-    lr = LogisticRegression()
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(lr, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-
-    
-    print('-------------------- Decision Tree --------------------')
-    param_grid = {
+    }),
+    'DecisionTree': (DecisionTreeClassifier(), {
         'criterion': ['gini', 'entropy'],
         'max_depth': [None, 5, 10, 20],
         'min_samples_split': [2, 5, 10],
         'min_samples_leaf': [1, 2, 4]
-    }
-    dt = DecisionTreeClassifier()
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(dt, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-
-
-    print('-------------------- XGBoost --------------------')
-    param_grid = {
+    }),
+    # one thread per fit, the folds and candidates are what runs in parallel
+    'XGBoost': (XGBClassifier(objective='binary:logistic', n_jobs=1), {
         'learning_rate': [0.01, 0.1, 1],
         'max_depth': [3, 5, 7],
         'n_estimators': [50, 100, 200],
         'subsample': [0.5, 0.7, 1.0],
         'colsample_bytree': [0.5, 0.7, 1.0],
-    }
-    xgb_clf = XGBClassifier(objective='binary:logistic')
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(xgb_clf, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-
-    print('-------------------- Random Forest --------------------')
-    param_grid = {
+    }),
+    'RandomForest': (RandomForestClassifier(n_jobs=1), {
         'n_estimators': [50, 100, 200, 300],
         'criterion': ['gini', 'entropy'],
         'max_depth': [None, 5, 10, 20],
         'min_samples_split': [2, 5, 10],
         'min_samples_leaf': [1, 2, 4],
         'max_features': ['sqrt', 'log2', None]
-    }
-    rfc = RandomForestClassifier()
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(rfc, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-    
-    print('-------------------- SVM --------------------')
-    param_grid = {'C': [0.1, 1, 10, 100],
-                  'gamma': [0.1, 1, 10, 100],
-                  'kernel': ['linear', 'rbf']}
-    svc = SVC()
-    cv = 10
-    scoring = 'f1'
-    grid_search = GridSearchCV(svc, param_grid, cv=cv, scoring=scoring)
-    grid_search.fit(xtrain, ytrain)
-    best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    print("Best parameters:", best_params)
-    print("Best score:", grid_search.best_score_)
-    print("Best model:", best_model)
-    
-    
+    }),
+    'SVM': (SVC(), {'C': [0.1, 1, 10, 100],
+                    'gamma': [0.1, 1, 10, 100],
+                    'kernel': ['linear', 'rbf']}),
+}
+
+
+def tune(families=None, cv=10, factor=3, n_jobs=-1, cache_path='grid_search_cache.sqlite', scoring='f1'):
+    cache = FoldCache(cache_path) if cache_path else None
+    # the search runs on the training split alone; scaling is the first step of the searched pipeline,
+    # so every fold is standardized with the statistics of its own training part
+    x_tune = xtrain.to_numpy(dtype=np.float64)
+    y_tune = ytrain.to_numpy()
+    for name in families or PARAM_GRIDS:
+        estimator, param_grid = PARAM_GRIDS[name]
+        pipeline = make_pipeline(Standardizer(), estimator)
+        step = pipeline.steps[-1][0]
+        print('-------------------- %s --------------------' % name)
+        start = time.perf_counter()
+        res = halving_search(pipeline, {'%s__%s' % (step, key): values for key, values in param_grid.items()},
+                             x_tune, y_tune, cv=cv, factor=factor, scoring=scoring, n_jobs=n_jobs, cache=cache,
+                             verbose=True)
+        print("Best parameters:", {key[len(step) + 2:]: value for key, value in res['best_params'].items()})
+        print("Best score:", res['best_score'])
+        print('%s: %d fits, %d fold scores from cache, wall time %.1fs' % (
+            name, res['computed'], res['cached'], time.perf_counter() - start))
+    if cache is not None:
+        cache.close()
+
+
+'''
 def random_forest_pred():
     rfc = RandomForestClassifier(criterion='gini', max_depth=None, max_features='sqrt', min_samples_leaf=1, min_samples_split=2, n_estimators=200)
     rfc = rfc.fit(xtrain, ytrain)
@@ -306,5 +170,22 @@ def random_forest_pred():
     print('Precision score:', precision_score(ytest, predicted))
 '''
 
-different_model()
-# random_forest_pred()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='train and compare the models, or tune their parameters')
+    parser.add_argument('--tune', nargs='*', default=None, metavar='FAMILY',
+                        help='halving grid search of the given model families (all when none is given): %s' %
+                             ', '.join(PARAM_GRIDS))
+    parser.add_argument('--cv', type=int, default=10, help='cross validation folds')
+    parser.add_argument('--factor', type=int, default=3, help='candidates kept / samples added per iteration')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='parallel fold fits, -1 uses every core')
+    parser.add_argument('--cache', default='grid_search_cache.sqlite',
+                        help='sqlite file of fold scores reused by later runs, empty to disable')
+    parser.add_argument('--cores', type=int, default=None,
+                        help='cores shared by the models trained at the same time, default all')
+    args = parser.parse_args()
+
+    if args.tune is None:
+        different_model(args.cores)
+        # random_forest_pred()
+    else:
+        tune(args.tune, cv=args.cv, factor=args.factor, n_jobs=args.n_jobs, cache_path=args.cache)
@@ -1,139 +1,159 @@
+import time
+_IMPORT_START = time.perf_counter()
 import os
-from nltk import word_tokenize
-from utils.comment import *
-import random
-from gensim.models import word2vec, Word2Vec
+import re
+import hashlib
+import argparse
+import json
+from multiprocessing import Pool, cpu_count
+from utils.profiling import StageTimer
+from utils.ccset import CCSetRecord, parse_ccset, read_ccset
+from utils.similarity import SimilarityEngine
+from utils.vector_store import VectorStore, file_signature
+from utils.feature_table import FEATURE_KEYS, next_part_path, save_table, to_table
+from utils.feature_store import FeatureStore, record_digest
+from utils.change_counter import COUNTER_NAMES, ChangeCounter
+from utils.intervals import covered_count
 import numpy as np
 
 
-# 输入：文件路径
+# nltk, gensim 和 cup (bs4, antlr) 导入要数秒, 都推迟到第一次使用时再导入, --help 和只处理几个文件的运行不必等待
+def word_tokenize(text):
+    from nltk import word_tokenize as tokenize
+    return tokenize(text)
+
+
+# 输入：CCSetRecord (utils.ccset.read_ccset 读取)
 # 输出：从CCSet中返回新旧注释和代码，         return oldComment, oldCode, newComment, newCode
 #       如果有空，返回None
-def getCommentAndCode(filepath):
-    with open(filepath) as f:
-        reachOldComment = False
-        reachOldCode = False
-        reachNewComment = False
-        reachNewCode = False
-        oldComment = ''
-        oldCode = ''
-        newComment = ''
-        newCode = ''
-        for line in f.readlines():
-            if line.startswith('oldComment:'):
-                reachOldComment = True
-                continue
-            if line.startswith('oldCode:'):
-                reachOldComment = False
-                reachOldCode = True
-                continue
-            if line.startswith('newComment:'):
-                reachOldCode = False
-                reachNewComment = True
-                continue
-            if line.startswith('newCode:'):
-                reachNewComment = False
-                reachNewCode = True
-                continue
-            if line.startswith('startline:'):
-                break
-            line = line.strip();
-            line = ''.join([ch if ch.isalpha() else ' ' for ch in line])
-            if reachOldComment and line.strip() != '':
-                oldComment += line + '\n'
-            if reachOldCode and line.strip() != '':
-                oldCode += line + '\n'
-            if reachNewComment and line.strip() != '':
-                newComment += line + '\n'
-            if reachNewCode and line.strip() != '':
-                newCode += line + '\n'
-        oldComment = oldComment.replace('\n', '', -1)
-        oldCode = oldCode.replace('\n', '', -1)
-        newComment = newComment.replace('\n', '', -1)
-        newCode = newCode.replace('\n', '', -1)
-        if oldComment == '' or oldCode == '' or newCode == '':
-            return None
-        return oldComment, oldCode, newComment, newCode
+def getCommentAndCode(record):
+    oldComment = CCSetRecord.alpha_text(record.old_comment)
+    oldCode = CCSetRecord.alpha_text(record.old_code)
+    newComment = CCSetRecord.alpha_text(record.new_comment)
+    newCode = CCSetRecord.alpha_text(record.new_code)
+    if oldComment == '' or oldCode == '' or newCode == '':
+        return None
+    return oldComment, oldCode, newComment, newCode
 
 
 # 输入 oldComment,oldCode,newComment,newCode
 # 输出 Txt
-def getTxt(oldComment, oldCode, newComment, newCode):
+def getTxt(oldComment, oldCode, newComment, newCode, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
     tokenizedOldComment = word_tokenize(oldComment)
     tokenizedOldCode = word_tokenize(oldCode)
     tokenizedNewComment = word_tokenize(newComment)
     tokenizedNewCode = word_tokenize(newCode)
-    oldCommentTxt = ''
-    oldCodeTxt = ''
-    newCommentTxt = ''
-    newCodeTxt = ''
-    for x in tokenizedOldComment:
-        r1 = random.randint(0, len(tokenizedOldCode) - 1)
-        r2 = random.randint(0, len(tokenizedOldCode) - 1)
-        oldCommentTxt += x + ' ' + tokenizedOldCode[r1] + ' ' + tokenizedOldCode[r2] + ' '
-
-    for x in tokenizedOldCode:
-        r1 = random.randint(0, len(tokenizedOldComment) - 1)
-        r2 = random.randint(0, len(tokenizedOldComment) - 1)
-        oldCodeTxt += x + ' ' + tokenizedOldComment[r1] + ' ' + tokenizedOldComment[r2] + ' '
-
-    for x in tokenizedNewComment:
-        r1 = random.randint(0, len(tokenizedNewCode) - 1)
-        r2 = random.randint(0, len(tokenizedNewCode) - 1)
-        newCommentTxt += x + ' ' + tokenizedNewCode[r1] + ' ' + tokenizedNewCode[r2] + ' '
-
-    for x in tokenizedNewCode:
-        r1 = random.randint(0, len(tokenizedNewComment) - 1)
-        r2 = random.randint(0, len(tokenizedNewComment) - 1)
-        newCodeTxt += x + ' ' + tokenizedNewComment[r1] + ' ' + tokenizedNewComment[r2] + ' '
-
+    oldCommentTxt = pairTxt(tokenizedOldComment, tokenizedOldCode, rng)
+    oldCodeTxt = pairTxt(tokenizedOldCode, tokenizedOldComment, rng)
+    newCommentTxt = pairTxt(tokenizedNewComment, tokenizedNewCode, rng)
+    newCodeTxt = pairTxt(tokenizedNewCode, tokenizedNewComment, rng)
     return oldCommentTxt + '. ' + oldCodeTxt + '. ' + newCommentTxt + '. ' + newCodeTxt + '. '
 
 
+# 每个词后面跟两个随机抽取的另一侧的词: 随机下标一次生成, 按 (词, 词, 词) 排成一行后一次 join
+# 另一侧为空而本侧不为空时与原先的 random.randint 一样抛出 ValueError
+def pairTxt(tokens, others, rng):
+    if len(tokens) == 0:
+        return ''
+    words = np.empty((len(tokens), 3), dtype=object)
+    words[:, 0] = tokens
+    words[:, 1:] = np.asarray(others, dtype=object)[rng.integers(0, len(others), size=(len(tokens), 2))]
+    return ' '.join(words.ravel().tolist()) + ' '
+
+
 # 处理复合词 调用cup
 # 输入 txt
 # 输出 处理复合词后的语料库txt
 def useCupToGetTxt(txt):
-    commentCleaner = CommentCleaner(replace_digit=True)
-    javaDocDescPreprocessor = JavadocDescPreprocessor(comment_cleaner=commentCleaner)
-    result = javaDocDescPreprocessor.preprocess_desc(txt, txt)
-    res = ''
-    for d in result:
-        l = d['src_sent_tokens']
-        for token in l:
-            if not token.__contains__('<con>'):
-                res += token + ' '
-    return res
+    return get_cup().tokenize(txt)
+
+
+# 先 word_tokenize 再调用 cup, 结果同样按内容哈希缓存
+def cupTokens(txt):
+    return get_cup().tokenize(txt, split_words=True)
+
+
+# 复用同一个 cup 预处理器, 第一次使用时创建; 给出 cache_path 时分词结果还会存到 sqlite, 供所有 worker 和之后的运行共用
+cup = None
+cup_cache_path = None
+
+
+def get_cup():
+    global cup
+    if cup is None:
+        from utils.cup_cache import CachedCupPreprocessor
+        cup = CachedCupPreprocessor(replace_digit=True, cache_path=cup_cache_path)
+    return cup
 
 
-# 输入 ccset java文件路径
+def use_token_cache(cache_path):
+    global cup, cup_cache_path
+    cup_cache_path = cache_path
+    cup = None
+
+
+# 输入 ccset java文件路径, 随机数发生器 (None 时每次随机)
 # 输出 由此文件生成的语料库
-def generateTxt(filepath):
-    res = getCommentAndCode(filepath)
+def generateTxt(filepath, rng=None):
+    res = getCommentAndCode(read_ccset(filepath))
     if not res is None:
         oldComment, oldCode, newComment, newCode = res
-        txt = getTxt(oldComment, oldCode, newComment, newCode)
+        txt = getTxt(oldComment, oldCode, newComment, newCode, rng)
         txt = useCupToGetTxt(txt)
         return txt
     else:
         return ''
 
 
-model = Word2Vec.load("/Users/chenyn/chenyn's/研究生/DataSet/My dect/word2vector/wordvector/word_vector.model")
+MODEL_PATH = "/Users/chenyn/chenyn's/研究生/DataSet/My dect/word2vector/wordvector/word_vector.model"
+# 由 --export-vectors 从 MODEL_PATH 导出的只读词向量 (word_vector.vectors.npy + word_vector.vocab.txt)
+VECTORS_PATH = os.path.splitext(MODEL_PATH)[0]
+vector_paths = {'model': MODEL_PATH, 'vectors': VECTORS_PATH}
+model = None
+engine = None
+vectors_fingerprint = None
+
+
+# 完整的 gensim 模型, 只在没有导出的词向量时才需要
+def load_model(model_path=MODEL_PATH):
+    global model
+    if model is None:
+        from gensim.models import Word2Vec
+        model = Word2Vec.load(model_path)
+    return model
+
+
+# 换用其他词向量文件, 下一次计算相似度时按新路径重新加载
+def use_vectors(vectors_path=VECTORS_PATH, model_path=MODEL_PATH):
+    global engine, model, vectors_fingerprint
+    vector_paths['vectors'] = vectors_path
+    vector_paths['model'] = model_path
+    engine = None
+    model = None
+    vectors_fingerprint = None
+
+
+# 第一次计算相似度时才加载词向量, 优先 mmap 打开导出的 .npy, 多个 worker 共享同一份页缓存
+def get_engine():
+    global engine
+    if engine is None:
+        if VectorStore.exists(vector_paths['vectors']):
+            wv = VectorStore.load(vector_paths['vectors'])
+        else:
+            wv = load_model(vector_paths['model']).wv
+        engine = SimilarityEngine(wv)
+    return engine
 
 
 def sim_word2word(wd1, wd2):
-    res = 0.0
-    try:
-        res = model.wv.similarity(wd1, wd2)
-        return res
-    except:
-        return 0.0
+    return float(get_engine().word2sentence_max([wd1], [wd2])[0])
 
 
 def sim_word2sentence(wd, sentence):
     if len(sentence) > 0:
-        return max([sim_word2word(wd, word) for word in sentence])
+        return float(get_engine().word2sentence_max([wd], sentence)[0])
     # if len(sentence) > 0:
     #     return sum([sim_word2word(wd, word) for word in sentence]) / len(sentence)
     else:
@@ -141,106 +161,46 @@ def sim_word2sentence(wd, sentence):
 
 
 def sim_sen12sen2(sen1, sen2):
-    if len(sen1) == 0 or len(sen2) == 0:
-        return 0.0
-    l = [sim_word2sentence(wd, sen2) for wd in sen1]
-    s = sum(l)
-    return s / len(sen1)
+    return get_engine().sen12sen2(sen1, sen2)
 
 
 def sim_sen2sen(sen1, sen2):
-    return (sim_sen12sen2(sen1, sen2) + sim_sen12sen2(sen2, sen1)) / 2
-
+    return get_engine().sen2sen(sen1, sen2)
 
-def get_changed_sentence(filepath):
-    res = ''
-    with open(filepath) as f:
-        for line in f.readlines():
-            if line.startswith('change_entity_uniqueName:'):
-                line = line.replace('change_entity_uniqueName:', '')
-                line = line.strip();
-                line = ''.join([ch if ch.isalpha() else ' ' for ch in line])
-                res += line + '\n'
-                res = res.replace('\n', '', -1)
 
+def get_changed_sentence(record):
+    res = ''.join([''.join([ch if ch.isalpha() else ' ' for ch in change.unique_name.strip()])
+                   for change in record.changes])
     return useCupToGetTxt(res)
 
 
-def get_all_token_change_sim(filepath):
-    res = getCommentAndCode(filepath)
-    try:
-        oldComment, oldCode, newComment, newCode = res
-    except:
-        os.remove(filepath)
-
-    tokenizedOldComment = word_tokenize(oldComment)
-    tokenizedOldCode = word_tokenize(oldCode)
-    tokenizedNewCode = word_tokenize(newCode)
-
-    oldCommentTxt = ''
-    oldCodeTxt = ''
-    newCodeTxt = ''
-
-    for x in tokenizedOldComment:
-        oldCommentTxt += x + ' '
-    for x in tokenizedOldCode:
-        oldCodeTxt += x + ' '
-    for x in tokenizedNewCode:
-        newCodeTxt += x + ' '
-
-    oldComment = useCupToGetTxt(oldCommentTxt)
-    oldCode = useCupToGetTxt(oldCodeTxt)
-    newCode = useCupToGetTxt(newCodeTxt)
+def get_all_token_change_sim(record):
+    oldComment, oldCode, newComment, newCode = getCommentAndCode(record)
 
-    old2old_sim_t = [sim_word2sentence(word, oldCode.split()) for word in oldComment.split()]
-    old2new_sim_t = [sim_word2sentence(word, newCode.split()) for word in oldComment.split()]
-
-    res = []
-    for i in range(len(old2old_sim_t)):
-        res.append(abs(old2old_sim_t[i] - old2new_sim_t[i]))
-    return sum(res)
+    oldComment = cupTokens(oldComment)
+    oldCode = cupTokens(oldCode)
+    newCode = cupTokens(newCode)
 
+    old2old_sim_t = get_engine().word2sentence_max(oldComment.split(), oldCode.split())
+    old2new_sim_t = get_engine().word2sentence_max(oldComment.split(), newCode.split())
+    return float(np.abs(old2old_sim_t - old2new_sim_t).sum())
 
-def get_sims(filepath):
-    changed_sen = get_changed_sentence(filepath)
-    res = getCommentAndCode(filepath)
 
-    oldComment, oldCode, newComment, newCode = res
+def get_sims(record):
+    changed_sen = get_changed_sentence(record)
+    oldComment, oldCode, newComment, newCode = getCommentAndCode(record)
 
-    tokenizedOldComment = word_tokenize(oldComment)
-    tokenizedOldCode = word_tokenize(oldCode)
-    tokenizedNewCode = word_tokenize(newCode)
-    tokenizedChangedSen = word_tokenize(changed_sen)
-
-    oldCommentTxt = ''
-    oldCodeTxt = ''
-    newCodeTxt = ''
-    changed_sen = ''
-
-    for x in tokenizedOldComment:
-        oldCommentTxt += x + ' '
-    for x in tokenizedOldCode:
-        oldCodeTxt += x + ' '
-    for x in tokenizedNewCode:
-        newCodeTxt += x + ' '
-    for x in tokenizedChangedSen:
-        changed_sen += x + ' '
-
-    oldComment = useCupToGetTxt(oldCommentTxt)
-    oldCode = useCupToGetTxt(oldCodeTxt)
-    newCode = useCupToGetTxt(newCodeTxt)
-    changedsen = useCupToGetTxt(changed_sen)
+    oldComment = cupTokens(oldComment)
+    oldCode = cupTokens(oldCode)
+    newCode = cupTokens(newCode)
+    changedsen = cupTokens(changed_sen)
 
     return round(sim_sen2sen(oldComment.split(), oldCode.split()), 6), round(
         sim_sen2sen(oldComment.split(), newCode.split()), 6), round(
         sim_sen2sen(oldComment.split(), changedsen.split()), 6)
 
 
-import os
-import re
-import nltk
-from nltk import word_tokenize
-from nltk import pos_tag
+from utils.pos_features import POS_GROUPS, pos_ratios, tag_sentences
 
 remove_chars = '[·’!"\#$%&\'()＃！（）*+,-./:;<=>?\@，：?￥★、…．＞【】［］《》？“”‘’\[\\]^_`{|}~]+'
 
@@ -252,599 +212,504 @@ def getTokens(sentence):
     return words
 
 
+# 输入：CCSetRecord
+# 输出：旧注释、旧代码、新代码用于词性标注的词序列
+def pos_tokens(record):
+    return [getTokens(CCSetRecord.raw_text(lines)) for lines in (record.old_comment, record.old_code, record.new_code)]
+
+
 import os
 
+OUTPUT_DIR = "/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/opennms_feature/"
 
-def getFeatures(filepath):
-    with open(filepath) as f:
-        all_token_change_sim = get_all_token_change_sim(filepath)
-        cmt2cd_sim_before, cmt2cd_sim_after, cmt2ch_sim = get_sims(filepath)
-        sim_change = abs(cmt2cd_sim_before - cmt2cd_sim_after)
-        label = 0
-        changeNum = 0  ##变更数量
-        attribute = 0  ##
-        methodDeclaration = 0  ##
-        methodRenaming = 0  ##
-        returnType = 0  ##
-        parameterDelete = 0  ##
-        parameterInsert = 0  ##
-        parameterRenaming = 0  ##
-        parameterTypeChange = 0  ##
-        containReturn = 0  ##
-        lineNumOfOldCode = 0  ##
-        lineNumOfOldComment = 0  ##
-        lineNumOfNewCode = 0  ##
-        oldCode = ''
-        reachOldCode = False
-        oldComment = ''
-        reachOldComment = False
-        newCode = ''
-        reachNewCode = False
-        TODOCount = 0  ##
-        XXXCount = 0  ##
-        BUGCount = 0  ##
-        VERSIONCount = 0  ##
-        FIXMECount = 0  ##
-        FIXEDCount = 0  ##
-        commentByCCSet = 0  ##
-        lineNumOfChanged = 0  ##
-        setOfChangedLine = set()
-        changedLineByAllCodeLine = 0.0  ##
-        changeCase = ''
-
-        ifInsert = 0  ##
-        ifUpdate = 0  ##
-        ifMove = 0  ##
-        ifDelete = 0  ##
-
-        forInsert = 0  ##
-        forUpdate = 0  ##
-        forMove = 0  ##
-        forDelete = 0  ##
-
-        foreachInsert = 0  ##
-        foreachUpdate = 0  ##
-        foreachMove = 0  ##
-        foreachDelete = 0  ##
-
-        whileInsert = 0  ##
-        whileUpdate = 0  ##
-        whileMove = 0  ##
-        whileDelete = 0  ##
-
-        catchInsert = 0  ##
-        catchUpdate = 0  ##
-        catchMove = 0  ##
-        catchDelete = 0  ##
-
-        tryInsert = 0  ##
-        tryUpdate = 0  ##
-        tryMove = 0  ##
-        tryDelete = 0  ##
-
-        throwInsert = 0  ##
-        throwUpdate = 0  ##
-        throwMove = 0  ##
-        throwDelete = 0  ##
-
-        methodInvInsert = 0  ##
-        methodInvUpdate = 0  ##
-        methodInvMove = 0  ##
-        methodInvDelete = 0  ##
-
-        assignInsert = 0  ##
-        assignUpdate = 0  ##
-        assignMove = 0  ##
-        assignDelete = 0  ##
-
-        varDecInsert = 0  ##
-        varDecUpdate = 0  ##
-        varDecMove = 0  ##
-        varDecDelete = 0  ##
-
-        elseInsert = 0  ##
-        elseUpdate = 0  ##
-        elseMove = 0  ##
-        elseDelete = 0  ##
-
-        oldCommentPos = dict()  ##
-        codePosChange = dict()  ##
-        bothHavePairNumChange = 0  ##
-
-        origin = f.readlines()
-        for line in origin:
-            if re.match(r'change \d : \d+,\d+', line):
-                matched = re.match(r'change \d : (\d+),(\d+)', line)
-                for i in range(int(matched.group(1)), 1 + int(matched.group(2))):
-                    setOfChangedLine.add(i)
-            if re.match(r'label:\d', line):
-                label = str(re.match(r'label:(\d)', line).group(1))
-            if line.startswith('oldComment:'):
-                reachOldComment = True
-                continue
-            if line.startswith('oldCode:'):
-                reachOldCode = True
-                reachOldComment = False
-                continue
-            if line.startswith('newCode:'):
-                reachNewCode = True
-                continue
-            if line.startswith('startline:'):
-                reachNewCode = False
-                continue
-            if line.startswith('newComment:'):
-                reachOldCode = False
-            if reachOldCode:
-                if len(line.strip()) != 0:
-                    oldCode += line
-                    lineNumOfOldCode += 1
-            if reachNewCode:
-                if len(line.strip()):
-                    newCode += line
-                    lineNumOfNewCode += 1
-
-            if reachOldComment:
-                if len(line.strip()) != 0:
-                    oldComment += line
-                    lineNumOfOldComment += 1
-            if line.startswith('change_entity_type:'):
-                if not (line.__contains__('COMMENT') or line.__contains__('DOC')):
-                    changeNum += 1
-            if line.startswith('change_type:') and line.__contains__('ATTRIBUTE'):
-                attribute += 1
-            if line.startswith('change_entity:') and line.__contains__('METHOD_DECLARATION'):
-                methodDeclaration += 1
-            if line.startswith('change_type:'):
-                if line.__contains__('METHOD_RENAMING'):
-                    methodRenaming += 1
-                if line.__contains__('RETURN_TYPE'):
-                    returnType += 1
-                if line.__contains__('PARAMETER_DELETE'):
-                    parameterDelete += 1
-                if line.__contains__('PARAMETER_INSERT'):
-                    parameterInsert += 1
-                if line.__contains__('PARAMETER_RENAMING'):
-                    parameterRenaming += 1
-                if line.__contains__('PARAMETER_TYPE_CHANGE'):
-                    parameterTypeChange += 1
-            if re.match(r'change:[A-z]+:', line):
-                matched = re.match(r'change:([A-z]+):', line).group(1)
-                changeCase = str(matched)
-
-            if line.startswith('change_entity_type:') and line.__contains__('IF_STATEMENT') and changeCase.__contains__(
-                    'Update'):
-                ifUpdate += 1
-            if line.startswith('change_entity_type:') and line.__contains__('IF_STATEMENT') and changeCase.__contains__(
-                    'Move'):
-                ifMove += 1
-            if line.startswith('change_entity_type:') and line.__contains__('IF_STATEMENT') and changeCase.__contains__(
-                    'Delete'):
-                ifDelete += 1
-            if line.startswith('change_entity_type:') and line.__contains__('IF_STATEMENT') and changeCase.__contains__(
-                    'Insert'):
-                ifInsert += 1
-
-            if line.startswith('change_entity_type:') and line.__contains__(
-                    'FOR_STATEMENT') and changeCase.__contains__('Update'):
-                forUpdate += 1
-            if line.startswith('change_entity_type:') and line.__contains__(
-                    'FOR_STATEMENT') and changeCase.__contains__('Move'):
-                forMove += 1
-            if line.startswith('change_entity_type:') and line.__contains__(
-                    'FOR_STATEMENT') and changeCase.__contains__('Delete'):
-                forDelete += 1
-            if line.startswith('change_entity_type:') and line.__contains__(
-                    'FOR_STATEMENT') and changeCase.__contains__('Insert'):
-                forInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'FOREACH_STATEMENT') and changeCase.__contains__('Update'):
-                foreachUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'FOREACH_STATEMENT') and changeCase.__contains__('Move'):
-                foreachMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'FOREACH_STATEMENT') and changeCase.__contains__('Delete'):
-                foreachDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'FOREACH_STATEMENT') and changeCase.__contains__('Insert'):
-                foreachInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'WHILE_STATEMENT') and changeCase.__contains__('Update'):
-                whileUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'WHILE_STATEMENT') and changeCase.__contains__('Move'):
-                whileMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'WHILE_STATEMENT') and changeCase.__contains__('Delete'):
-                whileDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'WHILE_STATEMENT') and changeCase.__contains__('Insert'):
-                whileInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__('CATCH_CLAUSE') and changeCase.__contains__(
-                    'Update'):
-                catchUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__('CATCH_CLAUSE') and changeCase.__contains__(
-                    'Move'):
-                catchMove += 1
-            if line.startswith('change_entity_type') and line.__contains__('CATCH_CLAUSE') and changeCase.__contains__(
-                    'Delete'):
-                catchDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__('CATCH_CLAUSE') and changeCase.__contains__(
-                    'Insert'):
-                catchInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'TRY_STATEMENT') and changeCase.__contains__('Update'):
-                tryUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'TRY_STATEMENT') and changeCase.__contains__('Move'):
-                tryMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'TRY_STATEMENT') and changeCase.__contains__('Delete'):
-                tryDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'TRY_STATEMENT') and changeCase.__contains__('Insert'):
-                tryInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'THROW_STATEMENT') and changeCase.__contains__('Update'):
-                throwUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'THROW_STATEMENT') and changeCase.__contains__('Move'):
-                throwMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'THROW_STATEMENT') and changeCase.__contains__('Delete'):
-                throwDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'THROW_STATEMENT') and changeCase.__contains__('Insert'):
-                throwInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'METHOD_INVOCATION') and changeCase.__contains__('Update'):
-                methodInvUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'METHOD_INVOCATION') and changeCase.__contains__('Move'):
-                methodInvMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'METHOD_INVOCATION') and changeCase.__contains__('Delete'):
-                methodInvDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'METHOD_INVOCATION') and changeCase.__contains__('Insert'):
-                methodInvInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__('ASSIGNMENT') and changeCase.__contains__(
-                    'Update'):
-                assignUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__('ASSIGNMENT') and changeCase.__contains__(
-                    'Move'):
-                assignMove += 1
-            if line.startswith('change_entity_type') and line.__contains__('ASSIGNMENT') and changeCase.__contains__(
-                    'Delete'):
-                assignDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__('ASSIGNMENT') and changeCase.__contains__(
-                    'Insert'):
-                assignInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'VARIABLE_DECLARATION_STATEMENT') and changeCase.__contains__('Update'):
-                varDecUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'VARIABLE_DECLARATION_STATEMENT') and changeCase.__contains__('Move'):
-                varDecMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'VARIABLE_DECLARATION_STATEMENT') and changeCase.__contains__('Delete'):
-                varDecDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'VARIABLE_DECLARATION_STATEMENT') and changeCase.__contains__('Insert'):
-                varDecInsert += 1
-
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'ELSE_STATEMENT') and changeCase.__contains__('Update'):
-                elseUpdate += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'ELSE_STATEMENT') and changeCase.__contains__('Move'):
-                elseMove += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'ELSE_STATEMENT') and changeCase.__contains__('Delete'):
-                elseDelete += 1
-            if line.startswith('change_entity_type') and line.__contains__(
-                    'ELSE_STATEMENT') and changeCase.__contains__('Insert'):
-                elseInsert += 1
-
-        if oldCode.__contains__('return'):
-            containReturn = 1
-
-        TODOCount = 0 if oldComment.upper().count('TODO') == 0 else 1
-        FIXMECount = 0 if oldComment.upper().count('FIXME') == 0 else 1
-        XXXCount = 0 if oldComment.upper().count('XXX') == 0 else 1
-        BUGCount = 0 if oldComment.upper().count('BUG') == 0 else 1
-        VERSIONCount = 0 if oldComment.upper().count('VERSION') == 0 else 1
-        FIXEDCount = 0 if oldComment.upper().count('FIXED') == 0 else 1
-        commentByCCSet = float(format(lineNumOfOldComment / (lineNumOfOldCode + lineNumOfOldComment), '.6f'))
-        lineNumOfChanged = len(setOfChangedLine)
-        if lineNumOfOldCode != 0:
-            changedLineByAllCodeLine = float(format((lineNumOfChanged / lineNumOfOldCode), '.6f'))
+
+# 各特征组的版本号, 修改某组特征的计算方式时把它加一, 特征库 (--store) 中旧版本的结果会被重新计算
+# similarity 还依赖词向量, 它在特征库中的版本另外带上所用词向量的指纹 (group_version), 换模型时自动重新计算
+FEATURE_VERSIONS = {'change': 1, 'line': 1, 'pos': 1, 'similarity': 1}
+
+
+# 输出 get_engine 将要加载的词向量的指纹: 导出的词向量按 VectorStore.fingerprint, 否则按 gensim 模型文件的大小和修改时间
+def get_vectors_fingerprint():
+    global vectors_fingerprint
+    if vectors_fingerprint is None:
+        if VectorStore.exists(vector_paths['vectors']):
+            vectors_fingerprint = VectorStore.fingerprint(vector_paths['vectors'])
         else:
-            os.remove(filepath)
-
-        dictOfOldCommentPos = {'NN': 0, 'VB': 0, 'DT': 0, 'IN': 0, 'JJ': 0, 'RB': 0, 'PRP': 0, 'MD': 0, 'LS': 0,
-                               'RP': 0}
-        dictOfOldCodePos = {'NN': 0, 'VB': 0, 'DT': 0, 'IN': 0, 'JJ': 0, 'RB': 0, 'PRP': 0, 'MD': 0, 'LS': 0, 'RP': 0}
-        dictOfNewCodePos = {'NN': 0, 'VB': 0, 'DT': 0, 'IN': 0, 'JJ': 0, 'RB': 0, 'PRP': 0, 'MD': 0, 'LS': 0, 'RP': 0}
-
-        oldCommentPos = pos_tag(getTokens(oldComment))
-        oldCodePos = pos_tag(getTokens(oldCode))
-        newCodePos = pos_tag(getTokens(newCode))
-
-        bothHaveBefore = [w for w in getTokens(oldComment) if w in getTokens(oldCode)]
-        bothHaveAfter = [w for w in getTokens(oldComment) if w in getTokens(newCode)]
-        w1 = [w for w in bothHaveBefore if w not in bothHaveAfter]
-        w2 = [w for w in bothHaveAfter if w not in bothHaveBefore]
-        bothHavePairNumChange = abs(len(w1) + len(w2))
-
-        for x in oldCommentPos:
-            if (str(x[1]) == 'NN' or
-                    str(x[1]) == 'NNS' or
-                    str(x[1]) == 'NNP' or
-                    str(x[1]) == 'NNPS'):
-                dictOfOldCommentPos['NN'] += 1
-            if (str(x[1]) == 'VB' or
-                    str(x[1]) == 'VBD' or
-                    str(x[1]) == 'VBG' or
-                    str(x[1]) == 'VBN' or
-                    str(x[1]) == 'VBP' or
-                    str(x[1]) == 'VBZ'):
-                dictOfOldCommentPos['VB'] += 1
-            if (str(x[1]) == 'DT' or
-                    str(x[1]) == 'WDT'):
-                dictOfOldCommentPos['DT'] += 1
-            if (str(x[1]) == 'IN' or
-                    str(x[1]) == 'CC'):
-                dictOfOldCommentPos['IN'] += 1
-            if (str(x[1]) == 'JJ' or
-                    str(x[1]) == 'JJR' or
-                    str(x[1]) == 'JJS'):
-                dictOfOldCommentPos['JJ'] += 1
-            if (str(x[1]) == 'RB' or
-                    str(x[1]) == 'RBR' or
-                    str(x[1]) == 'RBS' or
-                    str(x[1]) == 'WRB'):
-                dictOfOldCommentPos['RB'] += 1
-            if (str(x[1]) == 'PRP' or
-                    str(x[1]) == 'PRP$' or
-                    str(x[1]) == 'WP' or
-                    str(x[1]) == 'WP$'):
-                dictOfOldCommentPos['PRP'] += 1
-            if (str(x[1]) == 'MD'):
-                dictOfOldCommentPos['MD'] += 1
-            if (str(x[1]) == 'LS'):
-                dictOfOldCommentPos['LS'] += 1
-            if (str(x[1]) == 'RP'):
-                dictOfOldCommentPos['RP'] += 1
-
-        for x in oldCodePos:
-            if (str(x[1]) == 'NN' or
-                    str(x[1]) == 'NNS' or
-                    str(x[1]) == 'NNP' or
-                    str(x[1]) == 'NNPS'):
-                dictOfOldCodePos['NN'] += 1
-            if (str(x[1]) == 'VB' or
-                    str(x[1]) == 'VBD' or
-                    str(x[1]) == 'VBG' or
-                    str(x[1]) == 'VBN' or
-                    str(x[1]) == 'VBP' or
-                    str(x[1]) == 'VBZ'):
-                dictOfOldCodePos['VB'] += 1
-            if (str(x[1]) == 'DT' or
-                    str(x[1]) == 'WDT'):
-                dictOfOldCodePos['DT'] += 1
-            if (str(x[1]) == 'IN' or
-                    str(x[1]) == 'CC'):
-                dictOfOldCodePos['IN'] += 1
-            if (str(x[1]) == 'JJ' or
-                    str(x[1]) == 'JJR' or
-                    str(x[1]) == 'JJS'):
-                dictOfOldCodePos['JJ'] += 1
-            if (str(x[1]) == 'RB' or
-                    str(x[1]) == 'RBR' or
-                    str(x[1]) == 'RBS' or
-                    str(x[1]) == 'WRB'):
-                dictOfOldCodePos['RB'] += 1
-            if (str(x[1]) == 'PRP' or
-                    str(x[1]) == 'PRP$' or
-                    str(x[1]) == 'WP' or
-                    str(x[1]) == 'WP$'):
-                dictOfOldCodePos['PRP'] += 1
-            if (str(x[1]) == 'MD'):
-                dictOfOldCodePos['MD'] += 1
-            if (str(x[1]) == 'LS'):
-                dictOfOldCodePos['LS'] += 1
-            if (str(x[1]) == 'RP'):
-                dictOfOldCodePos['RP'] += 1
-        for x in newCodePos:
-            if (str(x[1]) == 'NN' or
-                    str(x[1]) == 'NNS' or
-                    str(x[1]) == 'NNP' or
-                    str(x[1]) == 'NNPS'):
-                dictOfNewCodePos['NN'] += 1
-            if (str(x[1]) == 'VB' or
-                    str(x[1]) == 'VBD' or
-                    str(x[1]) == 'VBG' or
-                    str(x[1]) == 'VBN' or
-                    str(x[1]) == 'VBP' or
-                    str(x[1]) == 'VBZ'):
-                dictOfNewCodePos['VB'] += 1
-            if (str(x[1]) == 'DT' or
-                    str(x[1]) == 'WDT'):
-                dictOfNewCodePos['DT'] += 1
-            if (str(x[1]) == 'IN' or
-                    str(x[1]) == 'CC'):
-                dictOfNewCodePos['IN'] += 1
-            if (str(x[1]) == 'JJ' or
-                    str(x[1]) == 'JJR' or
-                    str(x[1]) == 'JJS'):
-                dictOfNewCodePos['JJ'] += 1
-            if (str(x[1]) == 'RB' or
-                    str(x[1]) == 'RBR' or
-                    str(x[1]) == 'RBS' or
-                    str(x[1]) == 'WRB'):
-                dictOfNewCodePos['RB'] += 1
-            if (str(x[1]) == 'PRP' or
-                    str(x[1]) == 'PRP$' or
-                    str(x[1]) == 'WP' or
-                    str(x[1]) == 'WP$'):
-                dictOfNewCodePos['PRP'] += 1
-            if (str(x[1]) == 'MD'):
-                dictOfNewCodePos['MD'] += 1
-            if (str(x[1]) == 'LS'):
-                dictOfNewCodePos['LS'] += 1
-            if (str(x[1]) == 'RP'):
-                dictOfNewCodePos['RP'] += 1
-
-        for key in dictOfOldCommentPos.keys():
-            if len(getTokens(oldComment)) != 0:
-                dictOfOldCommentPos[key] = format(dictOfOldCommentPos[key] / len(getTokens(oldComment)), '.6f')
-            else:
-                os.remove(filepath)
-        for key in dictOfOldCodePos.keys():
-            if len(getTokens(oldCode)) != 0:
-                dictOfOldCodePos[key] = format(dictOfOldCodePos[key] / len(getTokens(oldCode)), '.6f')
-            else:
-                os.remove(filepath)
-        for key in dictOfNewCodePos.keys():
-            if len(getTokens(newCode)) != 0:
-                dictOfNewCodePos[key] = format(dictOfNewCodePos[key] / len(getTokens(newCode)), '.6f')
-            else:
+            vectors_fingerprint = 'model-' + file_signature(vector_paths['model'])
+    return vectors_fingerprint
+
+
+# 特征组在特征库中的版本
+def group_version(group):
+    if group == 'similarity':
+        return '%d-%s' % (FEATURE_VERSIONS[group], get_vectors_fingerprint())
+    return FEATURE_VERSIONS[group]
+
+feature_store = None
+
+
+# 之后的 getFeatures 从 store_path 的特征库读取/写入各特征组
+def use_feature_store(store_path):
+    global feature_store
+    feature_store = FeatureStore(store_path) if store_path is not None else None
+
+
+change_counter = ChangeCounter()
+
+
+# 输入：CCSetRecord
+# 输出：标签、变更数量、变更类型与变更实体计数特征 (计数规则见 utils.change_counter 中的表)
+def getChangeFeatures(record):
+    label = record.label if record.label is not None else 0
+    containReturn = 0  ##
+    if CCSetRecord.raw_text(record.old_code).__contains__('return'):
+        containReturn = 1
+
+    features = dict()
+    features['label'] = str(label)
+    for name, value in zip(COUNTER_NAMES, change_counter.count(record.changes)):
+        features[name] = str(value)
+    features['containReturn'] = str(containReturn)
+    return features
+
+
+# 输入：CCSetRecord
+# 输出：新旧注释/代码行数、注释关键词与变更行数特征
+def getLineFeatures(record):
+    changedLineByAllCodeLine = 0.0  ##
+    oldComment = CCSetRecord.raw_text(record.old_comment)
+    lineNumOfOldComment = len(record.old_comment)
+    lineNumOfOldCode = len(record.old_code)
+
+    TODOCount = 0 if oldComment.upper().count('TODO') == 0 else 1
+    FIXMECount = 0 if oldComment.upper().count('FIXME') == 0 else 1
+    XXXCount = 0 if oldComment.upper().count('XXX') == 0 else 1
+    BUGCount = 0 if oldComment.upper().count('BUG') == 0 else 1
+    VERSIONCount = 0 if oldComment.upper().count('VERSION') == 0 else 1
+    FIXEDCount = 0 if oldComment.upper().count('FIXED') == 0 else 1
+    commentByCCSet = float(format(lineNumOfOldComment / (lineNumOfOldCode + lineNumOfOldComment), '.6f'))
+    lineNumOfChanged = covered_count(record.feature_change_lines)
+    if lineNumOfOldCode != 0:
+        changedLineByAllCodeLine = float(format((lineNumOfChanged / lineNumOfOldCode), '.6f'))
+
+    features = dict()
+    features['lineNumOfOldCodeBylineNumOfOldCCSet'] = str(
+        lineNumOfOldCode / (lineNumOfOldCode + lineNumOfOldComment))
+    features['lineNumOfOldCode'] = str(lineNumOfOldCode)
+    features['lineNumOfOldCommentBylineNumOfOldCCSet'] = str(
+        lineNumOfOldComment / (lineNumOfOldCode + lineNumOfOldComment))
+    features['lineNumOfOldComment'] = str(lineNumOfOldComment)
+    features['TODOCount'] = str(TODOCount)
+    features['FIXMECount'] = str(FIXMECount)
+    features['XXXCount'] = str(XXXCount)
+    features['BUGCount'] = str(BUGCount)
+    features['VERSIONCount'] = str(VERSIONCount)
+    features['FIXEDCount'] = str(FIXEDCount)  # ok
+    features['lineNumOfChanged'] = str(lineNumOfChanged)  # ok
+    features['changedLineByAllCodeLine'] = str(changedLineByAllCodeLine)  # ok
+    return features
+
+
+# 输入：CCSetRecord, 可选的已批量标注好的词性 (tag_sentences(pos_tokens(record)) 的结果)
+# 输出：注释与代码的词性特征, 没有可标注的词时返回 None
+def getPosFeatures(record, pos_tags=None):
+    oldCommentPos = dict()  ##
+    codePosChange = dict()  ##
+    oldCommentTokens, oldCodeTokens, newCodeTokens = pos_tokens(record)
+    if len(oldCommentTokens) == 0 or len(oldCodeTokens) == 0 or len(newCodeTokens) == 0:
+        return None
+    if pos_tags is None:
+        pos_tags = tag_sentences([oldCommentTokens, oldCodeTokens, newCodeTokens])
+    oldCommentTags, oldCodeTags, newCodeTags = pos_tags
+
+    oldCodeWords = set(oldCodeTokens)
+    newCodeWords = set(newCodeTokens)
+    bothHaveBefore = [w for w in oldCommentTokens if w in oldCodeWords]
+    bothHaveAfter = [w for w in oldCommentTokens if w in newCodeWords]
+    bothHaveBeforeWords = set(bothHaveBefore)
+    bothHaveAfterWords = set(bothHaveAfter)
+    w1 = [w for w in bothHaveBefore if w not in bothHaveAfterWords]
+    w2 = [w for w in bothHaveAfter if w not in bothHaveBeforeWords]
+    bothHavePairNumChange = abs(len(w1) + len(w2))
+
+    for key, ratio in zip(POS_GROUPS, pos_ratios(oldCommentTags)):
+        oldCommentPos[key] = format(ratio, '.6f')
+    # 代码词性变化: 新旧代码各自保留6位小数后的差
+    for key, old, new in zip(POS_GROUPS, pos_ratios(oldCodeTags), pos_ratios(newCodeTags)):
+        codePosChange[key] = format(abs(float(format(new, '.6f')) - float(format(old, '.6f'))), '.6f')
+
+    features = dict()
+    for key in oldCommentPos.keys():
+        features[str(key) + 'Comment'] = str(oldCommentPos[key])
+    for key in codePosChange.keys():
+        features[str(key) + 'Code'] = str(codePosChange[key])  # ok
+    features['bothHavePairNumChange'] = str(bothHavePairNumChange)  # ok
+    return features
+
+
+# 输入：CCSetRecord
+# 输出：注释与代码的词向量相似度特征
+def getSimilarityFeatures(record):
+    all_token_change_sim = get_all_token_change_sim(record)
+    cmt2cd_sim_before, cmt2cd_sim_after, cmt2ch_sim = get_sims(record)
+
+    features = dict()
+    features['cmt2cd_sim_before'] = str(round(abs(cmt2cd_sim_before), 6))
+    features['cmt2cd_sim_after'] = str(round(abs(cmt2cd_sim_after), 6))
+    features['cmt2cd_sim_change'] = str(round(abs(cmt2cd_sim_before - cmt2cd_sim_after), 6))  # ok
+    features['cmt2ch_sim_change'] = str(cmt2ch_sim)  # ok
+    features['all_token_change_sim'] = str(round(all_token_change_sim, 6))  # ok
+    return features
+
+
+FEATURE_GROUPS = [('similarity', getSimilarityFeatures), ('change', getChangeFeatures), ('line', getLineFeatures),
+                  ('pos', getPosFeatures)]
+
+
+# 输入 ccset java文件路径, 特征文件输出目录(None 时不写特征文件), 可选的分阶段计时器,
+#      可选的已批量标注好的词性 (tag_sentences(pos_tokens(record)) 的结果),
+# 输出 特征名 -> 特征值字符串, ccset 被删除时返回 None
+# 设置了特征库 (use_feature_store) 时, 内容和特征组版本都没变的特征组直接取库中的结果
+def getFeatures(filepath, output_dir=OUTPUT_DIR, timer=None, pos_tags=None):
+    if timer is None:
+        timer = StageTimer()
+    timer.reset_lap()
+    with open(filepath) as f:
+        origin = f.read()
+    record = parse_ccset(origin, filepath)
+    digest = record_digest(record)
+    timer.lap('parse')
+    if getCommentAndCode(record) is None:
+        os.remove(filepath)
+        return
+
+    features = dict()
+    for group, getGroupFeatures in FEATURE_GROUPS:
+        values = None
+        if feature_store is not None:
+            values = feature_store.get(digest, group, group_version(group))
+        if values is None:
+            values = getGroupFeatures(record, pos_tags) if group == 'pos' else getGroupFeatures(record)
+            # 没有可标注的词时无法计算词性占比, 与空注释/空代码一样删除该 ccset
+            if values is None:
                 os.remove(filepath)
-        for key1 in dictOfNewCodePos.keys():
-            codePosChange[key1] = format(abs(float(dictOfNewCodePos[key1]) - float(dictOfOldCodePos[key1])), '.6f')
-
-        oldCommentPos = dictOfOldCommentPos
-
-        # newfile = open(
-        #     ("/Users/chenyn/chenyn's/研究生/DataSet/My dect/features/block/") +
-        #     os.path.split(filepath)[
-        #         1],
-        #     'w')
-        newfile = open(
-            ("/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/opennms_feature/") +
-            os.path.split(filepath)[
-                1],
-            'w')
-        for line in origin:
-            newfile.write(line)
+                return
+            if feature_store is not None:
+                feature_store.put(digest, group, group_version(group), values)
+        features.update(values)
+        timer.lap(group)
+    # 按特征文件中的顺序排列
+    features = {key: features[key] for key in FEATURE_KEYS}
+
+    if output_dir is not None:
+        newfile = open(os.path.join(output_dir, os.path.split(filepath)[1]), 'w')
+        newfile.write(origin)
         newfile.write('\n-------------------------------\n')
-        newfile.write('label:' + str(label) + '\n')
-        newfile.write('changeNum:' + str(changeNum) + '\n')  # ok
-        newfile.write('attribute:' + str(attribute) + '\n')
-        newfile.write('methodDeclaration:' + str(methodDeclaration) + '\n')
-        newfile.write('methodRenaming:' + str(methodRenaming) + '\n')
-        newfile.write('returnType:' + str(returnType) + '\n')
-        newfile.write('parameterDelete:' + str(parameterDelete) + '\n')
-        newfile.write('parameterInsert:' + str(parameterInsert) + '\n')
-        newfile.write('parameterRenaming:' + str(parameterRenaming) + '\n')
-        newfile.write('parameterTypeChange:' + str(parameterTypeChange) + '\n')
-        newfile.write('containReturn:' + str(containReturn) + '\n')
-        newfile.write('lineNumOfOldCodeBylineNumOfOldCCSet:' + str(
-            lineNumOfOldCode / (lineNumOfOldCode + lineNumOfOldComment)) + '\n')
-        newfile.write('lineNumOfOldCode:' + str(lineNumOfOldCode) + '\n')
-        newfile.write('lineNumOfOldCommentBylineNumOfOldCCSet:' + str(
-            lineNumOfOldComment / (lineNumOfOldCode + lineNumOfOldComment)) + '\n')
-        newfile.write('lineNumOfOldComment:' + str(lineNumOfOldComment) + '\n')
-        newfile.write('TODOCount:' + str(TODOCount) + '\n')
-        newfile.write('FIXMECount:' + str(FIXMECount) + '\n')
-        newfile.write('XXXCount:' + str(XXXCount) + '\n')
-        newfile.write('BUGCount:' + str(BUGCount) + '\n')
-        newfile.write('VERSIONCount:' + str(VERSIONCount) + '\n')
-        newfile.write('FIXEDCount:' + str(FIXEDCount) + '\n')  # ok
-        newfile.write('lineNumOfChanged:' + str(lineNumOfChanged) + '\n')  # ok
-        newfile.write('changedLineByAllCodeLine:' + str(changedLineByAllCodeLine) + '\n')  # ok
-        newfile.write('ifInsert:' + str(ifInsert) + '\n')
-        newfile.write('ifUpdate:' + str(ifUpdate) + '\n')
-        newfile.write('ifMove:' + str(ifMove) + '\n')
-        newfile.write('ifDelete:' + str(ifDelete) + '\n')  #
-
-        newfile.write('forInsert:' + str(forInsert) + '\n')  #
-        newfile.write('forUpdate:' + str(forUpdate) + '\n')  # forUpdate = 0  ##
-        newfile.write('forMove:' + str(forMove) + '\n')  # forMove = 0  ##
-        newfile.write('forDelete:' + str(forDelete) + '\n')  # forDelete = 0  ##
-
-        newfile.write('foreachInsert:' + str(foreachInsert) + '\n')  # foreachInsert = 0  ##
-        newfile.write('foreachUpdate:' + str(foreachUpdate) + '\n')  # foreachUpdate = 0  ##
-        newfile.write('foreachMove:' + str(foreachMove) + '\n')  # foreachMove = 0  ##
-        newfile.write('foreachDelete:' + str(foreachDelete) + '\n')  # foreachDelete = 0  ##
-
-        newfile.write('whileInsert:' + str(whileInsert) + '\n')  # whileInsert = 0  ##
-        newfile.write('whileUpdate:' + str(whileUpdate) + '\n')  # whileUpdate = 0  ##
-        newfile.write('whileMove:' + str(whileMove) + '\n')  # whileMove = 0  ##
-        newfile.write('whileDelete:' + str(whileDelete) + '\n')  # whileDelete = 0  ##
-
-        newfile.write('catchInsert:' + str(catchInsert) + '\n')  # catchInsert = 0  ##
-
-        newfile.write('catchUpdate:' + str(catchUpdate) + '\n')  # catchUpdate = 0  ##
-        newfile.write('catchMove:' + str(catchMove) + '\n')  # catchMove = 0  ##
-        newfile.write('catchDelete:' + str(catchDelete) + '\n')  # catchDelete = 0  ##
-
-        newfile.write('tryInsert:' + str(tryInsert) + '\n')  # tryInsert = 0  ##
-        newfile.write('tryUpdate:' + str(tryUpdate) + '\n')  # tryUpdate = 0  ##
-        newfile.write('tryMove:' + str(tryMove) + '\n')  # tryMove = 0  ##
-        newfile.write('tryDelete:' + str(tryDelete) + '\n')  # tryDelete = 0  ##
-
-        newfile.write('throwInsert:' + str(throwInsert) + '\n')  # throwInsert = 0  ##
-        newfile.write('throwUpdate:' + str(throwUpdate) + '\n')  # throwUpdate = 0  ##
-        newfile.write('throwMove:' + str(throwMove) + '\n')  # throwMove = 0  ##
-        newfile.write('throwDelete:' + str(throwDelete) + '\n')  # throwDelete = 0  ##
-
-        newfile.write('methodInvInsert:' + str(methodInvInsert) + '\n')  # methodInvInsert = 0  ##
-        newfile.write('methodInvUpdate:' + str(methodInvUpdate) + '\n')  # methodInvUpdate = 0  ##
-        newfile.write('methodInvMove:' + str(methodInvMove) + '\n')  # methodInvMove = 0  ##
-        newfile.write('methodInvDelete:' + str(methodInvDelete) + '\n')  # methodInvDelete = 0  ##
-
-        newfile.write('assignInsert:' + str(assignInsert) + '\n')  # assignInsert = 0  ##
-        newfile.write('assignUpdate:' + str(assignUpdate) + '\n')  # assignUpdate = 0  ##
-        newfile.write('assignMove:' + str(assignMove) + '\n')  # assignMove = 0  ##
-        newfile.write('assignDelete:' + str(assignDelete) + '\n')  # assignDelete = 0  ##
-
-        newfile.write('varDecInsert:' + str(varDecInsert) + '\n')  # varDecInsert = 0  ##
-        newfile.write('varDecUpdate:' + str(varDecUpdate) + '\n')  # varDecUpdate = 0z  ##
-        newfile.write('varDecMove:' + str(varDecMove) + '\n')  # varDecMove = 0  ##
-        newfile.write('varDecDelete:' + str(varDecDelete) + '\n')  # varDecDelete = 0  ##
-
-        newfile.write('elseInsert:' + str(elseInsert) + '\n')  # elseInsert = 0  ##
-        newfile.write('elseUpdate:' + str(elseUpdate) + '\n')  # elseUpdate = 0  ##
-        newfile.write('elseMove:' + str(elseMove) + '\n')  # elseMove = 0  ##
-        newfile.write('elseDelete:' + str(elseDelete) + '\n')  # elseDelete = 0  ##
-        for key in oldCommentPos.keys():
-            newfile.write(str(key) + 'Comment:' + str(oldCommentPos[key]) + '\n')
-        for key in codePosChange.keys():
-            newfile.write(str(key) + 'Code:' + str(codePosChange[key]) + '\n')  # ok
-        newfile.write('bothHavePairNumChange:' + str(bothHavePairNumChange) + '\n')  # ok
-        newfile.write('cmt2cd_sim_before:' + str(round(abs(cmt2cd_sim_before), 6)) + '\n')
-        newfile.write('cmt2cd_sim_after:' + str(round(abs(cmt2cd_sim_after), 6)) + '\n')
-        newfile.write('cmt2cd_sim_change:' + str(round(abs(cmt2cd_sim_before - cmt2cd_sim_after), 6)) + '\n')  # ok
-        newfile.write('cmt2ch_sim_change:' + str(cmt2ch_sim) + '\n')  # ok
-        newfile.write('all_token_change_sim:' + str(round(all_token_change_sim, 6)) + '\n')  # ok
-
+        for key, value in features.items():
+            newfile.write(key + ':' + value + '\n')
         newfile.close()
+    timer.lap('write')
+    return features
 
 
 count = 0
 
 
-def blwjj(filepath):
+def blwjj(filepath, output_dir=OUTPUT_DIR):
     if os.path.isdir(filepath):
         for f in os.listdir(filepath):
-            blwjj(os.path.join(filepath, f))
+            blwjj(os.path.join(filepath, f), output_dir)
     else:
         if filepath.endswith('.java'):
             global count
             # print(count)
             count += 1
-            getFeatures(os.path.abspath(filepath))
+            getFeatures(os.path.abspath(filepath), output_dir)
+
+
+CCSET_DIR = "/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/opennms_change"
+
+
+# 输入 ccset 根目录
+# 输出 其下所有 .java ccset 文件的绝对路径(排序后, 保证分片稳定)
+def list_ccset_files(root):
+    res = []
+    for dirpath, _, filenames in os.walk(root):
+        for f in filenames:
+            if f.endswith('.java'):
+                res.append(os.path.abspath(os.path.join(dirpath, f)))
+    res.sort()
+    return res
 
 
-# blwjj("/Users/chenyn/chenyn's/研究生/DataSet/My dect/data/BLOCK")
-blwjj("/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/opennms_change")
+# 读取已完成文件的清单, 中断时写了一半的最后一行直接忽略
+def load_manifest(manifest_path):
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('status') == 'ok':
+                done.add(entry['path'])
+    return done
+
+
+def _init_worker(vectors_path, model_path, token_cache_path, store_path):
+    use_vectors(vectors_path, model_path)
+    if token_cache_path is not None:
+        use_token_cache(token_cache_path)
+    use_feature_store(store_path)
+
+
+# 一批文件的词性用一次 pos_tag_sents 标注完 (特征库中已有词性特征的文件跳过), 再逐个提取特征
+# text_dir 为 None 时只返回特征, 不再写特征文件
+def _extract_batch(args):
+    filepaths, text_dir = args
+    timer = StageTimer()
+    sentences = []
+    for filepath in filepaths:
+        try:
+            record = read_ccset(filepath)
+            if feature_store is not None and feature_store.has(record_digest(record), 'pos', group_version('pos')):
+                sentences.extend([[], [], []])
+            else:
+                sentences.extend(pos_tokens(record))
+        except Exception:
+            sentences.extend([[], [], []])
+    tags = tag_sentences(sentences)
+    timer.lap('pos')
+    res = []
+    for i, filepath in enumerate(filepaths):
+        start = time.perf_counter()
+        features = None
+        try:
+            features = getFeatures(filepath, text_dir, timer, pos_tags=tags[3 * i:3 * i + 3])
+            error = None
+        except Exception as e:
+            error = repr(e)
+        res.append((filepath, error, time.perf_counter() - start, features))
+    return res, timer.totals
+
+
+# 把缓存的特征行写成一个表分片, 之后才把这些文件记入 manifest, 中断时不会有记为完成却没有特征的文件;
+# 在两步之间中断时重跑会把这些文件再写进新分片, load_table 对同一 path 只保留最后一行
+def _flush_rows(output_dir, manifest, entries, paths, rows):
+    if len(rows) != 0:
+        save_table(to_table(paths, rows), next_part_path(output_dir))
+    for entry in entries:
+        manifest.write(json.dumps(entry) + '\n')
+    manifest.flush()
+    del entries[:], paths[:], rows[:]
+
+
+# 多进程提取特征: 每个 worker 只加载一次模型, 特征行按 flush_every 分片写入 output_dir/features-*.npy
+# (utils.feature_table.load_table 读取), 完成的文件记录到 manifest, 中断后重跑会跳过它们
+def extract_features_parallel(root, output_dir, manifest_path=None, processes=None, vectors_path=VECTORS_PATH,
+                              model_path=MODEL_PATH, token_cache_path=None, batch_size=32, report_every=100,
+                              flush_every=1000, text_files=False, store_path=None):
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, 'features_manifest.jsonl')
+    if processes is None:
+        processes = max(1, cpu_count() - 1)
+    os.makedirs(output_dir, exist_ok=True)
+
+    files = list_ccset_files(root)
+    done = load_manifest(manifest_path)
+    todo = [path for path in files if path not in done]
+    print('%d ccset files, %d already done, %d to process with %d processes' % (
+        len(files), len(files) - len(todo), len(todo), processes))
+
+    timer = StageTimer()
+    n_ok = 0
+    n_err = 0
+    entries, paths, rows = [], [], []
+    start = time.perf_counter()
+    with open(manifest_path, 'a') as manifest, \
+            Pool(processes=processes, initializer=_init_worker,
+                 initargs=(vectors_path, model_path, token_cache_path, store_path)) as pool:
+        timer.lap('startup')
+        text_dir = output_dir if text_files else None
+        tasks = [(todo[i:i + batch_size], text_dir) for i in range(0, len(todo), batch_size)]
+        for res, totals in pool.imap_unordered(_extract_batch, tasks):
+            timer.merge(totals)
+            for filepath, error, seconds, features in res:
+                entry = {'path': filepath, 'status': 'ok', 'seconds': round(seconds, 4)}
+                if error is not None:
+                    n_err += 1
+                    entry['status'] = 'error'
+                    entry['error'] = error
+                else:
+                    n_ok += 1
+                    if features is None:
+                        entry['status'] = 'removed'
+                    else:
+                        paths.append(filepath)
+                        rows.append(features)
+                entries.append(entry)
+                n = n_ok + n_err
+                if n % report_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print('%d/%d files, %.2f files/sec' % (n, len(todo), n / elapsed))
+            if len(entries) >= flush_every:
+                _flush_rows(output_dir, manifest, entries, paths, rows)
+        _flush_rows(output_dir, manifest, entries, paths, rows)
+        timer.lap('table')
+
+    elapsed = time.perf_counter() - start
+    n = n_ok + n_err
+    print('done: %d ok, %d failed in %.1fs (%.2f files/sec)' % (n_ok, n_err, elapsed, n / elapsed if elapsed else 0.0))
+    print('per-stage time summed over workers:')
+    print(timer.report(n))
+    return n_ok, n_err
+
+
+# 每个文件的随机种子由全局 seed 和文件相对 root 的路径决定, 与进程数, 分片数和机器无关
+def file_rng(root, filepath, seed):
+    digest = hashlib.blake2b(os.path.relpath(filepath, root).encode('utf-8'), digest_size=8).digest()
+    return np.random.default_rng([seed, int.from_bytes(digest, 'little')])
+
+
+def _init_corpus_worker(token_cache_path):
+    if token_cache_path is not None:
+        use_token_cache(token_cache_path)
+
+
+# 生成一个语料分片: 每个 ccset 文件一行, 先写临时文件再改名, 中断时不会留下写了一半的分片
+def _build_corpus_shard(args):
+    root, filepaths, shard_path, seed = args
+    start = time.perf_counter()
+    n_ok = 0
+    n_empty = 0
+    errors = []
+    lines = []
+    for filepath in filepaths:
+        try:
+            txt = generateTxt(filepath, file_rng(root, filepath, seed))
+        except Exception as e:
+            errors.append((filepath, repr(e)))
+            continue
+        txt = ' '.join(txt.split())
+        if txt == '':
+            n_empty += 1
+        else:
+            n_ok += 1
+            lines.append(txt + '\n')
+    tmp_path = shard_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.writelines(lines)
+    os.replace(tmp_path, shard_path)
+    return shard_path, n_ok, n_empty, errors, time.perf_counter() - start
+
+
+# 多进程生成 word2vector 的语料: ccset 文件按排序后的顺序分成 shards 个分片, 写到 output_dir/corpus-*.txt,
+# word2vector/main.py 可以直接以该目录作为语料. 失败的文件记录在 output_dir/corpus_errors.jsonl
+def build_corpus_parallel(root, output_dir, processes=None, shards=None, seed=0, token_cache_path=None):
+    if processes is None:
+        processes = max(1, cpu_count() - 1)
+    if shards is None:
+        shards = processes * 4
+    os.makedirs(output_dir, exist_ok=True)
+
+    files = list_ccset_files(root)
+    shards = max(1, min(shards, len(files)))
+    step = (len(files) + shards - 1) // shards
+    tasks = [(root, files[i:i + step], os.path.join(output_dir, 'corpus-%05d.txt' % (i // step)), seed)
+             for i in range(0, len(files), step)]
+    print('%d ccset files in %d shards with %d processes' % (len(files), len(tasks), processes))
+
+    n_ok = 0
+    n_empty = 0
+    n_err = 0
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, 'corpus_errors.jsonl'), 'w') as errors_file, \
+            Pool(processes=processes, initializer=_init_corpus_worker, initargs=(token_cache_path,)) as pool:
+        for shard_path, ok, empty, errors, seconds in pool.imap_unordered(_build_corpus_shard, tasks):
+            n_ok += ok
+            n_empty += empty
+            n_err += len(errors)
+            for filepath, error in errors:
+                errors_file.write(json.dumps({'path': filepath, 'error': error}) + '\n')
+            print('%s: %d lines in %.1fs' % (os.path.basename(shard_path), ok, seconds))
+
+    elapsed = time.perf_counter() - start
+    n = n_ok + n_empty + n_err
+    print('done: %d lines, %d empty, %d failed in %.1fs (%.2f files/sec)' % (
+        n_ok, n_empty, n_err, elapsed, n / elapsed if elapsed else 0.0))
+    return n_ok, n_empty, n_err
+
+
+# 输出 启动各阶段耗时: My.py 自身 (含 numpy, pandas) 的导入, 推迟导入的 nltk / cup / gensim, 以及词向量的加载
+def profile_startup(vectors_path=VECTORS_PATH, model_path=MODEL_PATH):
+    timer = StageTimer()
+    timer.add('import My', time.perf_counter() - _IMPORT_START)
+    with timer.stage('import nltk'):
+        import nltk
+    with timer.stage('import cup'):
+        get_cup()
+    with timer.stage('import gensim'):
+        import gensim.models
+    use_vectors(vectors_path, model_path)
+    try:
+        with timer.stage('load vectors'):
+            get_engine()
+    except (IOError, OSError) as e:
+        print('cannot load the word vectors: %s' % e)
+    print(timer.report())
+    return timer.totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='extract CoCC features from CCSet files')
+    parser.add_argument('root', nargs='?', default=CCSET_DIR, help='folder containing the .java ccset files')
+    parser.add_argument('output_dir', nargs='?', default=OUTPUT_DIR,
+                        help='folder for the feature table parts and the manifest (feature files with --sequential)')
+    parser.add_argument('--model', default=MODEL_PATH, help='word2vec model path')
+    parser.add_argument('--vectors', default=VECTORS_PATH,
+                        help='prefix of the exported read-only vectors (<prefix>.vectors.npy, <prefix>.vocab.txt)')
+    parser.add_argument('--export-vectors', action='store_true',
+                        help='export the vectors of --model to --vectors and exit')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, default cpu_count() - 1')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='files per worker task, their sentences are POS tagged in one call')
+    parser.add_argument('--manifest', default=None,
+                        help='completed-files manifest, default <output_dir>/features_manifest.jsonl')
+    parser.add_argument('--token-cache', default=None,
+                        help='sqlite file caching the CUP tokenization across workers and runs')
+    parser.add_argument('--text-files', action='store_true',
+                        help='also write the legacy <ccset text + key:value> feature files to output_dir')
+    parser.add_argument('--store', default=None,
+                        help='sqlite feature store, unchanged ccsets only recompute the feature groups whose '
+                             'FEATURE_VERSIONS changed')
+    parser.add_argument('--sequential', action='store_true', help='single process walk with blwjj, no manifest')
+    parser.add_argument('--corpus', default=None, metavar='CORPUS_DIR',
+                        help='build the word2vector corpus shards from root into CORPUS_DIR instead of features')
+    parser.add_argument('--shards', type=int, default=None, help='corpus shards, default 4 per process')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed, combined with each file path')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report the import and word vector load time and exit')
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup(args.vectors, args.model)
+    elif args.export_vectors:
+        wv = load_model(args.model).wv
+        VectorStore.save(wv, args.vectors)
+        print('exported %d vectors to %s' % (len(wv.index_to_key), args.vectors))
+    elif args.corpus is not None:
+        build_corpus_parallel(args.root, args.corpus, processes=args.processes, shards=args.shards, seed=args.seed,
+                              token_cache_path=args.token_cache)
+    elif args.sequential:
+        use_vectors(args.vectors, args.model)
+        if args.token_cache is not None:
+            use_token_cache(args.token_cache)
+        use_feature_store(args.store)
+        blwjj(args.root, args.output_dir)
+    else:
+        extract_features_parallel(args.root, args.output_dir, manifest_path=args.manifest,
+                                  processes=args.processes, vectors_path=args.vectors, model_path=args.model,
+                                  token_cache_path=args.token_cache, batch_size=args.batch_size,
+                                  text_files=args.text_files, store_path=args.store)
@@ -0,0 +1,166 @@
+# encoding=utf-8
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+CHANGE_RANGE_REGEX = re.compile(r'change (\d+) : (\d+),(\d+)')
+CHANGE_CASE_REGEX = re.compile(r'change:([A-z]+):')
+FEATURES_SEPARATOR = '-------------------------------'
+
+SECTION_HEADERS = {
+    'oldComment:': 'old_comment',
+    'oldCode:': 'old_code',
+    'newComment:': 'new_comment',
+    'newCode:': 'new_code',
+}
+
+
+class ChangeEntry(NamedTuple):
+    """
+    one ChangeDistiller change block of a CCSet file
+    """
+    start: int
+    end: int
+    case: str  # Insert / Update / Move / Delete, taken from the `change:` line
+    change_type: str
+    entity: str
+    entity_type: str
+    unique_name: str
+    index: int = -1  # N of the `change N : start,end` header
+
+
+class CCSetRecord(NamedTuple):
+    """
+    everything the feature extraction needs from one CCSet file, read in a single pass.
+    the four text sections keep their non-blank raw lines (without the trailing newline),
+    `features` holds the key:value lines appended after the separator by My.getFeatures
+    """
+    path: str
+    old_comment: List[str]
+    old_code: List[str]
+    new_comment: List[str]
+    new_code: List[str]
+    type: str
+    label: Optional[int]
+    change_num: int
+    changes: List[ChangeEntry]
+    features: Dict[str, str]
+
+    @property
+    def change_lines(self) -> List[Tuple[int, int]]:
+        return [(c.start, c.end) for c in self.changes]
+
+    @property
+    def feature_change_lines(self) -> List[Tuple[int, int]]:
+        """
+        the ranges lineNumOfChanged / changedLineByAllCodeLine have always been computed from: the original
+        `change \\d : ` regex of My.py only matched changes 0-9, and the csv files the models are trained on
+        were generated that way
+        """
+        return [(c.start, c.end) for c in self.changes if 0 <= c.index < 10]
+
+    @property
+    def feature_change_num(self) -> int:
+        """
+        changeNum of the feature section (written by My.getFeatures) when the file has one, otherwise the
+        `changeNum:` of the ccset itself (change_num); the two are counted differently, so callers pick one
+        explicitly
+        """
+        if 'changeNum' in self.features:
+            return int(self.features['changeNum'])
+        return self.change_num
+
+    @staticmethod
+    def alpha_text(lines: List[str]) -> str:
+        """
+        the legacy getCommentAndCode normalisation: every non letter becomes a space and
+        the non-blank lines are glued together without a separator
+        """
+        res = []
+        for line in lines:
+            line = ''.join([ch if ch.isalpha() else ' ' for ch in line.strip()])
+            if line.strip() != '':
+                res.append(line)
+        return ''.join(res)
+
+    @staticmethod
+    def raw_text(lines: List[str]) -> str:
+        return ''.join([line + '\n' for line in lines])
+
+
+def _flush_change(changes: List[ChangeEntry], current: Optional[Dict]):
+    if current is not None:
+        changes.append(ChangeEntry(**current))
+
+
+def parse_ccset(text: str, path: str = '') -> CCSetRecord:
+    sections = {name: [] for name in SECTION_HEADERS.values()}
+    section = None
+    in_ccset = True
+    in_features = False
+    ccset_type = ''
+    label = None
+    change_num = None
+    changes = []
+    current = None
+    features = {}
+
+    for line in text.split('\n'):
+        if in_features:
+            if ':' in line:
+                features[line.split(':')[0]] = line.split(':')[1]
+            continue
+        if in_ccset:
+            header = SECTION_HEADERS.get(line.rstrip())
+            if header is not None:
+                section = header
+                continue
+            if line.startswith('startline:'):
+                in_ccset = False
+                section = None
+            elif section is not None:
+                if line.strip():
+                    sections[section].append(line)
+                continue
+        if line.startswith(FEATURES_SEPARATOR):
+            in_features = True
+            continue
+        if line.startswith('change'):
+            matched = CHANGE_RANGE_REGEX.match(line)
+            if line.startswith('changeNum:'):
+                change_num = int(line.split(':')[-1])
+            elif matched:
+                _flush_change(changes, current)
+                current = {'start': int(matched.group(2)), 'end': int(matched.group(3)), 'case': '',
+                           'change_type': '', 'entity': '', 'entity_type': '', 'unique_name': '',
+                           'index': int(matched.group(1))}
+            elif current is None:
+                pass
+            elif line.startswith('change_type:'):
+                current['change_type'] = line[len('change_type:'):]
+            elif line.startswith('change_entity_type:'):
+                current['entity_type'] = line[len('change_entity_type:'):]
+            elif line.startswith('change_entity_uniqueName:'):
+                current['unique_name'] = line[len('change_entity_uniqueName:'):]
+            elif line.startswith('change_entity:'):
+                current['entity'] = line[len('change_entity:'):]
+            elif line.startswith('change:'):
+                matched = CHANGE_CASE_REGEX.match(line)
+                if matched:
+                    current['case'] = matched.group(1)
+        elif line.startswith('label:'):
+            label = int(line.split(':')[-1])
+        elif line.startswith('type:'):
+            ccset_type = line[len('type:'):].strip()
+    _flush_change(changes, current)
+
+    if label is None and 'label' in features:
+        label = int(features['label'])
+    if change_num is None:
+        change_num = len(changes)
+    return CCSetRecord(path=path, type=ccset_type, label=label, change_num=change_num, changes=changes,
+                       features=features, **sections)
+
+
+def read_ccset(path: str) -> CCSetRecord:
+    with open(path) as f:
+        return parse_ccset(f.read(), path)
@@ -0,0 +1,90 @@
+# encoding=utf-8
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from .ccset import ChangeEntry
+
+# counter name -> substring of the ChangeDistiller change_type it counts
+CHANGE_TYPE_COUNTERS: Tuple[Tuple[str, str], ...] = (
+    ('attribute', 'ATTRIBUTE'),
+    ('methodRenaming', 'METHOD_RENAMING'),
+    ('returnType', 'RETURN_TYPE'),
+    ('parameterDelete', 'PARAMETER_DELETE'),
+    ('parameterInsert', 'PARAMETER_INSERT'),
+    ('parameterRenaming', 'PARAMETER_RENAMING'),
+    ('parameterTypeChange', 'PARAMETER_TYPE_CHANGE'),
+)
+
+# counter prefix -> substring of the change_entity_type it counts, one counter per change case.
+# adding an entity type is one line here, its four counters follow everywhere else
+ENTITY_COUNTERS: Tuple[Tuple[str, str], ...] = (
+    ('if', 'IF_STATEMENT'),
+    ('for', 'FOR_STATEMENT'),
+    ('foreach', 'FOREACH_STATEMENT'),
+    ('while', 'WHILE_STATEMENT'),
+    ('catch', 'CATCH_CLAUSE'),
+    ('try', 'TRY_STATEMENT'),
+    ('throw', 'THROW_STATEMENT'),
+    ('methodInv', 'METHOD_INVOCATION'),
+    ('assign', 'ASSIGNMENT'),
+    ('varDec', 'VARIABLE_DECLARATION_STATEMENT'),
+    ('else', 'ELSE_STATEMENT'),
+)
+CHANGE_CASES = ('Insert', 'Update', 'Move', 'Delete')
+
+# change_entity_types that are not counted in changeNum
+NOT_CODE_ENTITIES = ('COMMENT', 'DOC')
+
+# feature file order of the counters that are not per entity type
+CHANGE_TYPE_NAMES = ('changeNum', 'attribute', 'methodDeclaration', 'methodRenaming', 'returnType', 'parameterDelete',
+                     'parameterInsert', 'parameterRenaming', 'parameterTypeChange')
+ENTITY_COUNTER_NAMES = tuple(prefix + case for prefix, _ in ENTITY_COUNTERS for case in CHANGE_CASES)
+COUNTER_NAMES = CHANGE_TYPE_NAMES + ENTITY_COUNTER_NAMES
+COUNTER_INDEX: Dict[str, int] = {name: i for i, name in enumerate(COUNTER_NAMES)}
+
+
+class ChangeCounter(object):
+    """
+    fills one counter vector (in COUNTER_NAMES order) per CCSet from its ChangeDistiller entries.
+    a change_type, entity type or (case, entity type) is matched against the tables above the
+    first time it is seen; after that every entry is a few dict lookups
+    """
+
+    def __init__(self):
+        self._change_type_slots: Dict[str, Tuple[int, ...]] = {}
+        self._entity_slots: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+
+    def change_type_slots(self, change_type: str) -> Tuple[int, ...]:
+        slots = self._change_type_slots.get(change_type)
+        if slots is None:
+            slots = tuple(COUNTER_INDEX[name] for name, pattern in CHANGE_TYPE_COUNTERS if pattern in change_type)
+            self._change_type_slots[change_type] = slots
+        return slots
+
+    def entity_slots(self, case: str, entity_type: str) -> Tuple[int, ...]:
+        key = (case, entity_type)
+        slots = self._entity_slots.get(key)
+        if slots is None:
+            res = []
+            if not any(pattern in entity_type for pattern in NOT_CODE_ENTITIES):
+                res.append(COUNTER_INDEX['changeNum'])
+            for prefix, pattern in ENTITY_COUNTERS:
+                if pattern in entity_type:
+                    for change_case in CHANGE_CASES:
+                        if change_case in case:
+                            res.append(COUNTER_INDEX[prefix + change_case])
+            slots = tuple(res)
+            self._entity_slots[key] = slots
+        return slots
+
+    def count(self, changes: Iterable[ChangeEntry]) -> np.ndarray:
+        slots = []
+        method_declaration = COUNTER_INDEX['methodDeclaration']
+        for change in changes:
+            slots.extend(self.entity_slots(change.case, change.entity_type))
+            slots.extend(self.change_type_slots(change.change_type))
+            # the entity text, not its type, as the legacy counter did
+            if 'METHOD_DECLARATION' in change.entity:
+                slots.append(method_declaration)
+        return np.bincount(np.array(slots, dtype=np.intp), minlength=len(COUNTER_NAMES))
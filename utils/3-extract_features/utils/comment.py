@@ -68,6 +68,14 @@ class JavadocDescPreprocessor:
         src_sent_tokens = self._filter_trivial_sents(src_sent_tokens)
         return src_sent_tokens, src_sents
 
+    def preprocess_single_desc(self, javadoc) -> List[List[str]]:
+        """
+        the src_sent_tokens of preprocess_desc(javadoc, javadoc), without tokenizing twice
+        and matching the sentences against themselves
+        """
+        src_sent_tokens, _ = self._preprocess_single_desc(javadoc)
+        return src_sent_tokens
+
     def preprocess_desc(self, src_javadoc, dst_javadoc):
         src_sent_tokens, src_sents = self._preprocess_single_desc(src_javadoc)
         dst_sent_tokens, dst_sents = self._preprocess_single_desc(dst_javadoc)
@@ -0,0 +1,77 @@
+# encoding=utf-8
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+
+import nltk
+
+from .comment import CommentCleaner, JavadocDescPreprocessor
+
+
+class CachedCupPreprocessor(object):
+    """
+    one reusable CUP preprocessor whose outputs are cached by a hash of the input text:
+    an in-memory LRU per process and, optionally, an sqlite file shared by all workers and runs
+    """
+
+    def __init__(self, replace_digit: bool = True, cache_size: int = 8192, cache_path: str = None):
+        self.preprocessor = JavadocDescPreprocessor(comment_cleaner=CommentCleaner(replace_digit=replace_digit))
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._db_pid = None
+
+    def _connect(self):
+        # a connection must not cross a fork, so open one per process on first use
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.cache_path, timeout=60, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=OFF')
+            self._db.execute('CREATE TABLE IF NOT EXISTS tokens (key BLOB PRIMARY KEY, value TEXT NOT NULL)')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _remember(self, key: bytes, value: str):
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _preprocess(self, txt: str) -> str:
+        res = []
+        for tokens in self.preprocessor.preprocess_single_desc(txt):
+            for token in tokens:
+                if not token.__contains__('<con>'):
+                    res.append(token + ' ')
+        return ''.join(res)
+
+    def tokenize(self, txt: str, split_words: bool = False) -> str:
+        """
+        :param split_words: run nltk.word_tokenize on txt first and join the words with spaces
+        :return: the non-<con> CUP tokens of txt, each followed by a space
+        """
+        key = hashlib.blake2b(txt.encode('utf-8'), digest_size=16, person=b'words' if split_words else b'').digest()
+        value = self.cache.get(key)
+        if value is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return value
+        if self.cache_path is not None:
+            row = self._connect().execute('SELECT value FROM tokens WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        if split_words:
+            value = self._preprocess(''.join([x + ' ' for x in nltk.word_tokenize(txt)]))
+        else:
+            value = self._preprocess(txt)
+        self._remember(key, value)
+        if self.cache_path is not None:
+            self._connect().execute('INSERT OR IGNORE INTO tokens VALUES (?, ?)', (key, value))
+        return value
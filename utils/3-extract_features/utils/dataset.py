@@ -0,0 +1,186 @@
+# encoding=utf-8
+import os
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib import recfunctions
+
+from .change_counter import CHANGE_TYPE_NAMES, ENTITY_COUNTER_NAMES
+from .feature_table import COLUMNS, PATH_COLUMN
+from .pos_features import POS_GROUPS
+
+# the per-sample sentence embedding similarities written by feature_transform (similarity.npz)
+SIMILARITY_COLUMNS = ('new_code_old_comment_similarity', 'old_code_new_code_similarity',
+                      'old_code_new_comment_similarity', 'old_code_old_comment_similarity')
+
+# the columns of the csv tables (4-generate_table) by what they describe
+COLUMN_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'label': ('label',),
+    'change': CHANGE_TYPE_NAMES + ('containReturn',),
+    'codeLine': ('lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode', 'lineNumOfChanged',
+                 'changedLineByAllCodeLine'),
+    'commentLine': ('lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldComment'),
+    'todo': ('TODOCount', 'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount'),
+    'entity': ENTITY_COUNTER_NAMES,
+    'posComment': tuple(group + 'Comment' for group in POS_GROUPS),
+    'posCode': tuple(group + 'Code' for group in POS_GROUPS),
+    'pairChange': ('bothHavePairNumChange', 'all_token_change_sim'),
+    'simBeforeAfter': ('cmt2cd_sim_before', 'cmt2cd_sim_after'),
+    'simChange': ('cmt2cd_sim_change', 'cmt2ch_sim_change'),
+    # only in csv files generated with a similarity file (4-generate_table's third argument, join_similarity)
+    'embeddingSim': SIMILARITY_COLUMNS,
+}
+
+# the groups every csv of 4-generate_table has
+TABLE_GROUPS = tuple(group for group in COLUMN_GROUPS if group != 'embeddingSim')
+
+# columns each version of the feature set leaves out
+VERSION_DROPPED: Dict[str, Tuple[str, ...]] = {
+    'new': ('lineNumOfOldCode', 'lineNumOfOldComment', 'lineNumOfChanged') + COLUMN_GROUPS['simBeforeAfter'],
+    'prev': ('changeNum',) + COLUMN_GROUPS['posComment'] + COLUMN_GROUPS['posCode'] + COLUMN_GROUPS['pairChange'],
+}
+
+
+def feature_set(groups: Iterable[str], version: str) -> Tuple[str, ...]:
+    keep = set(column for group in groups for column in COLUMN_GROUPS[group])
+    return tuple(column for column in COLUMNS + SIMILARITY_COLUMNS
+                 if column in keep and column not in VERSION_DROPPED[version])
+
+
+# the block_method / code / comment / relation DataFrames outdate_predict, classifiers and detect_newly used
+# to build with .drop([...]), as column lists in csv order (label included).
+# *_embedding sets add the embeddingSim group and need csv files joined with a similarity file; files
+# feature_transform could not score are NaN there, which Standardizer (the first step of every model
+# pipeline) maps to the training mean of the column
+FEATURE_SETS: Dict[str, Tuple[str, ...]] = {
+    'block_method_new': feature_set(TABLE_GROUPS, 'new'),
+    'code_new': feature_set(['label', 'change', 'codeLine', 'entity', 'posCode'], 'new'),
+    'comment_new': feature_set(['label', 'commentLine', 'todo', 'posComment'], 'new'),
+    'relation_new': feature_set(['label', 'pairChange', 'simBeforeAfter', 'simChange'], 'new'),
+    'block_method_new_embedding': feature_set(TABLE_GROUPS + ('embeddingSim',), 'new'),
+    'relation_new_embedding': feature_set(['label', 'pairChange', 'simBeforeAfter', 'simChange', 'embeddingSim'],
+                                          'new'),
+    'block_method_prev': feature_set(TABLE_GROUPS, 'prev'),
+    'code_prev': feature_set(['label', 'change', 'codeLine', 'entity', 'simBeforeAfter'], 'prev'),
+    'comment_prev': feature_set(['label', 'commentLine', 'todo'], 'prev'),
+    'relation_prev': feature_set(['label', 'simBeforeAfter', 'simChange'], 'prev'),
+}
+
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+CACHE_SUFFIX = '.npy'
+
+
+def compact_dtype(values: np.ndarray) -> np.dtype:
+    """
+    the smallest int type holding every value of an integer column, float32 for real valued columns
+    and a fixed width unicode type for text columns (filename, path)
+    """
+    if values.dtype.kind in 'iub':
+        low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+        for dtype in INT_DTYPES:
+            if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+                return np.dtype(dtype)
+    if values.dtype.kind == 'f':
+        return np.dtype(np.float32)
+    return np.dtype('U%d' % max([1] + [len(str(v)) for v in values]))
+
+
+def parse_csv(path: str) -> np.ndarray:
+    """
+    :return: the csv as a structured array with compact column types; a written pandas index column is dropped
+    """
+    df = pd.read_csv(path)
+    df = df.loc[:, [not str(column).startswith('Unnamed:') for column in df.columns]]
+    table = np.zeros(len(df), dtype=[(column, compact_dtype(df[column].to_numpy())) for column in df.columns])
+    for column in df.columns:
+        table[column] = df[column].to_numpy()
+    return table
+
+
+def load_csv(path: str, cache_path: str = None) -> np.ndarray:
+    """
+    parses the csv the first time and after every change of it, otherwise memory-maps the cached table
+    :param cache_path: default <path>.npy
+    """
+    if cache_path is None:
+        cache_path = path + CACHE_SUFFIX
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path):
+        table = parse_csv(path)
+        tmp = cache_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, table, allow_pickle=False)
+        os.replace(tmp, cache_path)
+    return np.load(cache_path, mmap_mode='r', allow_pickle=False)
+
+
+def concat_tables(tables: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    like pd.concat(axis=0) of tables with the same columns, each column widened to fit every table
+    """
+    names = tables[0].dtype.names
+    dtype = np.dtype([(name, np.result_type(*[table.dtype[name] for table in tables])) for name in names])
+    return np.concatenate([table.astype(dtype, copy=False) for table in tables])
+
+
+def load_dataset(*paths: str) -> np.ndarray:
+    tables = [load_csv(path) for path in paths]
+    return tables[0] if len(tables) == 1 else concat_tables(tables)
+
+
+def select(table: np.ndarray, name: str, drop: Sequence[str] = ()) -> np.ndarray:
+    """
+    :param name: a key of FEATURE_SETS
+    :param drop: further columns to leave out, e.g. ['label'] for the model input
+    :return: a view of table with only those columns, nothing is copied
+    """
+    return table[[column for column in FEATURE_SETS[name] if column not in drop]]
+
+
+def to_matrix(view: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    the model input: one contiguous 2-D array, the only copy made of the selected columns
+    """
+    return recfunctions.structured_to_unstructured(view, dtype=dtype)
+
+
+def to_dataframe(view: np.ndarray) -> pd.DataFrame:
+    """
+    a DataFrame keeping the compact column types, for code that needs column names
+    """
+    return pd.DataFrame({name: view[name] for name in view.dtype.names})
+
+
+def save_columns(path: str, columns: Dict[str, np.ndarray]):
+    """
+    stores equal-length arrays as one columnar .npz file, one uncompressed array per column
+    """
+    # write to a temporary file first so that an interrupted run never leaves half a file behind
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **columns)
+    os.replace(tmp, path)
+
+
+def load_columns(path: str, columns: Sequence[str] = None) -> pd.DataFrame:
+    """
+    :param columns: the columns to read, all by default; the others are never loaded
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in (data.files if columns is None else columns)})
+
+
+def join_similarity(df: pd.DataFrame, path: str, on: str = PATH_COLUMN) -> pd.DataFrame:
+    """
+    adds SIMILARITY_COLUMNS of a feature_transform similarity file to df as new model features, matching the
+    absolute path of each sample; samples feature_transform could not score get NaN (see FEATURE_SETS)
+    """
+    similarity = load_columns(path, (PATH_COLUMN,) + SIMILARITY_COLUMNS).set_index(PATH_COLUMN)
+    matched = similarity.reindex(df[on].map(os.path.abspath).to_numpy())
+    missing = int(matched[SIMILARITY_COLUMNS[0]].isna().sum())
+    if missing:
+        print('%d of %d samples have no similarity in %s, their similarity columns are NaN' % (missing, len(df), path))
+    df = df.copy()
+    for column in SIMILARITY_COLUMNS:
+        df[column] = matched[column].to_numpy()
+    return df
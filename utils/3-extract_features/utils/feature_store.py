@@ -0,0 +1,70 @@
+# encoding=utf-8
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Optional
+
+from .ccset import CCSetRecord
+
+
+def record_digest(record: CCSetRecord) -> bytes:
+    """
+    content hash of a parsed CCSet: the text sections, type, label and changes.
+    the path and already appended features are left out, so a moved or re-extracted file keeps its key
+    """
+    content = [record.old_comment, record.old_code, record.new_comment, record.new_code, record.type,
+               record.label, record.change_num, [list(change) for change in record.changes]]
+    return hashlib.blake2b(json.dumps(content).encode('utf-8'), digest_size=16).digest()
+
+
+class FeatureStore(object):
+    """
+    persistent sqlite store of computed feature groups, keyed by (record_digest, group).
+    a stored group is only returned when it was computed by the same version of that group,
+    so bumping one version recomputes that group alone
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._db_pid = None
+
+    def _connect(self):
+        # a connection must not cross a fork, so open one per process on first use
+        if self._db is None or self._db_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS features ('
+                             'key BLOB NOT NULL, grp TEXT NOT NULL, version TEXT NOT NULL, value TEXT NOT NULL, '
+                             'PRIMARY KEY (key, grp))')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def get(self, key: bytes, group: str, version) -> Optional[Dict[str, str]]:
+        row = self._connect().execute('SELECT version, value FROM features WHERE key = ? AND grp = ?',
+                                      (key, group)).fetchone()
+        if row is None or row[0] != str(version):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[1])
+
+    def has(self, key: bytes, group: str, version) -> bool:
+        row = self._connect().execute('SELECT version FROM features WHERE key = ? AND grp = ?',
+                                      (key, group)).fetchone()
+        return row is not None and row[0] == str(version)
+
+    def put(self, key: bytes, group: str, version, values: Dict[str, str]):
+        self._connect().execute('INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?)',
+                                (key, group, str(version), json.dumps(values)))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,110 @@
+# encoding=utf-8
+import glob
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .change_counter import CHANGE_TYPE_NAMES, ENTITY_COUNTER_NAMES
+from .pos_features import POS_GROUPS
+
+# the feature keys in the order My.getFeatures writes them
+FEATURE_KEYS = (
+    ('label',) +
+    CHANGE_TYPE_NAMES +
+    ('containReturn', 'lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCode',
+     'lineNumOfOldCommentBylineNumOfOldCCSet', 'lineNumOfOldComment', 'TODOCount', 'FIXMECount', 'XXXCount',
+     'BUGCount', 'VERSIONCount', 'FIXEDCount', 'lineNumOfChanged', 'changedLineByAllCodeLine') +
+    ENTITY_COUNTER_NAMES +
+    tuple(group + 'Comment' for group in POS_GROUPS) +
+    tuple(group + 'Code' for group in POS_GROUPS) +
+    ('bothHavePairNumChange', 'cmt2cd_sim_before', 'cmt2cd_sim_after', 'cmt2cd_sim_change', 'cmt2ch_sim_change',
+     'all_token_change_sim')
+)
+
+FLOAT_FEATURES = frozenset(
+    ['lineNumOfOldCodeBylineNumOfOldCCSet', 'lineNumOfOldCommentBylineNumOfOldCCSet', 'changedLineByAllCodeLine',
+     'cmt2cd_sim_before', 'cmt2cd_sim_after', 'cmt2cd_sim_change', 'cmt2ch_sim_change', 'all_token_change_sim'] +
+    [group + 'Comment' for group in POS_GROUPS] + [group + 'Code' for group in POS_GROUPS])
+
+# the csv header of 4-generate_table, which outdate_predict and classifiers select columns by
+COLUMN_NAMES = {'lineNumOfOldCommentBylineNumOfOldCCSet': 'lineNumOfOldCommentBylineNumOf"OldCCSet'}
+COLUMNS = tuple(COLUMN_NAMES.get(key, key) for key in FEATURE_KEYS)
+
+PATH_COLUMN = 'path'
+TABLE_SUFFIX = '.npy'
+
+
+def table_dtype(path_width: int) -> np.dtype:
+    fields = [(PATH_COLUMN, 'U%d' % max(1, path_width))]
+    for key, column in zip(FEATURE_KEYS, COLUMNS):
+        fields.append((column, np.float64 if key in FLOAT_FEATURES else np.int32))
+    return np.dtype(fields)
+
+
+def to_table(paths: Sequence[str], rows: Sequence[Dict[str, str]]) -> np.ndarray:
+    """
+    :param paths: the ccset file of each row, the key column
+    :param rows: feature dicts as returned by My.getFeatures or CCSetRecord.features (values are strings)
+    :return: structured array with the path column followed by COLUMNS
+    """
+    table = np.zeros(len(paths), dtype=table_dtype(max([len(p) for p in paths], default=1)))
+    table[PATH_COLUMN] = paths
+    for key, column in zip(FEATURE_KEYS, COLUMNS):
+        if key in FLOAT_FEATURES:
+            table[column] = [float(row[key]) for row in rows]
+        else:
+            table[column] = [int(row[key]) for row in rows]
+    return table
+
+
+def save_table(table: np.ndarray, path: str):
+    # write to a temporary file first so that an interrupted run never leaves half a part behind
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, table, allow_pickle=False)
+    os.replace(tmp, path)
+
+
+def table_parts(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, 'features-*' + TABLE_SUFFIX)))
+
+
+def next_part_path(directory: str) -> str:
+    return os.path.join(directory, 'features-%05d%s' % (len(table_parts(directory)), TABLE_SUFFIX))
+
+
+def load_table(path: str) -> np.ndarray:
+    """
+    :param path: one table file, or a folder of `features-*.npy` parts written by My.extract_features_parallel.
+        a file in several parts (a run stopped between writing a part and its manifest entries, then resumed)
+        is kept once, with the row of the last part
+    """
+    if not os.path.isdir(path):
+        return np.load(path, allow_pickle=False)
+    parts = [np.load(p, allow_pickle=False) for p in table_parts(path)]
+    if len(parts) == 0:
+        return np.zeros(0, dtype=table_dtype(1))
+    dtype = table_dtype(max([part.dtype[PATH_COLUMN].itemsize // 4 for part in parts]))
+    table = np.concatenate([part.astype(dtype) for part in parts])
+    return drop_duplicate_paths(table)
+
+
+def drop_duplicate_paths(table: np.ndarray) -> np.ndarray:
+    """
+    :return: the rows of table with only the last row of each path, in table order
+    """
+    _, first_reversed = np.unique(table[PATH_COLUMN][::-1], return_index=True)
+    if len(first_reversed) == len(table):
+        return table
+    return table[np.sort(len(table) - 1 - first_reversed)]
+
+
+def table_to_dataframe(table: np.ndarray) -> pd.DataFrame:
+    """
+    same columns, in the same order, as the csv files of 4-generate_table plus the path column
+    """
+    df = pd.DataFrame({column: table[column] for column in COLUMNS})
+    df[PATH_COLUMN] = table[PATH_COLUMN]
+    return df
@@ -0,0 +1,24 @@
+# encoding=utf-8
+from typing import Iterable, List, Tuple
+
+
+def merge_intervals(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    merge inclusive (start, end) line ranges into sorted, disjoint ranges.
+    overlapping and touching ranges are joined, empty ranges (end < start) are dropped
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(r for r in ranges if r[1] >= r[0]):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def covered_count(ranges: Iterable[Tuple[int, int]]) -> int:
+    """
+    number of distinct lines covered by inclusive (start, end) ranges, in O(k log k) for k ranges
+    """
+    return sum(end - start + 1 for start, end in merge_intervals(ranges))
@@ -0,0 +1,122 @@
+# encoding=utf-8
+import multiprocessing
+import queue
+import resource
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def estimator_cores(estimator, cores: int) -> int:
+    """
+    the cores an estimator uses while fitting, from its own n_jobs (None is one core, -1 all of them);
+    for a Pipeline the largest n_jobs of its steps
+    """
+    params = estimator.get_params() if hasattr(estimator, 'get_params') else {}
+    res = 1
+    for key, n_jobs in params.items():
+        if (key == 'n_jobs' or key.endswith('__n_jobs')) and n_jobs is not None:
+            if n_jobs < 0:
+                n_jobs = cores + 1 + n_jobs
+            res = max(res, n_jobs)
+    return min(res, cores)
+
+
+def _run_model(results, index, estimator, xtrain, ytrain, predict_sets, return_estimator):
+    try:
+        base = peak_rss_mb()
+        start = time.perf_counter()
+        estimator.fit(xtrain, ytrain)
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        predictions = dict((key, estimator.predict(x)) for key, x in predict_sets.items())
+        predict_seconds = time.perf_counter() - start
+        peak = peak_rss_mb()
+        results.put((index, {'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds, 'peak_mb': peak,
+                             'peak_increase_mb': peak - base, 'predictions': predictions,
+                             'estimator': estimator if return_estimator else None}))
+    except Exception as e:
+        results.put((index, {'error': repr(e)}))
+
+
+def default_start_method():
+    # fork only on Linux: macOS defaults to spawn because forking after OpenMP / Accelerate (xgboost, numpy's
+    # BLAS) were loaded can deadlock; under spawn the estimators and data are pickled to each process
+    return 'fork' if sys.platform.startswith('linux') else None
+
+
+def run_zoo(models: Sequence[Tuple[str, object]], xtrain, ytrain, xtest=None, ytest=None, predict_sets=None,
+            cores: int = None, return_estimators: bool = False, start_method: str = None) -> List[Dict]:
+    """
+    fits every (name, estimator) in its own process, as many at a time as their n_jobs fit into cores,
+    so the peak memory of a process is that of its model alone
+    :param predict_sets: more named inputs to predict, e.g. {'dect': to_dect_x}; xtest is predicted as 'test'
+    :param start_method: multiprocessing start method, default fork on Linux and the platform default elsewhere
+    :return: one row per model, in the given order: name, fit_seconds, predict_seconds, peak_mb,
+             peak_increase_mb, predictions, estimator (with return_estimators) and, with ytest,
+             precision / recall / f1 on xtest. a failed model has an error instead
+    """
+    if cores is None:
+        cores = multiprocessing.cpu_count()
+    predict_sets = dict(predict_sets or {})
+    if xtest is not None:
+        predict_sets['test'] = xtest
+    context = multiprocessing.get_context(start_method or default_start_method())
+    results = context.Queue()
+
+    pending = [(i, estimator, estimator_cores(estimator, cores)) for i, (_, estimator) in enumerate(models)]
+    running = dict()
+    used = 0
+    rows = [None] * len(models)
+    while pending or running:
+        for task in list(pending):
+            index, estimator, cost = task
+            if used + cost <= cores or not running:
+                process = context.Process(target=_run_model, args=(results, index, estimator, xtrain, ytrain,
+                                                                   predict_sets, return_estimators))
+                process.start()
+                running[index] = (process, cost)
+                used += cost
+                pending.remove(task)
+        try:
+            index, row = results.get(timeout=1)
+        except queue.Empty:
+            # a process killed before it could report (e.g. out of memory)
+            for index, (process, _) in list(running.items()):
+                if not process.is_alive() and process.exitcode != 0:
+                    rows[index] = {'error': 'exit code %s' % process.exitcode}
+                    used -= running.pop(index)[1]
+            continue
+        process, cost = running.pop(index)
+        process.join()
+        used -= cost
+        rows[index] = row
+
+    for (name, _), row in zip(models, rows):
+        row['name'] = name
+        if ytest is not None and 'error' not in row:
+            predicted = row['predictions']['test']
+            row['precision'] = precision_score(ytest, predicted)
+            row['recall'] = recall_score(ytest, predicted)
+            row['f1'] = f1_score(ytest, predicted)
+    return rows
+
+
+ZOO_COLUMNS = ['name', 'fit_seconds', 'predict_seconds', 'peak_mb', 'peak_increase_mb', 'precision', 'recall', 'f1',
+               'error']
+
+
+def zoo_table(rows: List[Dict]) -> pd.DataFrame:
+    table = pd.DataFrame([dict((key, row.get(key)) for key in ZOO_COLUMNS) for row in rows], columns=ZOO_COLUMNS)
+    if table['error'].isna().all():
+        table = table.drop(columns='error')
+    return table
@@ -0,0 +1,109 @@
+# encoding=utf-8
+import hashlib
+import re
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+from .ccset import CCSetRecord
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD_REGEX = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+
+def words(lines: List[str]) -> List[str]:
+    """
+    lower-cased sub-words of the text, identifiers are split on camelCase and underscores
+    so a renamed identifier only changes part of its shingles
+    """
+    return [w.lower() for w in WORD_REGEX.findall('\n'.join(lines))]
+
+
+def record_shingles(record: CCSetRecord, size: int = 2) -> Set[str]:
+    """
+    word n-grams of the old/new comment and code, prefixed by their section so that
+    the same words in a comment and in code do not match each other
+    """
+    shingles = set()
+    sections = (('oc', record.old_comment), ('od', record.old_code), ('nc', record.new_comment),
+                ('nd', record.new_code))
+    for name, lines in sections:
+        tokens = words(lines)
+        n = min(size, len(tokens))
+        for i in range(len(tokens) - n + 1):
+            shingles.add(name + ':' + ' '.join(tokens[i:i + n]))
+    return shingles
+
+
+class MinHashLSH(object):
+    """
+    MinHash signatures with banded locality sensitive hashing. two records land in the same
+    bucket of at least one band with high probability when their shingle Jaccard similarity
+    is above about (1 / bands) ** (1 / rows); candidates are then checked against `threshold`
+    with the signature estimate and merged into clusters with union-find.
+    every record is compared to one representative per bucket, so building the clusters is
+    linear in the number of records
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.8, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError('num_perm (%d) must be a multiple of bands (%d)' % (num_perm, bands))
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.signatures: List[np.ndarray] = []
+        self.buckets: List[Dict[bytes, int]] = [dict() for _ in range(bands)]
+        self.parent: List[int] = []
+
+    def signature(self, shingles: Iterable[str]) -> np.ndarray:
+        hashes = np.array([int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+                           for s in shingles], dtype=np.uint64)
+        if len(hashes) == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # (a * x + b) mod p, a and x are below 2^32 so the product fits in uint64
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def jaccard(self, i: int, j: int) -> float:
+        """
+        estimated Jaccard similarity of the i-th and j-th added records
+        """
+        return float(np.mean(self.signatures[i] == self.signatures[j]))
+
+    def _find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def _union(self, i: int, j: int):
+        ri, rj = self._find(i), self._find(j)
+        if ri != rj:
+            # the earlier record stays the root, so it is the one kept of its cluster
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+    def add(self, signature: np.ndarray) -> int:
+        """
+        :return: the index of the added record
+        """
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        self.parent.append(index)
+        for band in range(self.bands):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            other = self.buckets[band].setdefault(key, index)
+            if other != index and self.jaccard(index, other) >= self.threshold:
+                self._union(index, other)
+        return index
+
+    def clusters(self) -> List[int]:
+        """
+        :return: for every added record the index of the first record of its cluster
+        """
+        return [self._find(i) for i in range(len(self.parent))]
@@ -0,0 +1,55 @@
+# encoding=utf-8
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# the ten POS groups written to the feature files, in output order
+POS_GROUPS: Tuple[str, ...] = ('NN', 'VB', 'DT', 'IN', 'JJ', 'RB', 'PRP', 'MD', 'LS', 'RP')
+
+# penn treebank tags counted in each group, every other tag is ignored
+GROUP_TAGS: Dict[str, Tuple[str, ...]] = {
+    'NN': ('NN', 'NNS', 'NNP', 'NNPS'),
+    'VB': ('VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ'),
+    'DT': ('DT', 'WDT'),
+    'IN': ('IN', 'CC'),
+    'JJ': ('JJ', 'JJR', 'JJS'),
+    'RB': ('RB', 'RBR', 'RBS', 'WRB'),
+    'PRP': ('PRP', 'PRP$', 'WP', 'WP$'),
+    'MD': ('MD',),
+    'LS': ('LS',),
+    'RP': ('RP',),
+}
+
+TAG_TO_GROUP: Dict[str, int] = {tag: i for i, group in enumerate(POS_GROUPS) for tag in GROUP_TAGS[group]}
+
+
+def tag_sentences(sentences: Sequence[List[str]]) -> List[List[Tuple[str, str]]]:
+    """
+    tag a batch of tokenized sentences with one tagger call, the result of each
+    sentence is the same as `nltk.pos_tag(sentence)`
+    """
+    # nltk takes over a second to import, only pay for it when something is tagged
+    from nltk import pos_tag_sents
+    return pos_tag_sents(sentences)
+
+
+def pos_counts(tagged: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """
+    :return: int vector of length len(POS_GROUPS), the number of tokens of each group
+    """
+    counts = np.zeros(len(POS_GROUPS), dtype=np.int64)
+    for _, tag in tagged:
+        group = TAG_TO_GROUP.get(tag)
+        if group is not None:
+            counts[group] += 1
+    return counts
+
+
+def pos_ratios(tagged: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """
+    :return: float vector of length len(POS_GROUPS), the share of tokens of each group,
+             all zeros for an empty sentence
+    """
+    if len(tagged) == 0:
+        return np.zeros(len(POS_GROUPS), dtype=np.float64)
+    return pos_counts(tagged) / len(tagged)
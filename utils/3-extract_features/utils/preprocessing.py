@@ -0,0 +1,29 @@
+# encoding=utf-8
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+class Standardizer(BaseEstimator, TransformerMixin):
+    """
+    z-scores every column with the mean and (sample) standard deviation of the training rows, in float32.
+    constant columns and missing values become 0, as the pandas apply + fillna(0) it replaces did.
+    put it in front of the model in a sklearn Pipeline, so the statistics are fitted on the training split
+    only and saved with the model
+    """
+
+    def fit(self, x, y=None):
+        x = np.asarray(x, dtype=np.float32)
+        mean = np.nanmean(x, axis=0, dtype=np.float64)
+        std = np.nanstd(x, axis=0, dtype=np.float64, ddof=1) if len(x) > 1 else np.zeros(x.shape[1])
+        self.mean_ = mean.astype(np.float32)
+        self.scale_ = np.where(np.isfinite(std) & (std > 0), std, 1.0).astype(np.float32)
+        self.n_features_in_ = x.shape[1]
+        return self
+
+    def transform(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[1] != self.n_features_in_:
+            raise ValueError('Standardizer was fitted on %d columns, got %d' % (self.n_features_in_, x.shape[1]))
+        out = x - self.mean_
+        out /= self.scale_
+        return np.nan_to_num(out, copy=False, nan=0.0)
@@ -0,0 +1,48 @@
+# encoding=utf-8
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimer(object):
+    """
+    accumulate wall time per named stage, either with `with timer.stage(name)`
+    or with `timer.lap(name)` which charges the time since the previous lap
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def add(self, name: str, seconds: float):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def lap(self, name: str):
+        now = time.perf_counter()
+        self.add(name, now - self._last)
+        self._last = now
+
+    def reset_lap(self):
+        self._last = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            self._last = time.perf_counter()
+
+    def merge(self, totals: Dict[str, float]):
+        for name, seconds in totals.items():
+            self.add(name, seconds)
+
+    def report(self, n_items: int = 0) -> str:
+        lines = []
+        for name, seconds in self.totals.items():
+            if n_items:
+                lines.append('%-16s %10.3fs  %8.2fms/file' % (name, seconds, 1000 * seconds / n_items))
+            else:
+                lines.append('%-16s %10.3fs' % (name, seconds))
+        return '\n'.join(lines)
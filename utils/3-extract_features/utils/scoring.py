@@ -0,0 +1,75 @@
+# encoding=utf-8
+import os
+from typing import Dict, Iterator, Sequence, TextIO, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .feature_table import PATH_COLUMN, load_table, table_to_dataframe
+
+# the column naming each sample in the RQ4 csv files, the feature tables of My.py use PATH_COLUMN
+NAME_COLUMNS = ('filename', PATH_COLUMN)
+
+
+def save_model(path: str, model, columns: Sequence[str], **meta):
+    """
+    stores the fitted model with the input columns it was trained on (and any metadata) in one joblib file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    joblib.dump({'model': model, 'columns': list(columns), 'meta': meta}, tmp)
+    os.replace(tmp, path)
+
+
+def load_model(path: str) -> Dict:
+    return joblib.load(path)
+
+
+def feature_chunks(path: str, chunksize: int = 100000) -> Iterator[pd.DataFrame]:
+    """
+    :param path: a csv (4-generate_table or RQ4 layout) or a feature table of My.py (.npy or folder of parts)
+    """
+    if path.endswith('.csv'):
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield chunk
+    else:
+        table = load_table(path)
+        for start in range(0, len(table), chunksize):
+            yield table_to_dataframe(table[start:start + chunksize])
+
+
+def predict_positive(bundle: Dict, chunk: pd.DataFrame) -> np.ndarray:
+    """
+    :return: the probability of label 1 for every row of chunk
+    """
+    model = bundle['model']
+    proba = model.predict_proba(chunk[bundle['columns']])
+    return proba[:, list(model.classes_).index(1)]
+
+
+def write_flagged(out: TextIO, names: Sequence[str], proba: np.ndarray, threshold: float = 0.5) -> int:
+    """
+    writes `name<TAB>probability` for every sample above threshold (predict's decision at 0.5)
+    """
+    flagged = np.flatnonzero(proba > threshold)
+    out.writelines(['%s\t%.6f\n' % (names[i], proba[i]) for i in flagged])
+    return len(flagged)
+
+
+def score_file(bundle: Dict, path: str, out: TextIO, threshold: float = 0.5, chunksize: int = 100000) \
+        -> Tuple[int, int]:
+    """
+    scores a features file chunk by chunk and writes the flagged samples
+    :return: rows scored, rows flagged
+    """
+    n_rows = 0
+    n_flagged = 0
+    for chunk in feature_chunks(path, chunksize):
+        name_column = [column for column in NAME_COLUMNS if column in chunk.columns]
+        names = chunk[name_column[0]].to_numpy() if name_column else np.arange(n_rows, n_rows + len(chunk))
+        n_flagged += write_flagged(out, names, predict_positive(bundle, chunk), threshold)
+        n_rows += len(chunk)
+    return n_rows, n_flagged
@@ -0,0 +1,72 @@
+# encoding=utf-8
+from typing import List, Tuple
+
+import numpy as np
+
+
+class SimilarityEngine(object):
+    """
+    word2vec cosine similarity between token lists with one matrix multiply per sentence pair.
+    follows the semantics of the old My.sim_word2word loops: a word missing from the
+    vocabulary has similarity 0.0 to everything, so it still takes part in the max and the mean
+    """
+
+    def __init__(self, wv):
+        # anything with gensim KeyedVectors' `key_to_index` and `vectors`
+        self.key_to_index = wv.key_to_index
+        self.vectors = wv.vectors
+
+    def lookup(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the l2-normalised vectors of the in-vocabulary words (one row each)
+                 and a boolean mask over `words` telling which ones were found
+        """
+        indices = [self.key_to_index.get(w) for w in words]
+        found = np.array([i is not None for i in indices], dtype=bool)
+        rows = np.array([i for i in indices if i is not None], dtype=np.int64)
+        matrix = np.asarray(self.vectors[rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms, found
+
+    @staticmethod
+    def _best(sim: np.ndarray, axis: int, other_found: np.ndarray) -> np.ndarray:
+        best = sim.max(axis=axis)
+        if not other_found.all():
+            # an OOV word on the other side contributes a similarity of 0.0 to the max
+            best = np.maximum(best, 0.0)
+        return best
+
+    def word2sentence_max(self, sen1: List[str], sen2: List[str]) -> np.ndarray:
+        """
+        for every word of sen1, its highest similarity to any word of sen2
+        """
+        res = np.zeros(len(sen1), dtype=np.float64)
+        if len(sen1) == 0 or len(sen2) == 0:
+            return res
+        m1, f1 = self.lookup(sen1)
+        m2, f2 = self.lookup(sen2)
+        if len(m1) and len(m2):
+            res[f1] = self._best(m1 @ m2.T, 1, f2)
+        return res
+
+    def sen12sen2(self, sen1: List[str], sen2: List[str]) -> float:
+        if len(sen1) == 0 or len(sen2) == 0:
+            return 0.0
+        return float(self.word2sentence_max(sen1, sen2).mean())
+
+    def sen2sen(self, sen1: List[str], sen2: List[str]) -> float:
+        """
+        mean of sen12sen2 in both directions, sharing a single similarity matrix
+        """
+        if len(sen1) == 0 or len(sen2) == 0:
+            return 0.0
+        m1, f1 = self.lookup(sen1)
+        m2, f2 = self.lookup(sen2)
+        r1 = np.zeros(len(sen1), dtype=np.float64)
+        r2 = np.zeros(len(sen2), dtype=np.float64)
+        if len(m1) and len(m2):
+            sim = m1 @ m2.T
+            r1[f1] = self._best(sim, 1, f2)
+            r2[f2] = self._best(sim, 0, f1)
+        return float((r1.mean() + r2.mean()) / 2)
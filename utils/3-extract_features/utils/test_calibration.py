@@ -0,0 +1,53 @@
+# encoding=utf-8
+import unittest
+
+import numpy as np
+from sklearn.calibration import calibration_curve
+from sklearn.datasets import make_classification
+from sklearn.naive_bayes import GaussianNB
+from sklearn.svm import LinearSVC
+
+from .calibration import calibrate_model, expected_calibration_error, reliability_bins
+
+
+class TestCalibration(unittest.TestCase):
+    def test_bins_match_sklearn(self):
+        rng = np.random.RandomState(0)
+        prob = rng.rand(1000)
+        y = (rng.rand(1000) < prob).astype(int)
+        bins = reliability_bins(y, prob, 10)
+        fraction, mean = calibration_curve(y, prob, n_bins=10)
+        filled = bins[bins['count'] > 0]
+        np.testing.assert_allclose(filled['fraction_positive'], fraction)
+        np.testing.assert_allclose(filled['mean_predicted'], mean)
+        self.assertEqual(int(bins['count'].sum()), 1000)
+
+    def test_ece(self):
+        self.assertEqual(expected_calibration_error([0, 1, 1, 0], [0.0, 1.0, 1.0, 0.0]), 0.0)
+        # every sample predicted 0.8, half of them positive
+        self.assertAlmostEqual(expected_calibration_error([1, 0, 1, 0], [0.8] * 4), 0.3)
+
+    def test_calibrate_model(self):
+        x, y = make_classification(n_samples=600, random_state=0)
+        for name, estimator in (('Naive Bayes', GaussianNB()), ('SVC', LinearSVC(dual=False))):
+            rows, bins = calibrate_model(name, estimator, x[:400], y[:400], x[400:], y[400:],
+                                         methods=('isotonic', 'sigmoid'))
+            self.assertEqual([row['method'] for row in rows], ['isotonic', 'sigmoid'])
+            self.assertEqual(rows[0]['brier_uncalibrated'], rows[1]['brier_uncalibrated'])
+            self.assertLess(rows[1]['brier_calibrated'], 0.25)
+            self.assertEqual(sorted(set(bins['calibration'])), ['isotonic', 'none', 'sigmoid'])
+            self.assertEqual(len(bins), 30)
+
+    def test_uncalibrated_scaling_uses_train_range(self):
+        x, y = make_classification(n_samples=600, random_state=0)
+        xtest, ytest = x[400:], y[400:]
+        svc = LinearSVC(dual=False).fit(x[:400], y[:400])
+        train_decision = svc.decision_function(x[:400])
+        expected = np.clip((svc.decision_function(xtest) - train_decision.min()) /
+                           (train_decision.max() - train_decision.min()), 0, 1)
+        rows, _ = calibrate_model('SVC', LinearSVC(dual=False), x[:400], y[:400], xtest, ytest, methods=('sigmoid',))
+        self.assertAlmostEqual(rows[0]['brier_uncalibrated'], float(np.mean((expected - ytest) ** 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+from .ccset import CCSetRecord, parse_ccset, read_ccset
+from .intervals import covered_count
+
+CCSET = """==========================================CCSet==========================================
+oldComment:
+// check the user name
+oldCode:
+if (user != null) {
+    return user.getName();
+}
+
+newComment:
+// check the user login
+newCode:
+if (user != null && user.isActive()) {
+    return user.getLogin();
+}
+
+startline:10
+endline:12
+type:BLOCK_COMMENT
+path:/old/src/User.java
+label:1
+
+=========================================Changes=========================================
+change 0 : 10,12
+change:Update: IF_STATEMENT
+change_getClass:class ch.uzh.ifi.seal.changedistiller.model.entities.Update
+change_type:CONDITION_EXPRESSION_CHANGE
+change_entity:IF_STATEMENT: user != null
+change_entity_uniqueName:user != null
+change_entity_type:IF_STATEMENT
+isNative:false
+
+change 11 : 11,11
+change:Update: RETURN_STATEMENT
+change_type:STATEMENT_UPDATE
+change_entity:RETURN_STATEMENT: return user.getName();
+change_entity_uniqueName:return user.getName();
+change_entity_type:RETURN_STATEMENT
+
+changeNum:2
+"""
+
+
+class TestCCSet(unittest.TestCase):
+    def test_sections(self):
+        record = parse_ccset(CCSET, 'User.java')
+        self.assertEqual(record.old_comment, ['// check the user name'])
+        self.assertEqual(len(record.old_code), 3)
+        self.assertEqual(record.new_comment, ['// check the user login'])
+        self.assertEqual(record.new_code[1], '    return user.getLogin();')
+        self.assertEqual(record.type, 'BLOCK_COMMENT')
+        self.assertEqual(record.label, 1)
+        self.assertEqual(record.change_num, 2)
+        self.assertEqual(record.features, {})
+        self.assertEqual(record.feature_change_num, 2)
+
+    def test_changes(self):
+        record = parse_ccset(CCSET)
+        self.assertEqual(record.change_lines, [(10, 12), (11, 11)])
+        # lineNumOfChanged keeps the single digit `change \d :` match it was always computed with
+        self.assertEqual(record.feature_change_lines, [(10, 12)])
+        self.assertEqual([change.index for change in record.changes], [0, 11])
+        first, second = record.changes
+        self.assertEqual(first.case, 'Update')
+        self.assertEqual(first.entity_type, 'IF_STATEMENT')
+        self.assertEqual(first.change_type, 'CONDITION_EXPRESSION_CHANGE')
+        self.assertEqual(second.unique_name, 'return user.getName();')
+
+    def test_alpha_text(self):
+        record = parse_ccset(CCSET)
+        self.assertEqual(CCSetRecord.alpha_text(record.old_comment), '   check the user name')
+        self.assertEqual(CCSetRecord.alpha_text(['{', 'a1b', '}']), 'a b')
+
+    def test_features(self):
+        text = CCSET + '\n-------------------------------\nlabel:1\nchangeNum:3\nall_token_change_sim:0.25\n'
+        record = parse_ccset(text)
+        self.assertEqual(list(record.features.values()), ['1', '3', '0.25'])
+        self.assertEqual(record.change_num, 2)
+        self.assertEqual(record.feature_change_num, 3)
+
+
+    def test_feature_file_statistics(self):
+        # the (changeNum, changed lines, label) data_analyse_tool used to take from a feature file: the last
+        # changeNum: line, i.e. the one after the separator, and every `change N : start,end` range
+        def legacy_change_info(path):
+            change_num, label, change_line = None, None, []
+            with open(path) as f:
+                for line in f.readlines():
+                    if line.startswith('changeNum:'):
+                        change_num = int(line.split(':')[-1])
+                    if line.startswith('label:'):
+                        label = int(line.split(':')[-1])
+                    if line.startswith('change ') and ':' in line and ',' in line:
+                        sl, el = [int(x.strip()) for x in line.split(':')[-1].split(',')]
+                        change_line.extend([i for i in range(sl, el + 1) if i not in change_line])
+            return change_num, len(change_line), label
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'User.java')
+            with open(path, 'w') as f:
+                f.write(CCSET + '\n-------------------------------\nlabel:1\nchangeNum:1\nattribute:0\n')
+            record = read_ccset(path)
+            self.assertEqual((record.feature_change_num, covered_count(record.change_lines), record.label),
+                             legacy_change_info(path))
+            self.assertEqual(legacy_change_info(path), (1, 3, 1))
+            self.assertEqual(record.change_num, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
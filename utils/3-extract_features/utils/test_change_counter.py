@@ -0,0 +1,59 @@
+# encoding=utf-8
+import random
+import unittest
+
+from .ccset import ChangeEntry
+from .change_counter import CHANGE_CASES, COUNTER_NAMES, ENTITY_COUNTERS, ChangeCounter
+
+ENTITY_TYPES = ['IF_STATEMENT', 'FOR_STATEMENT', 'FOREACH_STATEMENT', 'WHILE_STATEMENT', 'CATCH_CLAUSE',
+                'TRY_STATEMENT', 'THROW_STATEMENT', 'METHOD_INVOCATION', 'ASSIGNMENT',
+                'VARIABLE_DECLARATION_STATEMENT', 'ELSE_STATEMENT', 'LINE_COMMENT', 'JAVADOC', 'RETURN_STATEMENT',
+                'METHOD_DECLARATION', 'ENHANCED_FOR_STATEMENT']
+CHANGE_TYPES = ['STATEMENT_UPDATE', 'ATTRIBUTE_RENAMING', 'METHOD_RENAMING', 'RETURN_TYPE_CHANGE',
+                'PARAMETER_DELETE', 'PARAMETER_INSERT', 'PARAMETER_RENAMING', 'PARAMETER_TYPE_CHANGE',
+                'CONDITION_EXPRESSION_CHANGE']
+
+
+def legacy_count(changes):
+    """
+    the per-entry substring cascade getFeatures used before the table
+    """
+    counts = dict((name, 0) for name in COUNTER_NAMES)
+    for change in changes:
+        if not (change.entity_type.__contains__('COMMENT') or change.entity_type.__contains__('DOC')):
+            counts['changeNum'] += 1
+        if change.change_type.__contains__('ATTRIBUTE'):
+            counts['attribute'] += 1
+        if change.entity.__contains__('METHOD_DECLARATION'):
+            counts['methodDeclaration'] += 1
+        for name, pattern in (('methodRenaming', 'METHOD_RENAMING'), ('returnType', 'RETURN_TYPE'),
+                              ('parameterDelete', 'PARAMETER_DELETE'), ('parameterInsert', 'PARAMETER_INSERT'),
+                              ('parameterRenaming', 'PARAMETER_RENAMING'),
+                              ('parameterTypeChange', 'PARAMETER_TYPE_CHANGE')):
+            if change.change_type.__contains__(pattern):
+                counts[name] += 1
+        for prefix, entity in ENTITY_COUNTERS:
+            for case in CHANGE_CASES:
+                if change.entity_type.__contains__(entity) and change.case.__contains__(case):
+                    counts[prefix + case] += 1
+    return [counts[name] for name in COUNTER_NAMES]
+
+
+class TestChangeCounter(unittest.TestCase):
+    def test_matches_legacy_cascade(self):
+        rng = random.Random(0)
+        changes = []
+        for i in range(500):
+            entity_type = rng.choice(ENTITY_TYPES)
+            changes.append(ChangeEntry(i, i + rng.randint(0, 5), rng.choice(CHANGE_CASES), rng.choice(CHANGE_TYPES),
+                                       entity_type + ': foo.bar%d()' % i, entity_type, 'foo.bar%d()' % i))
+        counter = ChangeCounter()
+        self.assertEqual(counter.count(changes).tolist(), legacy_count(changes))
+        self.assertEqual(counter.count(changes[:7]).tolist(), legacy_count(changes[:7]))
+
+    def test_empty(self):
+        self.assertEqual(ChangeCounter().count([]).tolist(), [0] * len(COUNTER_NAMES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+from .cup_cache import CachedCupPreprocessor
+
+
+class CountingPreprocessor(CachedCupPreprocessor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def _preprocess(self, txt):
+        self.calls.append(txt)
+        return txt.upper() + ' '
+
+
+class TestCachedCupPreprocessor(unittest.TestCase):
+    def test_lru(self):
+        cup = CountingPreprocessor(cache_size=2)
+        self.assertEqual(cup.tokenize('get user'), 'GET USER ')
+        self.assertEqual(cup.tokenize('get user'), 'GET USER ')
+        self.assertEqual(cup.calls, ['get user'])
+        cup.tokenize('b')
+        cup.tokenize('c')
+        # 'get user' was evicted by the two newer entries
+        cup.tokenize('get user')
+        self.assertEqual(cup.calls, ['get user', 'b', 'c', 'get user'])
+        self.assertEqual((cup.hits, cup.misses), (1, 4))
+
+    def test_disk_cache_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tokens.sqlite')
+            first = CountingPreprocessor(cache_path=path)
+            first.tokenize('return the user name')
+            second = CountingPreprocessor(cache_path=path)
+            self.assertEqual(second.tokenize('return the user name'), 'RETURN THE USER NAME ')
+            self.assertEqual(second.calls, [])
+            self.assertEqual(second.hits, 1)
+            first._db.close()
+            second._db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from .dataset import (FEATURE_SETS, SIMILARITY_COLUMNS, join_similarity, load_columns, load_csv, load_dataset,
+                      save_columns, select, to_dataframe, to_matrix)
+from .feature_table import COLUMN_NAMES, COLUMNS, FLOAT_FEATURES
+from .preprocessing import Standardizer
+
+
+def make_csv(path, n, offset=0, filename=False):
+    floats = set(COLUMN_NAMES.get(key, key) for key in FLOAT_FEATURES)
+    df = pd.DataFrame(dict((column, np.arange(n) / 7 if column in floats else np.arange(n) + offset)
+                           for column in COLUMNS))
+    if filename:
+        df['filename'] = ['project/Foo%d.java' % i for i in range(n)]
+    df.to_csv(path, index=False)
+    return df
+
+
+class TestDataset(unittest.TestCase):
+    def test_feature_sets(self):
+        # the columns outdate_predict / classifiers used to .drop() for two of the sets
+        self.assertEqual(FEATURE_SETS['relation_new'],
+                         ('label', 'bothHavePairNumChange', 'cmt2cd_sim_change', 'cmt2ch_sim_change',
+                          'all_token_change_sim'))
+        self.assertEqual(FEATURE_SETS['comment_prev'],
+                         ('label', 'lineNumOfOldCommentBylineNumOf"OldCCSet', 'lineNumOfOldComment', 'TODOCount',
+                          'FIXMECount', 'XXXCount', 'BUGCount', 'VERSIONCount', 'FIXEDCount'))
+        self.assertEqual(len(FEATURE_SETS['block_method_new']), len(COLUMNS) - 5)
+        self.assertEqual(FEATURE_SETS['block_method_new_embedding'],
+                         FEATURE_SETS['block_method_new'] + SIMILARITY_COLUMNS)
+
+    def test_compact_types_and_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'block.csv')
+            df = make_csv(path, 10, offset=200, filename=True)
+            table = load_csv(path)
+            self.assertTrue(os.path.exists(path + '.npy'))
+            self.assertEqual(table.dtype['label'], np.int16)
+            self.assertEqual(table.dtype['cmt2ch_sim_change'], np.float32)
+            self.assertEqual(table['filename'].tolist(), df['filename'].tolist())
+            self.assertIsInstance(load_csv(path), np.memmap)
+
+    def test_select_is_a_view(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            make_csv(os.path.join(tmp, 'block.csv'), 4)
+            make_csv(os.path.join(tmp, 'method.csv'), 3, offset=1000)
+            table = load_dataset(os.path.join(tmp, 'block.csv'), os.path.join(tmp, 'method.csv'))
+            self.assertEqual(table.dtype['changeNum'], np.int16)
+            self.assertEqual(table['changeNum'].tolist(), [0, 1, 2, 3, 1000, 1001, 1002])
+            view = select(table, 'code_new', drop=['label'])
+            self.assertTrue(np.shares_memory(view, table))
+            self.assertEqual(view.dtype.names, FEATURE_SETS['code_new'][1:])
+            x = to_matrix(view)
+            self.assertEqual(x.shape, (7, len(FEATURE_SETS['code_new']) - 1))
+            self.assertEqual(x.dtype, np.float32)
+            self.assertEqual(list(to_dataframe(view).columns), list(FEATURE_SETS['code_new'][1:]))
+
+    def test_join_similarity(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'similarity.npz')
+            columns = {'path': np.array([os.path.abspath('b.java'), os.path.abspath('a.java')]),
+                       'label': np.array([1, 0], dtype=np.int8), 'new_code_row': np.array([0, 2])}
+            for i, column in enumerate(SIMILARITY_COLUMNS):
+                columns[column] = np.array([i / 10, i / 5], dtype=np.float32)
+            save_columns(path, columns)
+            self.assertEqual(list(load_columns(path, ['label'])['label']), [1, 0])
+
+            df = pd.DataFrame({'path': ['a.java', 'c.java', 'b.java'], 'changeNum': [1, 2, 3]})
+            joined = join_similarity(df, path)
+            self.assertEqual(list(joined.columns), ['path', 'changeNum'] + list(SIMILARITY_COLUMNS))
+            np.testing.assert_allclose(joined['old_code_new_code_similarity'], [0.2, np.nan, 0.1])
+            self.assertNotIn(SIMILARITY_COLUMNS[0], df.columns)
+
+            # unscored rows reach the model through Standardizer, which maps them to the training mean
+            path = os.path.join(tmp, 'block.csv')
+            make_csv(path, 3)
+            table = pd.read_csv(path)
+            table['path'] = ['a.java', 'c.java', 'b.java']
+            joined = join_similarity(table, os.path.join(tmp, 'similarity.npz')).drop(columns='path')
+            joined.to_csv(path, index=False)
+            x = to_dataframe(select(load_csv(path), 'block_method_new_embedding', drop=['label']))
+            self.assertEqual(list(x.columns[-4:]), list(SIMILARITY_COLUMNS))
+            scaled = Standardizer().fit_transform(x)
+            self.assertEqual(float(scaled[1, -1]), 0.0)
+            self.assertFalse(np.isnan(scaled).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+from .ccset import parse_ccset
+from .feature_store import FeatureStore, record_digest
+from .test_ccset import CCSET
+
+
+class TestFeatureStore(unittest.TestCase):
+    def test_digest_ignores_path_and_features(self):
+        record = parse_ccset(CCSET, '/a/x.java')
+        moved = parse_ccset(CCSET + '\n-------------------------------\nlabel:1\n', '/b/x.java')
+        self.assertEqual(record_digest(record), record_digest(moved))
+        edited = parse_ccset(CCSET.replace('user', 'account'), '/a/x.java')
+        self.assertNotEqual(record_digest(record), record_digest(edited))
+
+    def test_versions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FeatureStore(os.path.join(tmp, 'features.sqlite'))
+            key = record_digest(parse_ccset(CCSET))
+            self.assertIsNone(store.get(key, 'pos', 1))
+            store.put(key, 'pos', 1, {'NNComment': '0.250000'})
+            self.assertEqual(store.get(key, 'pos', 1), {'NNComment': '0.250000'})
+            self.assertTrue(store.has(key, 'pos', 1))
+            # a new version of the group is a miss until it is recomputed
+            self.assertIsNone(store.get(key, 'pos', 2))
+            self.assertFalse(store.has(key, 'pos', 2))
+            self.assertIsNone(store.get(key, 'change', 1))
+            store.put(key, 'pos', 2, {'NNComment': '0.500000'})
+            self.assertEqual(store.get(key, 'pos', 2), {'NNComment': '0.500000'})
+            self.assertEqual((store.hits, store.misses), (2, 3))
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .feature_table import (COLUMNS, FEATURE_KEYS, FLOAT_FEATURES, PATH_COLUMN, load_table, next_part_path,
+                            save_table, table_to_dataframe, to_table)
+
+
+def make_row(seed):
+    row = dict()
+    for i, key in enumerate(FEATURE_KEYS):
+        row[key] = format((seed + i) / 7, '.6f') if key in FLOAT_FEATURES else str(seed + i)
+    return row
+
+
+class TestFeatureTable(unittest.TestCase):
+    def test_schema(self):
+        self.assertEqual(len(FEATURE_KEYS), 93)
+        self.assertIn('lineNumOfOldCommentBylineNumOf"OldCCSet', COLUMNS)
+        table = to_table(['a.java'], [make_row(0)])
+        self.assertEqual(table.dtype.names, (PATH_COLUMN,) + COLUMNS)
+        self.assertEqual(table.dtype['label'], np.int32)
+        self.assertEqual(table.dtype['cmt2ch_sim_change'], np.float64)
+
+    def test_values(self):
+        row = make_row(3)
+        table = to_table(['/data/a.java'], [row])
+        self.assertEqual(table[0]['changeNum'], 4)
+        self.assertEqual(table[0]['NNComment'], float(row['NNComment']))
+
+    def test_parts_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_table(to_table(['a.java'], [make_row(0)]), next_part_path(tmp))
+            save_table(to_table(['/a/much/longer/b.java', 'c.java'], [make_row(1), make_row(2)]), next_part_path(tmp))
+            table = load_table(tmp)
+            self.assertEqual(table[PATH_COLUMN].tolist(), ['a.java', '/a/much/longer/b.java', 'c.java'])
+            self.assertEqual(table['label'].tolist(), [0, 1, 2])
+            df = table_to_dataframe(table)
+            self.assertEqual(list(df.columns), list(COLUMNS) + [PATH_COLUMN])
+            self.assertEqual(sorted(os.listdir(tmp)), ['features-00000.npy', 'features-00001.npy'])
+
+    def test_resume_after_crash(self):
+        # My._flush_rows saved a part, the run died before its manifest entries were written, the resumed run
+        # extracted the same files again into the next part
+        with tempfile.TemporaryDirectory() as tmp:
+            save_table(to_table(['x.java'], [make_row(0)]), next_part_path(tmp))
+            save_table(to_table(['a.java', 'b.java'], [make_row(1), make_row(2)]), next_part_path(tmp))
+            save_table(to_table(['b.java', 'a.java', 'c.java'], [make_row(12), make_row(11), make_row(13)]),
+                       next_part_path(tmp))
+            table = load_table(tmp)
+            self.assertEqual(table[PATH_COLUMN].tolist(), ['x.java', 'b.java', 'a.java', 'c.java'])
+            self.assertEqual(table['label'].tolist(), [0, 12, 11, 13])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+# encoding=utf-8
+import random
+import unittest
+
+from .intervals import covered_count, merge_intervals
+
+
+class TestIntervals(unittest.TestCase):
+    def test_merge(self):
+        self.assertEqual(merge_intervals([(10, 12), (1, 3), (4, 4), (11, 20), (30, 29), (25, 26)]),
+                         [(1, 4), (10, 20), (25, 26)])
+        self.assertEqual(merge_intervals([]), [])
+
+    def test_covered_count_matches_line_set(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            ranges = []
+            for _ in range(rng.randint(0, 20)):
+                start = rng.randint(0, 200)
+                ranges.append((start, start + rng.randint(-2, 30)))
+            lines = set()
+            for start, end in ranges:
+                lines.update(range(start, end + 1))
+            self.assertEqual(covered_count(ranges), len(lines))
+
+    def test_large_range(self):
+        self.assertEqual(covered_count([(1, 10 ** 9), (5, 7)]), 10 ** 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# encoding=utf-8
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from .model_zoo import estimator_cores, run_zoo, zoo_table
+from .preprocessing import Standardizer
+
+
+class TestModelZoo(unittest.TestCase):
+    def test_estimator_cores(self):
+        self.assertEqual(estimator_cores(GaussianNB(), 8), 1)
+        self.assertEqual(estimator_cores(RandomForestClassifier(n_jobs=-1), 8), 8)
+        self.assertEqual(estimator_cores(RandomForestClassifier(n_jobs=-2), 8), 7)
+        self.assertEqual(estimator_cores(RandomForestClassifier(n_jobs=16), 8), 8)
+        self.assertEqual(estimator_cores(make_pipeline(Standardizer(), RandomForestClassifier(n_jobs=4)), 8), 4)
+
+    def test_run_zoo(self):
+        x, y = make_classification(n_samples=300, n_features=6, random_state=0)
+        xtrain, xtest, ytrain, ytest = x[:200], x[200:], y[:200], y[200:]
+        models = [('NaiveBayes', GaussianNB()), ('DecisionTree', DecisionTreeClassifier(random_state=0)),
+                  ('RandomForest', RandomForestClassifier(n_estimators=10, n_jobs=-1, random_state=0))]
+        rows = run_zoo(models, xtrain, ytrain, xtest, ytest, predict_sets={'all': x}, cores=2,
+                       return_estimators=True)
+        self.assertEqual([row['name'] for row in rows], ['NaiveBayes', 'DecisionTree', 'RandomForest'])
+        expected = DecisionTreeClassifier(random_state=0).fit(xtrain, ytrain)
+        self.assertTrue(np.array_equal(rows[1]['predictions']['test'], expected.predict(xtest)))
+        self.assertTrue(np.array_equal(rows[1]['estimator'].predict(x), rows[1]['predictions']['all']))
+        for row in rows:
+            self.assertGreater(row['peak_mb'], 0)
+            self.assertGreater(row['f1'], 0.5)
+        self.assertEqual(len(zoo_table(rows)), 3)
+
+    def test_spawn(self):
+        # the start method outside Linux: estimators and data are pickled to the model processes
+        x, y = make_classification(n_samples=200, n_features=6, random_state=0)
+        rows = run_zoo([('DecisionTree', make_pipeline(Standardizer(), DecisionTreeClassifier(random_state=0)))],
+                       x[:150], y[:150], x[150:], y[150:], cores=1, return_estimators=True, start_method='spawn')
+        expected = make_pipeline(Standardizer(), DecisionTreeClassifier(random_state=0)).fit(x[:150], y[:150])
+        self.assertTrue(np.array_equal(rows[0]['predictions']['test'], expected.predict(x[150:])))
+        self.assertTrue(np.array_equal(rows[0]['estimator'].predict(x), expected.predict(x)))
+
+    def test_error(self):
+        rows = run_zoo([('bad', DecisionTreeClassifier(max_depth=-1))], np.zeros((4, 1)), [0, 1, 0, 1], cores=1)
+        self.assertIn('error', rows[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+# encoding=utf-8
+import unittest
+
+import numpy as np
+
+from .ccset import parse_ccset
+from .near_duplicates import MinHashLSH, record_shingles, words
+from .test_ccset import CCSET
+
+
+class TestNearDuplicates(unittest.TestCase):
+    def test_words(self):
+        self.assertEqual(words(['return user.getUserName(); // HTTP_PORT']),
+                         ['return', 'user', 'get', 'user', 'name', 'http', 'port'])
+
+    def test_signature_estimates_jaccard(self):
+        lsh = MinHashLSH(num_perm=256, bands=32)
+        s1 = set('w%d' % i for i in range(100))
+        s2 = set('w%d' % i for i in range(20, 120))  # jaccard 80 / 120
+        lsh.add(lsh.signature(s1))
+        lsh.add(lsh.signature(s2))
+        self.assertAlmostEqual(lsh.jaccard(0, 1), 80 / 120, delta=0.1)
+        self.assertTrue(np.array_equal(lsh.signature(s1), lsh.signatures[0]))
+
+    def test_clusters(self):
+        lsh = MinHashLSH()
+        original = parse_ccset(CCSET)
+        renamed = parse_ccset(CCSET.replace('return user.getName();', 'return user.getFullName();'))
+        other = parse_ccset(CCSET.replace('user', 'cache').replace('name', 'size').replace('login', 'entries')
+                            .replace('isActive', 'isEmpty').replace('getLogin', 'clear').replace('getName', 'size'))
+        for record in (original, other, renamed, original):
+            lsh.add(lsh.signature(record_shingles(record)))
+        self.assertEqual(lsh.clusters(), [0, 1, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# encoding=utf-8
+import unittest
+
+from .pos_features import GROUP_TAGS, POS_GROUPS, TAG_TO_GROUP, pos_counts, pos_ratios
+
+
+class TestPosFeatures(unittest.TestCase):
+    tagged = [('return', 'VB'), ('the', 'DT'), ('user', 'NN'), ('names', 'NNS'), ('which', 'WDT'),
+              ('is', 'VBZ'), ('quickly', 'RB'), ('up', 'RP'), ('.', '.'), ('his', 'PRP$')]
+
+    def test_every_tag_in_one_group(self):
+        self.assertEqual(sum(len(tags) for tags in GROUP_TAGS.values()), len(TAG_TO_GROUP))
+        self.assertEqual(set(GROUP_TAGS.keys()), set(POS_GROUPS))
+
+    def test_counts(self):
+        counts = dict(zip(POS_GROUPS, pos_counts(self.tagged).tolist()))
+        self.assertEqual(counts, {'NN': 2, 'VB': 2, 'DT': 2, 'IN': 0, 'JJ': 0, 'RB': 1, 'PRP': 1, 'MD': 0,
+                                  'LS': 0, 'RP': 1})
+
+    def test_ratios(self):
+        ratios = pos_ratios(self.tagged)
+        self.assertAlmostEqual(ratios[POS_GROUPS.index('NN')], 0.2)
+        self.assertEqual(pos_ratios([]).tolist(), [0.0] * len(POS_GROUPS))
+
+
+if __name__ == '__main__':
+    unittest.main()
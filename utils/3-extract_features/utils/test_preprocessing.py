@@ -0,0 +1,39 @@
+# encoding=utf-8
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from .preprocessing import Standardizer
+
+
+class TestStandardizer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.df = pd.DataFrame({'a': rng.randint(0, 9, 50), 'b': rng.rand(50), 'constant': np.ones(50)})
+        self.df.loc[3, 'b'] = np.nan
+
+    def test_matches_pandas_zscore(self):
+        expected = self.df.apply(lambda a: (a - a.mean()) / (a.std())).fillna(0)
+        out = Standardizer().fit_transform(self.df)
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out, expected.to_numpy(), atol=1e-5)
+
+    def test_train_statistics_only(self):
+        scaler = Standardizer().fit(self.df[:10])
+        out = scaler.transform(self.df[10:])
+        np.testing.assert_allclose(out[:, 0], (self.df['a'][10:] - self.df['a'][:10].mean()) /
+                                   self.df['a'][:10].std(), atol=1e-5)
+        with self.assertRaises(ValueError):
+            scaler.transform(self.df[['a', 'b']])
+
+    def test_pipeline(self):
+        y = (self.df['a'] > 4).astype(int)
+        model = make_pipeline(Standardizer(), LogisticRegression()).fit(self.df, y)
+        self.assertGreater(model.score(self.df, y), 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# encoding=utf-8
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from .feature_table import save_table, to_table
+from .scoring import load_model, save_model, score_file
+from .test_feature_table import make_row
+
+COLUMNS = ['changeNum', 'cmt2cd_sim_change', 'cmt2ch_sim_change']
+
+
+class TestScoring(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.df = pd.DataFrame(rng.rand(60, 3), columns=COLUMNS)
+        self.df['label'] = (self.df['cmt2cd_sim_change'] > 0.5).astype(int)
+        self.df['filename'] = ['RQ4project_feature%dFoo.java' % i for i in range(60)]
+        self.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.df[COLUMNS], self.df['label'])
+
+    def test_csv_in_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_model(os.path.join(tmp, 'model.joblib'), self.model, COLUMNS, feature_set='test')
+            bundle = load_model(os.path.join(tmp, 'model.joblib'))
+            self.assertEqual(bundle['meta'], {'feature_set': 'test'})
+            self.df.to_csv(os.path.join(tmp, 'project.csv'), index=False)
+            out = io.StringIO()
+            self.assertEqual(score_file(bundle, os.path.join(tmp, 'project.csv'), out, chunksize=7),
+                             (60, int(self.model.predict(self.df[COLUMNS]).sum())))
+        expected = self.df['filename'][self.model.predict(self.df[COLUMNS]) == 1].tolist()
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split('\t')[0] for line in lines], expected)
+        self.assertTrue(all(float(line.split('\t')[1]) > 0.5 for line in lines))
+
+    def test_feature_table(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_table(to_table(['/data/a.java', '/data/b.java'], [make_row(0), make_row(3)]),
+                       os.path.join(tmp, 'features.npy'))
+            out = io.StringIO()
+            n_rows, n_flagged = score_file({'model': self.model, 'columns': COLUMNS},
+                                           os.path.join(tmp, 'features.npy'), out, threshold=-1)
+        self.assertEqual((n_rows, n_flagged), (2, 2))
+        self.assertEqual(out.getvalue().splitlines()[1].split('\t')[0], '/data/b.java')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# encoding=utf-8
+import unittest
+
+import numpy as np
+
+from .similarity import SimilarityEngine
+
+
+class FakeVectors(object):
+    def __init__(self, words, dim=8, seed=0):
+        rng = np.random.RandomState(seed)
+        self.key_to_index = {w: i for i, w in enumerate(words)}
+        self.vectors = rng.randn(len(words), dim).astype(np.float32)
+
+    def similarity(self, w1, w2):
+        v1 = self.vectors[self.key_to_index[w1]]
+        v2 = self.vectors[self.key_to_index[w2]]
+        return float(np.dot(v1 / np.linalg.norm(v1), v2 / np.linalg.norm(v2)))
+
+
+def loop_word2sentence(wv, wd, sentence):
+    def word2word(a, b):
+        try:
+            return wv.similarity(a, b)
+        except KeyError:
+            return 0.0
+    return max([word2word(wd, w) for w in sentence]) if sentence else 0.0
+
+
+def loop_sen12sen2(wv, sen1, sen2):
+    if len(sen1) == 0 or len(sen2) == 0:
+        return 0.0
+    return sum([loop_word2sentence(wv, wd, sen2) for wd in sen1]) / len(sen1)
+
+
+class TestSimilarityEngine(unittest.TestCase):
+    def setUp(self):
+        self.wv = FakeVectors(['get', 'user', 'name', 'return', 'login', 'check', 'value'])
+        self.engine = SimilarityEngine(self.wv)
+        self.sentences = [
+            ['check', 'the', 'user', 'name'],
+            ['return', 'user', 'get', 'name'],
+            ['return', 'user', 'get', 'login'],
+            ['unknown', 'words', 'only'],
+            ['value'],
+            [],
+        ]
+
+    def test_word2sentence_max(self):
+        for sen1 in self.sentences:
+            for sen2 in self.sentences:
+                expected = [loop_word2sentence(self.wv, wd, sen2) for wd in sen1]
+                np.testing.assert_allclose(self.engine.word2sentence_max(sen1, sen2), expected, atol=1e-6)
+
+    def test_sen2sen(self):
+        for sen1 in self.sentences:
+            for sen2 in self.sentences:
+                expected = (loop_sen12sen2(self.wv, sen1, sen2) + loop_sen12sen2(self.wv, sen2, sen1)) / 2
+                self.assertAlmostEqual(self.engine.sen2sen(sen1, sen2), expected, places=6)
+                self.assertAlmostEqual(self.engine.sen12sen2(sen1, sen2), loop_sen12sen2(self.wv, sen1, sen2),
+                                       places=6)
+
+    def test_identical_words(self):
+        self.assertAlmostEqual(self.engine.sen2sen(['user', 'name'], ['name', 'user']), 1.0, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.pipeline import make_pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from .preprocessing import Standardizer
+from .tuning import FoldCache, estimator_key, halving_search, stratified_order
+
+
+class TestTuning(unittest.TestCase):
+    def setUp(self):
+        self.x, self.y = make_classification(n_samples=600, n_features=8, n_informative=4, random_state=0)
+
+    def test_stratified_order(self):
+        y = np.array([0] * 75 + [1] * 25)
+        order = stratified_order(y, 1)
+        self.assertEqual(sorted(order.tolist()), list(range(100)))
+        self.assertEqual(int(y[order[:20]].sum()), 5)
+
+    def test_halving(self):
+        grid = {'max_depth': [1, 2, 4, 8], 'min_samples_leaf': [1, 5], 'criterion': ['gini', 'entropy']}
+        res = halving_search(DecisionTreeClassifier(random_state=0), grid, self.x, self.y, cv=3, n_jobs=1)
+        # 16 candidates, factor 3: 16 -> 6 -> 2 -> 1 candidates on 22, 66, 198 and all 600 samples
+        self.assertEqual(res['computed'], (16 + 6 + 2 + 1) * 3)
+        self.assertEqual(sorted(set(row['n_resources'] for row in res['history'])), [22, 66, 198, 600])
+        self.assertNotEqual(res['best_params']['max_depth'], 1)
+
+    def test_cache(self):
+        grid = {'max_depth': [1, 3, 6], 'min_samples_leaf': [1, 5, 20]}
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FoldCache(os.path.join(tmp, 'folds.sqlite'))
+            first = halving_search(DecisionTreeClassifier(random_state=0), grid, self.x, self.y, cv=3, n_jobs=1,
+                                   cache=cache)
+            again = halving_search(DecisionTreeClassifier(random_state=0), grid, self.x, self.y, cv=3, n_jobs=1,
+                                   cache=cache)
+            self.assertEqual(again['computed'], 0)
+            self.assertEqual(again['cached'], first['computed'])
+            self.assertEqual(again['best_params'], first['best_params'])
+            self.assertEqual(again['best_score'], first['best_score'])
+            # one more value: its candidates are new, the first subsample of the others is reused
+            grid['min_samples_leaf'].append(50)
+            more = halving_search(DecisionTreeClassifier(random_state=0), grid, self.x, self.y, cv=3, n_jobs=1,
+                                  cache=cache)
+            self.assertGreaterEqual(more['cached'], 9 * 3)
+            cache.close()
+
+    def test_cache_after_grid_grows(self):
+        # 8 -> 10 candidates crosses a power of factor, the subsample sizes must stay the same
+        grid = {'max_depth': [1, 2, 3, 4], 'min_samples_leaf': [1, 10]}
+        x, y = make_classification(n_samples=3000, n_features=8, n_informative=4, random_state=0)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FoldCache(os.path.join(tmp, 'folds.sqlite'))
+            first = halving_search(DecisionTreeClassifier(random_state=0), grid, x, y, cv=5, n_jobs=1, cache=cache)
+            grid['max_depth'].append(6)
+            more = halving_search(DecisionTreeClassifier(random_state=0), grid, x, y, cv=5, n_jobs=1, cache=cache)
+            cache.close()
+        self.assertEqual(first['history'][0]['n_resources'], more['history'][0]['n_resources'])
+        # the first iteration of the 8 old candidates comes from the cache
+        self.assertGreaterEqual(more['cached'], 8 * 5)
+        self.assertLess(more['computed'], first['computed'])
+
+    def test_pipeline(self):
+        pipeline = make_pipeline(Standardizer(), DecisionTreeClassifier(random_state=0))
+        self.assertNotEqual(estimator_key(pipeline, {'decisiontreeclassifier__max_depth': 1}),
+                            estimator_key(pipeline, {'decisiontreeclassifier__max_depth': 2}))
+        self.assertNotEqual(estimator_key(pipeline, {'decisiontreeclassifier__max_depth': 1}),
+                            estimator_key(DecisionTreeClassifier(random_state=0), {'max_depth': 1}))
+        res = halving_search(pipeline, {'decisiontreeclassifier__max_depth': [1, 4]}, self.x, self.y, cv=3, n_jobs=1)
+        self.assertEqual(res['best_params'], {'decisiontreeclassifier__max_depth': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
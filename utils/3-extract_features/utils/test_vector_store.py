@@ -0,0 +1,51 @@
+# encoding=utf-8
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .similarity import SimilarityEngine
+from .vector_store import VectorStore
+
+
+class FakeKeyedVectors(object):
+    def __init__(self):
+        self.index_to_key = ['get', 'user', 'name', '中文']
+        self.vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+
+class TestVectorStore(unittest.TestCase):
+    def test_fingerprint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, 'a', 'word_vector')
+            VectorStore.save(FakeKeyedVectors(), prefix)
+            fingerprint = VectorStore.fingerprint(prefix)
+            self.assertEqual(VectorStore.fingerprint(prefix), fingerprint)
+            other = FakeKeyedVectors()
+            other.index_to_key = ['get', 'user', 'login', '中文']
+            VectorStore.save(other, prefix)
+            self.assertNotEqual(VectorStore.fingerprint(prefix), fingerprint)
+
+    def test_save_and_mmap_load(self):
+        wv = FakeKeyedVectors()
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, 'vectors', 'word_vector')
+            self.assertFalse(VectorStore.exists(prefix))
+            VectorStore.save(wv, prefix)
+            self.assertTrue(VectorStore.exists(prefix))
+
+            store = VectorStore.load(prefix)
+            self.assertIsInstance(store.vectors, np.memmap)
+            self.assertFalse(store.vectors.flags.writeable)
+            self.assertEqual(store.index_to_key, wv.index_to_key)
+            self.assertEqual(store.key_to_index['中文'], 3)
+            np.testing.assert_array_equal(store.vectors, wv.vectors)
+
+            engine = SimilarityEngine(store)
+            self.assertAlmostEqual(engine.sen2sen(['user'], ['user']), 1.0, places=6)
+            del engine, store
+
+
+if __name__ == '__main__':
+    unittest.main()
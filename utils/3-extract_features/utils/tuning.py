@@ -0,0 +1,158 @@
+# encoding=utf-8
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+
+def data_digest(x: np.ndarray, y: np.ndarray) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for a in (np.ascontiguousarray(x), np.ascontiguousarray(y)):
+        h.update(str((a.shape, a.dtype.str)).encode('utf-8'))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def estimator_key(estimator, params: Dict) -> str:
+    """
+    the estimator class, its fixed parameters and the grid point, as one stable string. the parameters of
+    the steps of a pipeline are taken one by one (`step__param`), the step objects themselves are left out
+    """
+    fixed = clone(estimator).set_params(**params).get_params(deep=True)
+    fixed = {name: value for name, value in fixed.items() if not hasattr(value, 'get_params') and name != 'steps'}
+    steps = [type(step).__name__ for _, step in getattr(estimator, 'steps', [])]
+    return json.dumps([type(estimator).__name__, steps, sorted(fixed.items())], default=repr)
+
+
+class FoldCache(object):
+    """
+    sqlite store of cross validation fold scores, keyed by data digest, estimator_key, scoring,
+    subsample size and fold. only the searching process reads and writes it
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS folds (key BLOB PRIMARY KEY, score REAL NOT NULL, '
+                        'seconds REAL NOT NULL)')
+
+    @staticmethod
+    def key(*parts) -> bytes:
+        return hashlib.blake2b(json.dumps(parts, default=repr).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[float, float]]:
+        return self.db.execute('SELECT score, seconds FROM folds WHERE key = ?', (key,)).fetchone()
+
+    def put_many(self, rows: List[Tuple[bytes, float, float]]):
+        self.db.execute('BEGIN')
+        self.db.executemany('INSERT OR REPLACE INTO folds VALUES (?, ?, ?)', rows)
+        self.db.execute('COMMIT')
+
+    def close(self):
+        self.db.close()
+
+
+def stratified_order(y: np.ndarray, random_state=0) -> np.ndarray:
+    """
+    a shuffled order of the sample indices in which every prefix keeps the class ratio of y
+    """
+    permutation = np.random.RandomState(random_state).permutation(len(y))
+    rank = np.empty(len(y))
+    for label in np.unique(y):
+        members = permutation[y[permutation] == label]
+        rank[members] = (np.arange(len(members)) + 0.5) / len(members)
+    return np.argsort(rank, kind='stable')
+
+
+def _fit_score(estimator, x, y, train, test, scoring):
+    start = time.perf_counter()
+    estimator.fit(x[train], y[train])
+    score = get_scorer(scoring)(estimator, x[test], y[test])
+    return float(score), time.perf_counter() - start
+
+
+def halving_search(estimator, param_grid, x, y, cv=10, factor=3, min_resources=None, n_levels=4, scoring='f1',
+                   n_jobs=-1, cache: FoldCache = None, random_state=0, verbose=False) -> Dict:
+    """
+    successive halving over a parameter grid: every candidate is cross validated on a small stratified
+    subsample, the best 1/factor are kept and the subsample grows factor times, up to the whole training set.
+    the subsample sizes depend on the data only (min_resources, default len(y) / factor ** (n_levels - 1),
+    times factor per iteration), never on the size of the grid; once a single candidate is left it goes
+    straight to the whole training set.
+    the folds of all candidates of an iteration run in one joblib pool, each estimator keeps its own n_jobs.
+    with a cache, fold scores computed by an earlier run on the same data are reused, so adding a value to
+    the grid only fits the new candidates
+    :return: best_params, best_score, history (one row per candidate and iteration), computed, cached
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    candidates = list(ParameterGrid(param_grid))
+    smallest = cv * 2 * len(np.unique(y))
+    if min_resources is None:
+        min_resources = max(smallest, len(y) // factor ** (n_levels - 1))
+    resources = []
+    while min_resources * factor ** len(resources) < len(y):
+        resources.append(min_resources * factor ** len(resources))
+    resources.append(len(y))
+    # one fixed order, so the subsample of a given size (and its cache keys) never changes
+    order = stratified_order(y, random_state)
+
+    digest = data_digest(x, y)
+    history = []
+    computed = 0
+    cached = 0
+    for iteration, n_resources in enumerate(resources):
+        if len(candidates) == 1:
+            n_resources = len(y)
+        subset = np.sort(order[:n_resources])
+        xs, ys = x[subset], y[subset]
+        folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(xs, ys))
+        keys = [[FoldCache.key(digest, estimator_key(estimator, params), scoring, n_resources, cv, random_state, i)
+                 for i in range(cv)] for params in candidates]
+        results = dict()
+        todo = []
+        for c in range(len(candidates)):
+            for i in range(cv):
+                hit = cache.get(keys[c][i]) if cache is not None else None
+                if hit is not None:
+                    results[c, i] = hit
+                    cached += 1
+                else:
+                    todo.append((c, i))
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_score)(clone(estimator).set_params(**candidates[c]), xs, ys, folds[i][0], folds[i][1], scoring)
+            for c, i in todo)
+        computed += len(todo)
+        for (c, i), score in zip(todo, scores):
+            results[c, i] = score
+        if cache is not None and len(todo) != 0:
+            cache.put_many([(keys[c][i], score, seconds) for (c, i), (score, seconds) in zip(todo, scores)])
+
+        means = []
+        for c, params in enumerate(candidates):
+            mean = float(np.mean([results[c, i][0] for i in range(cv)]))
+            means.append(mean)
+            history.append({'iteration': iteration, 'n_resources': n_resources, 'params': params,
+                            'mean_score': mean, 'fit_seconds': sum([results[c, i][1] for i in range(cv)])})
+        if verbose:
+            print('iteration %d: %d candidates on %d samples, %d fits, best %.6f' % (
+                iteration, len(candidates), n_resources, len(todo), max(means)))
+        keep = max(1, int(math.ceil(len(candidates) / factor)))
+        best = np.argsort(-np.asarray(means), kind='stable')[:keep]
+        if n_resources == len(y):
+            return {'best_params': candidates[best[0]], 'best_score': means[best[0]], 'history': history,
+                    'computed': computed, 'cached': cached}
+        candidates = [candidates[c] for c in best]
+
@@ -0,0 +1,74 @@
+# encoding=utf-8
+import hashlib
+import os
+from typing import Dict, List
+
+import numpy as np
+
+
+class VectorStore(object):
+    """
+    frozen, read-only word vectors: `<prefix>.vectors.npy` holds one row per word and
+    `<prefix>.vocab.txt` the words in row order. the matrix is opened with mmap so every
+    worker process of a pool shares the same pages through the OS page cache
+    """
+    VECTORS_SUFFIX = '.vectors.npy'
+    VOCAB_SUFFIX = '.vocab.txt'
+
+    def __init__(self, vectors: np.ndarray, index_to_key: List[str]):
+        self.vectors = vectors
+        self.index_to_key = index_to_key
+        self.key_to_index: Dict[str, int] = {w: i for i, w in enumerate(index_to_key)}
+
+    def __len__(self):
+        return len(self.index_to_key)
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    @classmethod
+    def exists(cls, prefix: str) -> bool:
+        return os.path.exists(prefix + cls.VECTORS_SUFFIX) and os.path.exists(prefix + cls.VOCAB_SUFFIX)
+
+    @classmethod
+    def fingerprint(cls, prefix: str) -> str:
+        """
+        identifies the exported vectors without loading them: a hash of the vocabulary file together with
+        the size and mtime of the matrix, so features computed from other vectors are never taken for these
+        """
+        h = hashlib.blake2b(digest_size=16)
+        with open(prefix + cls.VOCAB_SUFFIX, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        h.update(file_signature(prefix + cls.VECTORS_SUFFIX).encode('utf-8'))
+        return h.hexdigest()
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> 'VectorStore':
+        vectors = np.load(prefix + cls.VECTORS_SUFFIX, mmap_mode='r' if mmap else None)
+        with open(prefix + cls.VOCAB_SUFFIX, encoding='utf-8') as f:
+            index_to_key = f.read().split('\n')[:-1]
+        if len(index_to_key) != len(vectors):
+            raise ValueError('%s: %d words but %d vectors' % (prefix, len(index_to_key), len(vectors)))
+        return cls(vectors, index_to_key)
+
+    @classmethod
+    def save(cls, wv, prefix: str):
+        """
+        :param wv: gensim KeyedVectors (model.wv) or anything with `index_to_key` and `vectors`
+        """
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(prefix + cls.VECTORS_SUFFIX, np.ascontiguousarray(wv.vectors, dtype=np.float32))
+        with open(prefix + cls.VOCAB_SUFFIX, 'w', encoding='utf-8') as f:
+            for word in wv.index_to_key:
+                f.write(word + '\n')
+
+
+def file_signature(path: str) -> str:
+    """
+    size and modification time of a file, which change whenever it is rewritten
+    """
+    st = os.stat(path)
+    return '%d-%d' % (st.st_size, st.st_mtime_ns)
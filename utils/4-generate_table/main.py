@@ -1,124 +1,38 @@
 import csv
 import os
+import sys
 from os import path
 
-title = ['label',
-         'changeNum',
-         'attribute',
-         'methodDeclaration',
-         'methodRenaming',
-         'returnType',
-         'parameterDelete',
-         'parameterInsert',
-         'parameterRenaming',
-         'parameterTypeChange',
-         'containReturn',
-         'lineNumOfOldCodeBylineNumOfOldCCSet',
-         'lineNumOfOldCode',
-         'lineNumOfOldCommentBylineNumOf"OldCCSet',
-         'lineNumOfOldComment',
-         'TODOCount',
-         'FIXMECount',
-         'XXXCount',
-         'BUGCount',
-         'VERSIONCount',
-         'FIXEDCount',
-         'lineNumOfChanged',
-         'changedLineByAllCodeLine',
-         'ifInsert',
-         'ifUpdate',
-         'ifMove',
-         'ifDelete',
-         'forInsert',
-         'forUpdate',
-         'forMove',
-         'forDelete',
-         'foreachInsert',
-         'foreachUpdate',
-         'foreachMove',
-         'foreachDelete',
-         'whileInsert',
-         'whileUpdate',
-         'whileMove',
-         'whileDelete',
-         'catchInsert',
-         'catchUpdate',
-         'catchMove',
-         'catchDelete',
-         'tryInsert',
-         'tryUpdate',
-         'tryMove',
-         'tryDelete',
-         'throwInsert',
-         'throwUpdate',
-         'throwMove',
-         'throwDelete',
-         'methodInvInsert',
-         'methodInvUpdate',
-         'methodInvMove',
-         'methodInvDelete',
-         'assignInsert',
-         'assignUpdate',
-         'assignMove',
-         'assignDelete',
-         'varDecInsert',
-         'varDecUpdate',
-         'varDecMove',
-         'varDecDelete',
-         'elseInsert',
-         'elseUpdate',
-         'elseMove',
-         'elseDelete',
-         'NNComment',
-         'VBComment',
-         'DTComment',
-         'INComment',
-         'JJComment',
-         'RBComment',
-         'PRPComment',
-         'MDComment',
-         'LSComment',
-         'RPComment',
-         'NNCode',
-         'VBCode',
-         'DTCode',
-         'INCode',
-         'JJCode',
-         'RBCode',
-         'PRPCode',
-         'MDCode',
-         'LSCode',
-         'RPCode',
-         'bothHavePairNumChange',
-         'cmt2cd_sim_before',
-         'cmt2cd_sim_after',
-         'cmt2cd_sim_change',
-         'cmt2ch_sim_change',
-         'all_token_change_sim']
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), '..', '3-extract_features'))
+from utils.ccset import read_ccset
+from utils.dataset import join_similarity
+from utils.feature_table import COLUMNS, load_table, table_to_dataframe
 
-with open("/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/ejbca.csv", 'w', newline='') as csv_file:
-    writer = csv.writer(csv_file)
-    writer.writerow(title)
+title = list(COLUMNS)
 
-    url = "/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/ejbca_feature"
-    file = os.listdir(url)
+# python main.py <feature table (.npy 或 My.py 输出目录)> <csv> [similarity.npz]: 直接由特征表生成 csv
+# 给出 feature_transform 的 similarity.npz 时按路径把四个相似度作为新特征列加入, 未计算的样本为空值
+# 不带参数时按旧方式逐个解析特征文件
+if len(sys.argv) in (3, 4):
+    table = table_to_dataframe(load_table(sys.argv[1]))
+    if len(sys.argv) == 4:
+        table = join_similarity(table, sys.argv[3])
+    table.drop(columns='path').to_csv(sys.argv[2], index=False)
+else:
+    with open("/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/ejbca.csv", 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(title)
 
-    for f in file:
-        real_url = path.join(url, f)
-        if path.isfile(real_url):
-            pathname = str(path.abspath(real_url))
-            if (pathname.endswith('.java')):
-                with open(pathname, 'r') as f:
-                    row = []
-                    start = False
-                    for line in f:
-                        if line.startswith('-------------------------------'):
-                            start = True
-                        if line.__contains__(':') and start:
-                            print(line.split(':')[1])
-                            row.append(str(line.split(':')[1]).replace('\n', ''))
-                        if line.startswith('all_token_change_sim:'):
-                            # row.append(str(''.join(pathname.split('/')[-3:])))
-                            break
+        url = "/Users/chenyn/chenyn's/研究生/DataSet/My dect/RQ4/ejbca_feature"
+        file = os.listdir(url)
+
+        for f in file:
+            real_url = path.join(url, f)
+            if path.isfile(real_url):
+                pathname = str(path.abspath(real_url))
+                if (pathname.endswith('.java')):
+                    record = read_ccset(pathname)
+                    row = list(record.features.values())
+                    # row.append(str(''.join(pathname.split('/')[-3:])))
                     print(row)
                     writer.writerow(row)
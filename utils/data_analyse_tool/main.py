@@ -1,233 +1,133 @@
+import argparse
 import os
+import sys
+from multiprocessing import Pool, cpu_count
 
+import numpy as np
+import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-extract_features'))
+from utils.ccset import read_ccset
+from utils.intervals import covered_count
+
+# 直方图默认区间左端点: 1-3, 4-6, 7-9, 10-12, 13-15, >15
+DEFAULT_BINS = [1, 4, 7, 10, 13, 16]
+
+
+# 变更数量取 feature_change_num: 特征文件中分隔线之后 My.getFeatures 写入的 changeNum (原先逐行扫描保留的是最后一个 changeNum),
+# 没有特征部分时才用 ccset 本身的 changeNum
 def get_change_info(path):
-    is_method = False
-    with open(path) as f:
-        change_line = []
-        for line in f.readlines():
-            if line.startswith('type:') and line.__contains__('METHOD_COMMENT'):
-                is_method = True
-            if line.startswith('changeNum:'):
-                change_num = int(line.split(':')[-1])
-            if line.startswith('label:'):
-                label = int(line.split(':')[-1])
-            if line.startswith('change ') and line.__contains__(':') and line.__contains__(','):
-                sl, el = [int(x.replace(' ', '').replace('\n', '')) for x in line.split(':')[-1].split(',')]
-                while sl <= el:
-                    if sl not in change_line:
-                        change_line.append(sl)
-                    sl += 1
-    if is_method:
+    record = read_ccset(path)
+    if record.type.__contains__('METHOD_COMMENT'):
         return 0, 0, 0
-    return change_num, len(change_line), label
-
-
-change_number = 0
-changed_cnt = 0
-unchanged_cnt = 0
-method_cnt = 0
-
-
-def traverse_folder_for_Q13(path):
-    if os.path.isdir(path):
-        for f in os.listdir(path):
-            traverse_folder_for_Q13(os.path.join(path, f))
-    else:
-        if path.endswith('.java'):
-            global change_number
-            global unchanged_cnt
-            global changed_cnt
-            global method_cnt
-            change_num, st_num, label = get_change_info(path)
-            if change_num == 0 and st_num == 0 and label == 0:
-                method_cnt += 1
-            change_number += change_num
-            if label == 1:
-                changed_cnt += 1
-            else:
-                unchanged_cnt += 1
-
-traverse_folder_for_Q13("features")
-print(method_cnt)
-
-# print(change_number)
-# print(changed_cnt / (changed_cnt + unchanged_cnt) * 100)
-# print(unchanged_cnt / (changed_cnt + unchanged_cnt) * 100)
-
-cnt = 0
-change_num_1_3_label_1 = 0
-change_num_1_3_label_0 = 0
-
-change_num_4_6_label_1 = 0
-change_num_4_6_label_0 = 0
-
-change_num_7_9_label_1 = 0
-change_num_7_9_label_0 = 0
-
-change_num_10_12_label_1 = 0
-change_num_10_12_label_0 = 0
-
-change_num_13_15_label_1 = 0
-change_num_13_15_label_0 = 0
-
-change_num_over_15_label_1 = 0
-change_num_over_15_label_0 = 0
-
-change_st_1_3_label_1 = 0
-change_st_1_3_label_0 = 0
-
-change_st_4_6_label_1 = 0
-change_st_4_6_label_0 = 0
-
-change_st_7_9_label_1 = 0
-change_st_7_9_label_0 = 0
-
-change_st_10_12_label_1 = 0
-change_st_10_12_label_0 = 0
-
-change_st_13_15_label_1 = 0
-change_st_13_15_label_0 = 0
-
-change_st_over_15_label_1 = 0
-change_st_over_15_label_0 = 0
-
-
-def traverse_folder_for_Q8(path):
-    if os.path.isdir(path):
-        for f in os.listdir(path):
-            traverse_folder_for_Q8(os.path.join(path, f))
-    else:
-        if path.endswith('.java'):
-            global cnt
-            cnt += 1
-            change_num, st_num, label = get_change_info(path)
-            if label == 0:
-                if st_num >= 1 and st_num <= 3:
-                    global change_st_1_3_label_0
-                    change_st_1_3_label_0 += 1
-                if st_num >= 4 and st_num <= 6:
-                    global change_st_4_6_label_0
-                    change_st_4_6_label_0 += 1
-                if st_num >= 7 and st_num <= 9:
-                    global change_st_7_9_label_0
-                    change_st_7_9_label_0 += 1
-                if st_num >= 10 and st_num <= 12:
-                    global change_st_10_12_label_0
-                    change_st_10_12_label_0 += 1
-                if st_num >= 13 and st_num <= 15:
-                    global change_st_13_15_label_0
-                    change_st_13_15_label_0 += 1
-                if st_num > 15:
-                    global change_st_over_15_label_0
-                    change_st_over_15_label_0 += 1
-
-                if change_num >= 1 and change_num <= 3:
-                    global change_num_1_3_label_0
-                    change_num_1_3_label_0 += 1
-                if change_num >= 4 and change_num <= 6:
-                    global change_num_4_6_label_0
-                    change_num_4_6_label_0 += 1
-                if change_num >= 7 and change_num <= 9:
-                    global change_num_7_9_label_0
-                    change_num_7_9_label_0 += 1
-                if change_num >= 10 and change_num <= 12:
-                    global change_num_10_12_label_0
-                    change_num_10_12_label_0 += 1
-                if change_num >= 13 and change_num <= 15:
-                    global change_num_13_15_label_0
-                    change_num_13_15_label_0 += 1
-                if change_num > 15:
-                    global change_num_over_15_label_0
-                    change_num_over_15_label_0 += 1
-
-            else:
-                if st_num >= 1 and st_num <= 3:
-                    global change_st_1_3_label_1
-                    change_st_1_3_label_1 += 1
-                if st_num >= 4 and st_num <= 6:
-                    global change_st_4_6_label_1
-                    change_st_4_6_label_1 += 1
-                if st_num >= 7 and st_num <= 9:
-                    global change_st_7_9_label_1
-                    change_st_7_9_label_1 += 1
-                if st_num >= 10 and st_num <= 12:
-                    global change_st_10_12_label_1
-                    change_st_10_12_label_1 += 1
-                if st_num >= 13 and st_num <= 15:
-                    global change_st_13_15_label_1
-                    change_st_13_15_label_1 += 1
-                if st_num > 15:
-                    global change_st_over_15_label_1
-                    change_st_over_15_label_1 += 1
-
-                if change_num >= 1 and change_num <= 3:
-                    global change_num_1_3_label_1
-                    change_num_1_3_label_1 += 1
-                if change_num >= 4 and change_num <= 6:
-                    global change_num_4_6_label_1
-                    change_num_4_6_label_1 += 1
-                if change_num >= 7 and change_num <= 9:
-                    global change_num_7_9_label_1
-                    change_num_7_9_label_1 += 1
-                if change_num >= 10 and change_num <= 12:
-                    global change_num_10_12_label_1
-                    change_num_10_12_label_1 += 1
-                if change_num >= 13 and change_num <= 15:
-                    global change_num_13_15_label_1
-                    change_num_13_15_label_1 += 1
-                if change_num > 15:
-                    global change_num_over_15_label_1
-                    change_num_over_15_label_1 += 1
-                pass
-
-# traverse_folder_for_Q8("/Users/chenyn/chenyn's/研究生/DataSet/My dect/data/回复/")
-# print('total:', cnt)
-# print('---------------------------')
-# print(change_num_1_3_label_1)
-# print(change_num_1_3_label_0)
-# print(change_num_1_3_label_1 / (change_num_1_3_label_1 + change_num_1_3_label_0))
-#
-# print(change_num_4_6_label_1)
-# print(change_num_4_6_label_0)
-# print(change_num_4_6_label_1 / (change_num_4_6_label_1 + change_num_4_6_label_0))
-#
-# print(change_num_7_9_label_1)
-# print(change_num_7_9_label_0)
-# print(change_num_7_9_label_1 / (change_num_7_9_label_1 + change_num_7_9_label_0))
-#
-# print(change_num_10_12_label_1)
-# print(change_num_10_12_label_0)
-# print(change_num_10_12_label_1 / (change_num_10_12_label_1 + change_num_10_12_label_0))
-#
-# print(change_num_13_15_label_1)
-# print(change_num_13_15_label_0)
-# print(change_num_13_15_label_1 / (change_num_13_15_label_1 + change_num_13_15_label_0))
-#
-# print(change_num_over_15_label_1)
-# print(change_num_over_15_label_0)
-# print(change_num_over_15_label_1 / (change_num_over_15_label_1 + change_num_over_15_label_0))
-# print('-----------------------------------')
-# print(change_st_1_3_label_1)
-# print(change_st_1_3_label_0)
-# print(change_st_1_3_label_1 / (change_st_1_3_label_1 + change_st_1_3_label_0))
-#
-# print(change_st_4_6_label_1)
-# print(change_st_4_6_label_0)
-# print(change_st_4_6_label_1 / (change_st_4_6_label_1 + change_st_4_6_label_0))
-#
-# print(change_st_7_9_label_1)
-# print(change_st_7_9_label_0)
-# print(change_st_7_9_label_1 / (change_st_7_9_label_1 + change_st_7_9_label_0))
-#
-# print(change_st_10_12_label_1)
-# print(change_st_10_12_label_0)
-# print(change_st_10_12_label_1 / (change_st_10_12_label_1 + change_st_10_12_label_0))
-#
-# print(change_st_13_15_label_1)
-# print(change_st_13_15_label_0)
-# print(change_st_13_15_label_1 / (change_st_13_15_label_1 + change_st_13_15_label_0))
-#
-# print(change_st_over_15_label_1)
-# print(change_st_over_15_label_0)
-# print(change_st_over_15_label_1 / (change_st_over_15_label_1 + change_st_over_15_label_0))
\ No newline at end of file
+    return record.feature_change_num, covered_count(record.change_lines), record.label
+
+
+# 输入 ccset 特征文件路径
+# 输出 (路径, 注释类型, 变更数量, 变更行数, 标签), 读取失败时注释类型为 None
+def get_record_info(path):
+    try:
+        record = read_ccset(path)
+        comment_type = 'method' if record.type.__contains__('METHOD_COMMENT') else 'block'
+        return path, comment_type, record.feature_change_num, covered_count(record.change_lines), record.label or 0
+    except Exception:
+        return path, None, 0, 0, 0
+
+
+def list_files(root):
+    res = []
+    for dirpath, _, filenames in os.walk(root):
+        for f in filenames:
+            if f.endswith('.java'):
+                res.append(os.path.join(dirpath, f))
+    res.sort()
+    return res
+
+
+# 并行扫描一次语料, 每个文件一行: path, type, change_num, st_num, label
+def scan(root, processes=None, chunksize=64):
+    if processes is None:
+        processes = max(1, cpu_count() - 1)
+    files = list_files(root)
+    with Pool(processes=processes) as pool:
+        rows = [row for row in pool.imap(get_record_info, files, chunksize=chunksize) if row[1] is not None]
+    df = pd.DataFrame(rows, columns=['path', 'type', 'change_num', 'st_num', 'label'])
+    print('scanned %d files, %d unreadable' % (len(df), len(files) - len(df)))
+    return df
+
+
+def bin_names(bins):
+    names = []
+    for i in range(len(bins) - 1):
+        names.append('%d-%d' % (bins[i], bins[i + 1] - 1))
+    names.append('>%d' % (bins[-1] - 1))
+    return names
+
+
+# 输入 每个样本的取值, 分组 (如标签), 区间左端点
+# 输出 区间 x 分组的样本数, 小于 bins[0] 的样本不计入
+def histogram(values, groups, bins):
+    values = np.asarray(values)
+    groups = np.asarray(groups)
+    index = np.searchsorted(bins, values, side='right') - 1
+    keep = index >= 0
+    table = pd.crosstab(pd.Categorical(np.asarray(bin_names(bins))[index[keep]], categories=bin_names(bins)),
+                        groups[keep], dropna=False)
+    table.index.name = 'bin'
+    return table
+
+
+# 与标签的关系: 各区间中 label=1 / label=0 的样本数及 label=1 的占比
+def label_table(df, column, bins):
+    table = histogram(df[column], df['label'], bins).reindex(columns=[1, 0], fill_value=0)
+    table.columns = ['label_1', 'label_0']
+    total = table['label_1'] + table['label_0']
+    table['label_1_ratio'] = (table['label_1'] / total.where(total != 0)).round(6)
+    return table
+
+
+# 一次扫描得到所有 RQ 表
+def analyse(df, bins=DEFAULT_BINS):
+    block = df[df['type'] == 'block']
+    tables = dict()
+    # Q13: 方法注释(旧统计中变更信息全为 0 的样本)数量, 块注释的变更总数, 各标签占比
+    q13 = pd.Series(dtype=object, data={
+        'total': len(df),
+        'method_cnt': int((df['type'] == 'method').sum() +
+                          ((block['change_num'] == 0) & (block['st_num'] == 0) & (block['label'] == 0)).sum()),
+        'change_number': int(block['change_num'].sum()),
+        'changed_cnt': int((df['label'] == 1).sum()),
+        'unchanged_cnt': int((df['label'] != 1).sum()),
+    })
+    q13['changed_ratio'] = round(q13['changed_cnt'] / len(df) * 100, 6) if len(df) else 0.0
+    q13['unchanged_ratio'] = round(q13['unchanged_cnt'] / len(df) * 100, 6) if len(df) else 0.0
+    tables['Q13'] = q13.to_frame('value')
+    # Q8: 块注释的变更数量 / 变更行数区间与标签
+    tables['Q8_change_num'] = label_table(block, 'change_num', bins)
+    tables['Q8_change_st'] = label_table(block, 'st_num', bins)
+    # 按注释类型
+    tables['type_label'] = pd.crosstab(df['type'], df['label'])
+    for comment_type, part in df.groupby('type'):
+        tables['%s_change_num' % comment_type] = label_table(part, 'change_num', bins)
+        tables['%s_change_st' % comment_type] = label_table(part, 'st_num', bins)
+    return tables
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='change count / changed line statistics of a CCSet feature tree')
+    parser.add_argument('root', nargs='?', default='features', help='folder containing the .java feature files')
+    parser.add_argument('--bins', default=','.join(str(b) for b in DEFAULT_BINS),
+                        help='comma separated left edges of the histogram bins')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, default cpu_count() - 1')
+    parser.add_argument('--out', default=None, help='folder to write every table to as <name>.csv')
+    args = parser.parse_args()
+
+    bins = [int(b) for b in args.bins.split(',')]
+    tables = analyse(scan(args.root, processes=args.processes), bins)
+    if args.out is not None:
+        os.makedirs(args.out, exist_ok=True)
+    for name, table in tables.items():
+        print('---------------- %s ----------------' % name)
+        print(table.to_string())
+        if args.out is not None:
+            table.to_csv(os.path.join(args.out, name + '.csv'))
@@ -1,76 +1,146 @@
+import argparse
+import hashlib
+import json
 import os
+import sys
+from multiprocessing import Pool, cpu_count
 
-l = set()
-cnt = 0
-rmcnt = 0
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-extract_features'))
+from utils.ccset import read_ccset
+from utils.near_duplicates import MinHashLSH, record_shingles
 
+ROOT = "/Users/chenyn/chenyn's/研究生/DataSet/My/data/changes_drop_duplicates 1"
+
+
+# 只保留字母, 去掉空白和标点后再比较
+def normalize(lines):
+    return ''.join([ch for ch in ''.join(lines) if ch.isalpha()])
+
+
+# 输入 ccset 文件路径
+# 输出 (路径, 规范化后新代码/新注释/旧代码/旧注释的 blake2b 摘要 hex, 错误信息)
+def file_digest(path):
+    try:
+        record = read_ccset(path)
+        h = hashlib.blake2b(digest_size=16)
+        for lines in (record.new_code, record.new_comment, record.old_code, record.old_comment):
+            h.update(normalize(lines).encode('utf-8'))
+            h.update(b'\0')
+        return path, h.hexdigest(), None
+    except Exception as e:
+        return path, None, repr(e)
 
-def traverse_folder(url):
-    if os.path.isdir(url):
-        for f in os.listdir(url):
-            traverse_folder(os.path.join(url, f))
-    else:
-        try:
-            global cnt
-            cnt += 1
 
-            s = ''
-            with open(url) as f:
-                reach_old_comment = False
-                reach_old_code = False
-                reach_new_comment = False
-                reach_new_code = False
-                old_comment = ''
-                old_code = ''
-                new_comment = ''
-                new_code = ''
-                for line in f.readlines():
-                    if line.startswith('oldComment:'):
-                        reach_old_comment = True
-                        continue
-                    if line.startswith('oldCode:'):
-                        reach_old_code = True
-                        reach_old_comment = False
-                        continue
-                    if line.startswith('newComment:'):
-                        reach_new_comment = True
-                        reach_old_code = False
-                        continue
-                    if line.startswith('newCode:'):
-                        reach_new_code = True
-                        reach_new_comment = False
-                        continue
-                    if line.startswith('startline:'):
-                        break
-
-                    if reach_old_comment:
-                        old_comment += line
-                    if reach_old_code:
-                        old_code += line
-                    if reach_new_comment:
-                        new_comment += line
-                    if reach_new_code:
-                        new_code += line
-
-                    new_comment = ''.join([ch if ch.isalpha() else '' for ch in new_comment.replace('\n', '')])
-                    new_code = ''.join([ch if ch.isalpha() else '' for ch in new_code.replace('\n', '')])
-                    old_comment = ''.join([ch if ch.isalpha() else '' for ch in old_comment.replace('\n', '')])
-                    old_code = ''.join([ch if ch.isalpha() else '' for ch in old_code.replace('\n', '')])
-
-                    s += new_code + new_comment + old_code + old_comment
-                    # print(s)
-
-            if s in l:
-                os.remove(url)
-                global rmcnt
+def list_files(root):
+    res = []
+    for dirpath, _, filenames in os.walk(root):
+        for f in filenames:
+            if f.endswith('.java'):
+                res.append(os.path.join(dirpath, f))
+    res.sort()
+    return res
+
+
+# 并行计算摘要, 按路径顺序保留每个摘要第一次出现的文件, 其余记为 drop
+# manifest 每行: {"path", "digest", "action": keep/drop/error, "duplicate_of"}
+# delete 为 True 时才真的删除 drop 的文件
+def drop_duplicates(root, manifest_path, processes=None, delete=False, chunksize=64):
+    if processes is None:
+        processes = max(1, cpu_count() - 1)
+    files = list_files(root)
+    first = dict()  # digest -> 第一次出现的文件在 files 中的下标
+    cnt = 0
+    rmcnt = 0
+    with open(manifest_path, 'w') as manifest, Pool(processes=processes) as pool:
+        for path, digest, error in pool.imap(file_digest, files, chunksize=chunksize):
+            entry = {'path': path, 'digest': digest}
+            if error is not None:
+                entry['action'] = 'error'
+                entry['error'] = error
+            elif digest in first:
+                entry['action'] = 'drop'
+                entry['duplicate_of'] = files[first[digest]]
                 rmcnt += 1
-                print('cnt:', cnt)
-                print('rmcnt:', rmcnt)
+                if delete:
+                    os.remove(path)
             else:
-                l.add(s)
-        except:
-            pass
+                entry['action'] = 'keep'
+                first[digest] = cnt
+            manifest.write(json.dumps(entry) + '\n')
+            cnt += 1
+            if cnt % 10000 == 0:
+                print('cnt:', cnt, 'rmcnt:', rmcnt)
+    print('cnt:', cnt)
+    print('rmcnt:', rmcnt)
+    return cnt, rmcnt
+
+
+lsh = None
+
+
+def _init_near_worker(num_perm, bands, threshold):
+    global lsh
+    lsh = MinHashLSH(num_perm=num_perm, bands=bands, threshold=threshold)
+
+
+def file_signature(path):
+    try:
+        return path, lsh.signature(record_shingles(read_ccset(path))), None
+    except Exception as e:
+        return path, None, repr(e)
+
+
+# MinHash + LSH 近似去重: 新旧注释/代码的词 2-gram Jaccard 相似度约超过 threshold 的文件聚为一类,
+# 每类保留路径顺序中的第一个文件
+# manifest 每行: {"path", "cluster": 该类保留的文件, "action": keep/drop/error}, 可用于去掉近似重复或按类划分训练/测试集
+def drop_near_duplicates(root, manifest_path, processes=None, delete=False, chunksize=64, num_perm=128, bands=16,
+                         threshold=0.8):
+    if processes is None:
+        processes = max(1, cpu_count() - 1)
+    files = list_files(root)
+    index = MinHashLSH(num_perm=num_perm, bands=bands, threshold=threshold)
+    added = []  # index 中第 i 条记录对应的文件
+    errors = dict()
+    with Pool(processes=processes, initializer=_init_near_worker, initargs=(num_perm, bands, threshold)) as pool:
+        for path, signature, error in pool.imap(file_signature, files, chunksize=chunksize):
+            if error is not None:
+                errors[path] = error
+            else:
+                index.add(signature)
+                added.append(path)
+    clusters = index.clusters()
+
+    rmcnt = 0
+    with open(manifest_path, 'w') as manifest:
+        for path, error in errors.items():
+            manifest.write(json.dumps({'path': path, 'action': 'error', 'error': error}) + '\n')
+        for i, path in enumerate(added):
+            entry = {'path': path, 'cluster': added[clusters[i]], 'action': 'keep' if clusters[i] == i else 'drop'}
+            if entry['action'] == 'drop':
+                rmcnt += 1
+                if delete:
+                    os.remove(path)
+            manifest.write(json.dumps(entry) + '\n')
+    print('cnt:', len(files))
+    print('clusters:', len(added) - rmcnt)
+    print('rmcnt:', rmcnt)
+    return len(files), rmcnt
 
 
 if __name__ == '__main__':
-    traverse_folder("/Users/chenyn/chenyn's/研究生/DataSet/My/data/changes_drop_duplicates 1")
+    parser = argparse.ArgumentParser(description='find CCSet files with the same or near same comments and code')
+    parser.add_argument('root', nargs='?', default=ROOT, help='folder containing the .java ccset files')
+    parser.add_argument('--manifest', default='duplicates_manifest.jsonl', help='keep/drop manifest to write')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, default cpu_count() - 1')
+    parser.add_argument('--delete', action='store_true', help='also delete the dropped files')
+    parser.add_argument('--near', action='store_true',
+                        help='cluster near duplicates with MinHash + LSH instead of exact digests')
+    parser.add_argument('--threshold', type=float, default=0.8, help='--near: Jaccard similarity to merge at')
+    parser.add_argument('--num-perm', type=int, default=128, help='--near: MinHash permutations')
+    parser.add_argument('--bands', type=int, default=16, help='--near: LSH bands, must divide --num-perm')
+    args = parser.parse_args()
+    if args.near:
+        drop_near_duplicates(args.root, args.manifest, processes=args.processes, delete=args.delete,
+                             num_perm=args.num_perm, bands=args.bands, threshold=args.threshold)
+    else:
+        drop_duplicates(args.root, args.manifest, processes=args.processes, delete=args.delete)
@@ -1,7 +1,18 @@
+import time
+_IMPORT_START = time.perf_counter()
+import argparse
+import hashlib
+import json
 import os
 import re
+import sys
 from multiprocessing import Pool, cpu_count
-from sentence_transformers import SentenceTransformer
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-extract_features'))
+from utils.dataset import SIMILARITY_COLUMNS, save_columns
+from utils.profiling import StageTimer
 
 # --- Regex Compilations (for efficiency) ---
 # Java-specific regexes (kept for context)
@@ -130,97 +141,218 @@ def parse_python_code_change(file_content):
         "label": label,
     }
 
-# Global variable to store the model, will be loaded once per process
-_model = None
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Sentences per forward pass of the encoder
+ENCODE_BATCH_SIZE = 256
+# Texts per encode call; every chunk is appended to the cache before the next one starts
+ENCODE_CHUNK_SIZE = 8192
+# Samples whose similarities are computed at once from the memory-mapped embeddings
+SIMILARITY_CHUNK_SIZE = 65536
+
+
+def text_key(text):
+    """
+    Content hash of a text, the key of its embedding in the EmbeddingCache.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
 
-def _initializer():
+class EmbeddingCache:
     """
-    Initializer function for the multiprocessing pool.
-    Loads the SentenceTransformer model once per child process.
+    Content-addressed store of sentence embeddings on disk: row i of the float16
+    matrix in embeddings.f16 is the normalized embedding of the text whose hash is
+    line i of keys.txt. Rows are only ever appended, so a row index stays valid
+    across runs and identical snippets are encoded once.
     """
-    global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
 
-def compute_similarity_for_process(data):
+    def __init__(self, path, model_name=MODEL_NAME):
+        self.path = path
+        self.model_name = model_name
+        self.dim = None
+        self.rows = {}
+        os.makedirs(path, exist_ok=True)
+        self._keys_path = os.path.join(path, "keys.txt")
+        self._matrix_path = os.path.join(path, "embeddings.f16")
+        self._meta_path = os.path.join(path, "meta.json")
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if meta["model"] != model_name:
+                raise ValueError(f"{path} holds embeddings of {meta['model']}, not {model_name}")
+            self.dim = meta["dim"]
+        if self.dim is not None and os.path.exists(self._keys_path):
+            with open(self._keys_path) as f:
+                keys = f.read().split()
+            # Embeddings are written before their keys, so an interrupted append leaves extra rows at most
+            with open(self._matrix_path, "r+b") as f:
+                f.truncate(len(keys) * self.dim * 2)
+            self.rows = {key: row for row, key in enumerate(keys)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def row(self, key):
+        return self.rows[key]
+
+    def add(self, keys, embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            with open(self._meta_path, "w") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+        with open(self._matrix_path, "ab") as f:
+            f.write(embeddings.tobytes())
+        with open(self._keys_path, "a") as f:
+            f.write("".join(key + "\n" for key in keys))
+        for key in keys:
+            self.rows[key] = len(self.rows)
+
+    def matrix(self):
+        """
+        Read-only memory map of all embeddings, shape (len(self), dim).
+        """
+        if not self.rows:
+            return np.zeros((0, self.dim or 0), dtype=np.float16)
+        return np.memmap(self._matrix_path, dtype=np.float16, mode="r", shape=(len(self.rows), self.dim))
+
+
+def load_encoder(model_name=MODEL_NAME):
     """
-    Computes similarity scores for a single parsed data dictionary.
-    This function uses the global _model loaded by the initializer.
-    It returns the individual similarity scores and the label,
-    which will be aggregated in the main process.
+    Imports sentence_transformers (and with it torch) only when something has to be
+    encoded, so runs whose texts are all cached never pay for it.
     """
-    global _model
-    if _model is None:
-        _initializer()
-
-    texts_to_encode = []
-    new_code_present = False
-    old_comment_present = False
-    old_code_present = False
-
-    if data["newCode"] is not None and data["newCode"].strip():
-        texts_to_encode.append(data["newCode"])
-        new_code_present = True
-    if data["oldComment"] is not None and data["oldComment"].strip():
-        texts_to_encode.append(data["oldComment"])
-        old_comment_present = True
-    if data["oldCode"] is not None and data["oldCode"].strip():
-        texts_to_encode.append(data["oldCode"])
-        old_code_present = True
-
-    if len(texts_to_encode) < 2:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def encode_missing(texts, cache, model_name=MODEL_NAME, batch_size=ENCODE_BATCH_SIZE):
+    """
+    Encodes the texts the cache does not hold yet with a single model, longest
+    first so every batch holds texts of about the same length, and appends the
+    embeddings to the cache chunk by chunk. Returns the number of texts encoded.
+    """
+    missing = {}
+    for text in texts:
+        key = text_key(text)
+        if key not in cache and key not in missing:
+            missing[key] = text
+    if not missing:
+        return 0
+
+    model = load_encoder(model_name)
+    keys = sorted(missing, key=lambda key: len(missing[key]), reverse=True)
+    for start in range(0, len(keys), ENCODE_CHUNK_SIZE):
+        chunk = keys[start:start + ENCODE_CHUNK_SIZE]
+        embeddings = model.encode([missing[key] for key in chunk], batch_size=batch_size,
+                                  normalize_embeddings=True, convert_to_numpy=True)
+        cache.add(chunk, embeddings)
+        print(f"Encoded {start + len(chunk)}/{len(keys)} new texts")
+    return len(keys)
+
+
+def similarity_texts(data):
+    """
+    The (newCode, oldComment, oldCode) texts of a parsed sample, None for empty ones,
+    or None when the sample cannot be scored: every similarity is taken against
+    the new code, so it needs the new code and at least one of the others.
+    """
+    texts = tuple(data[name] if data[name] is not None and data[name].strip() else None
+                  for name in ("newCode", "oldComment", "oldCode"))
+    if sum(text is not None for text in texts) < 2:
         print(f"Warning: Not enough valid text segments to compute similarity for data with label {data.get('label')}.")
         return None
-
-    try:
-        embeddings = _model.encode(texts_to_encode, normalize_embeddings=True)
-        similarity_matrix = _model.similarity(embeddings, embeddings)
-
-        new_code_old_comment_sim = 0
-        old_code_new_code_sim = 0
-        old_code_old_comment_sim = 0
-
-        encoded_text_map = {text: idx for idx, text in enumerate(texts_to_encode)}
-
-        if new_code_present and old_comment_present:
-            new_code_idx = encoded_text_map[data["newCode"]]
-            old_comment_idx = encoded_text_map[data["oldComment"]]
-            new_code_old_comment_sim = similarity_matrix[new_code_idx, old_comment_idx].item()
-
-        if old_code_present and old_comment_present:
-            old_code_idx = encoded_text_map[data["oldCode"]]
-            old_comment_idx = encoded_text_map[data["oldComment"]]
-            old_code_old_comment_sim = similarity_matrix[old_code_idx, old_comment_idx].item()
-            new_code_old_comment_sim = similarity_matrix[new_code_idx, old_comment_idx].item()
-
-        if old_code_present and new_code_present:
-            old_code_idx = encoded_text_map[data["oldCode"]]
-            new_code_idx = encoded_text_map[data["newCode"]]
-            old_code_new_code_sim = similarity_matrix[old_code_idx, new_code_idx].item()
-
-        return {
-            "label": data["label"],
-            "new_code_old_comment_similarity": new_code_old_comment_sim,
-            "old_code_new_code_similarity": old_code_new_code_sim,
-            "old_code_new_comment_similarity": new_code_old_comment_sim,
-            "old_code_old_comment_similarity": old_code_old_comment_sim
-        }
-    except Exception as e:
-        print(f"Error during similarity computation for data with label {data.get('label')}: {e}")
+    if texts[0] is None:
+        print(f"Warning: No new code to compute similarity for data with label {data.get('label')}.")
         return None
+    return texts
 
 
-def process_file_for_similarity(filepath, parser_func):
+def _cosine(matrix, rows_a, rows_b):
+    """
+    Row-wise cosine similarity of normalized embeddings, 0 where either row is -1 (text missing).
+    Clipped to [-1, 1], which float16 rounding can overshoot.
+    """
+    out = np.zeros(len(rows_a), dtype=np.float32)
+    known = (rows_a >= 0) & (rows_b >= 0)
+    a = np.asarray(matrix[rows_a[known]], dtype=np.float32)
+    b = np.asarray(matrix[rows_b[known]], dtype=np.float32)
+    out[known] = np.clip(np.einsum("ij,ij->i", a, b), -1, 1)
+    return out
+
+
+def compute_similarities(samples, cache):
+    """
+    Similarity scores of parsed samples from the cached embeddings, one result
+    dictionary (or None for samples that cannot be scored) per sample.
     """
-    Reads a file, parses its content using the provided parser_func,
-    and computes similarity scores.
+    results = [None] * len(samples)
+    scored = []
+    rows = []
+    for i, data in enumerate(samples):
+        texts = similarity_texts(data) if data is not None else None
+        if texts is not None:
+            scored.append(i)
+            rows.append([cache.row(text_key(text)) if text is not None else -1 for text in texts])
+    if not scored:
+        return results
+
+    matrix = cache.matrix()
+    rows = np.asarray(rows, dtype=np.int64)
+    for start in range(0, len(scored), SIMILARITY_CHUNK_SIZE):
+        chunk = rows[start:start + SIMILARITY_CHUNK_SIZE]
+        new_code, old_comment, old_code = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        new_code_old_comment = _cosine(matrix, new_code, old_comment)
+        old_code_new_code = _cosine(matrix, old_code, new_code)
+        old_code_old_comment = _cosine(matrix, old_code, old_comment)
+        for j, i in enumerate(scored[start:start + SIMILARITY_CHUNK_SIZE]):
+            results[i] = {
+                "label": samples[i]["label"],
+                "new_code_old_comment_similarity": float(new_code_old_comment[j]),
+                "old_code_new_code_similarity": float(old_code_new_code[j]),
+                "old_code_new_comment_similarity": float(new_code_old_comment[j]),
+                "old_code_old_comment_similarity": float(old_code_old_comment[j]),
+                # Rows of the texts in the embedding cache, -1 for a missing text
+                "new_code_row": int(new_code[j]),
+                "old_comment_row": int(old_comment[j]),
+                "old_code_row": int(old_code[j])
+            }
+    return results
+
+
+def save_similarity_table(path, file_paths, results):
+    """
+    Writes one row per scored file (path, label or -1 when the file has none, the
+    four similarities and the embedding rows of its texts) as a columnar .npz file, which
+    utils.dataset.join_similarity adds to a feature table by path.
+    """
+    scored = [(file_path, result) for file_path, result in zip(file_paths, results) if result is not None]
+    columns = {"path": np.array([os.path.abspath(file_path) for file_path, _ in scored], dtype=str),
+               # -1 for files without a label: line, which the averages below skip as well
+               "label": np.array([-1 if result["label"] is None else result["label"] for _, result in scored],
+                                 dtype=np.int8)}
+    for column in SIMILARITY_COLUMNS:
+        columns[column] = np.array([result[column] for _, result in scored], dtype=np.float32)
+    for column in ("new_code_row", "old_comment_row", "old_code_row"):
+        columns[column] = np.array([result[column] for _, result in scored], dtype=np.int64)
+    save_columns(path, columns)
+    print(f"Wrote the similarities of {len(scored)} files to {path}")
+
+
+def parse_file_for_similarity(filepath, parser_func):
+    """
+    Reads a file and parses its content using the provided parser_func.
+    Runs in the worker processes, which never load the model.
     """
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             file_content = f.read()
         data = parser_func(file_content)
         if data:
-            return compute_similarity_for_process(data)
+            return data
         else:
             print(f"Warning: Could not parse content from {filepath} with {parser_func.__name__}")
             return None
@@ -228,10 +360,14 @@ def process_file_for_similarity(filepath, parser_func):
         print(f"Error processing {filepath}: {e}")
         return None
 
-def traverse_folder_for_similarity(root_path):
+def traverse_folder_for_similarity(root_path, cache_path="embedding_cache", batch_size=ENCODE_BATCH_SIZE,
+                                   output_path="similarity.npz"):
     """
     Efficiently traverses a folder to find and process Java and Python files for similarity.
     Dispatches to the correct parsing function based on file content/extension.
+    Worker processes only parse files; the texts are then deduplicated and encoded
+    by a single model in large batches into the embedding cache at cache_path.
+    The per-file similarities are written to output_path (skipped when None).
     """
     files_to_process = []
     for dirpath, _, filenames in os.walk(root_path):
@@ -249,14 +385,22 @@ def traverse_folder_for_similarity(root_path):
     num_processes = max(1, cpu_count() - 1)
     print(f"Processing {len(files_to_process)} files using {num_processes} processes...")
 
-    all_results = []
+    samples = []
     if files_to_process:
-        with Pool(processes=num_processes, initializer=_initializer) as pool:
+        with Pool(processes=num_processes) as pool:
             # Prepare arguments for map: (filepath, parser_func)
-            # Use starmap to pass multiple arguments to `process_file_for_similarity`
+            # Use starmap to pass multiple arguments to `parse_file_for_similarity`
             tasks = [(info['path'], info['parser']) for info in files_to_process]
-            all_results = pool.starmap(process_file_for_similarity, tasks)
+            samples = pool.starmap(parse_file_for_similarity, tasks, chunksize=64)
 
+    cache = EmbeddingCache(cache_path)
+    texts = [text for data in samples if data is not None
+             for text in (data["newCode"], data["oldComment"], data["oldCode"]) if text is not None and text.strip()]
+    encoded = encode_missing(texts, cache, batch_size=batch_size)
+    print(f"{len(texts)} texts, {encoded} encoded, {len(texts) - encoded} from {cache_path} or duplicates")
+    all_results = compute_similarities(samples, cache)
+    if output_path is not None:
+        save_similarity_table(output_path, [info['path'] for info in files_to_process], all_results)
 
     numProcessed_0 = 0
     numProcessed_1 = 0
@@ -311,5 +455,33 @@ def traverse_folder_for_similarity(root_path):
     print(f"  Avg Difference (New Code-Old Comment - Old Code-Old Comment) for Label 1: {avg_difference_label_1:.4f}")
 
 
+def profile_startup(model_name=MODEL_NAME):
+    """
+    Reports the time spent importing this script, importing sentence_transformers
+    and loading the encoder.
+    """
+    timer = StageTimer()
+    timer.add("import main", time.perf_counter() - _IMPORT_START)
+    with timer.stage("import encoder"):
+        import sentence_transformers
+    with timer.stage("load encoder"):
+        load_encoder(model_name)
+    print(timer.report())
+    return timer.totals
+
+
 if __name__ == "__main__":
-    traverse_folder_for_similarity("python_ccset_raw")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="similarity of old/new code and comments with sentence embeddings")
+    parser.add_argument("root", nargs="?", default="python_ccset_raw", help="folder of code change files")
+    parser.add_argument("--cache", default="embedding_cache",
+                        help="folder of the float16 embedding matrix, reused and extended by every run")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE, help="sentences per encoder batch")
+    parser.add_argument("--out", default="similarity.npz",
+                        help="columnar file of the per-file similarities, joined to block.csv / method.csv by path")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report the import and model load time and exit")
+    args = parser.parse_args()
+    if args.profile_startup:
+        profile_startup()
+    else:
+        traverse_folder_for_similarity(args.root, args.cache, args.batch_size, args.out)
\ No newline at end of file
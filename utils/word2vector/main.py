@@ -1,50 +1,138 @@
-from gensim.models import Word2Vec
+import argparse
+import csv
+import os
 import time
+from multiprocessing import Pool, cpu_count
+
+from gensim.models import Word2Vec
+
+CORPUS_PATH = "../CoCC/word2vector/corpus/corpus.txt"
+CHUNK_SIZE = 1 << 20
+
+
+class CorpusSentences(object):
+    """
+    流式读取语料: 按 '.' 切分句子, 每次迭代重新打开文件, 可被 Word2Vec 多次遍历而不需要把语料读入内存.
+    path 可以是一个语料文件, 也可以是存放分片语料 (*.txt) 的目录.
+    切分结果与原先 read_txt 一致: 去掉换行, 跳过空句和只有一个空格的句子
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def files(self):
+        if os.path.isdir(self.path):
+            return [os.path.join(self.path, f) for f in sorted(os.listdir(self.path)) if f.endswith('.txt')]
+        return [self.path]
+
+    def __iter__(self):
+        for filepath in self.files():
+            with open(filepath) as f:
+                rest = ''
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    sentences = (rest + chunk.replace('\n', '')).split('.')
+                    rest = sentences.pop()
+                    for sentence in sentences:
+                        if sentence != ' ' and sentence != '':
+                            yield sentence.split()
+                if rest != ' ' and rest != '':
+                    yield rest.split()
 
 
-def read_txt():
-    with open("../CoCC/word2vector/corpus/corpus.txt") as f:
-        raw_text = f.read()
-        sentences = [sentence.replace('\n', '') for sentence in raw_text.split('.') if
-                     (sentence.replace('\n', '')) != ' ' and
-                     sentence.replace('\n', '') != '']
+def read_txt(path=CORPUS_PATH):
+    return list(CorpusSentences(path))
 
-        res = []
-        for sentence in sentences:
-            res.append([word for word in sentence.split()])
-        return res
 
+# 一行一句语料的默认位置: 放在语料旁边而不是当前目录; 分片目录时放在目录外, 以免被当作分片读入
+def line_corpus_path(path):
+    if os.path.isdir(path):
+        return os.path.normpath(path) + '.lines.txt'
+    return os.path.splitext(path)[0] + '.lines.txt'
 
-sentences = read_txt()
 
-print('start')
+# 写成 gensim LineSentence 格式 (一行一句), 供 corpus_file 模式训练, 该模式下 workers 线程数扩展性更好
+def write_line_corpus(path, line_path):
+    with open(line_path, 'w') as f:
+        for sentence in CorpusSentences(path):
+            if len(sentence) != 0:
+                f.write(' '.join(sentence) + '\n')
+    return line_path
 
-time_start = time.time()
-model = Word2Vec(sentences=sentences, vector_size=300, window=3, min_count=0, sg=1, negative=5)
-time_end = time.time()
-print('3_end:', time_end - time_start)
 
-time_start = time.time()
-model = Word2Vec(sentences=sentences, vector_size=300, window=4, min_count=0, sg=1, negative=5)
-time_end = time.time()
-print('4_end:', time_end - time_start)
+# 训练一个窗口大小的模型, 返回耗时与训练损失等
+# gensim 在 corpus_file 模式下不统计损失, 此时 training_loss 为空
+def train(args):
+    corpus, window, workers, out_dir, corpus_file = args
+    time_start = time.time()
+    if corpus_file:
+        model = Word2Vec(corpus_file=corpus, vector_size=300, window=window, min_count=0, sg=1, negative=5,
+                         workers=workers)
+    else:
+        model = Word2Vec(sentences=CorpusSentences(corpus), vector_size=300, window=window, min_count=0, sg=1,
+                         negative=5, workers=workers, compute_loss=True)
+    seconds = time.time() - time_start
+    print('%d_end:' % window, seconds)
+    model_path = ''
+    if out_dir is not None:
+        model_path = os.path.join(out_dir, 'word_vector_w%d.model' % window)
+        model.save(model_path)
+    return {'window': window, 'workers': workers, 'seconds': round(seconds, 3), 'vocab': len(model.wv),
+            'words': model.corpus_total_words,
+            'training_loss': None if corpus_file else model.get_latest_training_loss(), 'model': model_path}
 
-time_start = time.time()
-model = Word2Vec(sentences=sentences, vector_size=300, window=5, min_count=0, sg=1, negative=5)
-time_end = time.time()
-print('5_end:', time_end - time_start)
 
-time_start = time.time()
-model = Word2Vec(sentences=sentences, vector_size=300, window=7, min_count=0, sg=1, negative=5)
-time_end = time.time()
-print('7_end:', time_end - time_start)
+# 各窗口大小的模型分别在 processes 个进程中训练, 每个模型 workers 个线程, 结果表写到 table_path
+# processes 默认 cpu_count() - 1 (不超过窗口数), workers 默认把其余的核平分给各进程
+def sweep(corpus, windows, processes=None, workers=None, out_dir=None, table_path=None, corpus_file=False,
+          line_path=None):
+    if processes is None:
+        processes = max(1, min(len(windows), cpu_count() - 1))
+    if workers is None:
+        workers = max(1, (cpu_count() - 1) // processes)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    if corpus_file:
+        corpus = write_line_corpus(corpus, line_path or line_corpus_path(corpus))
+    tasks = [(corpus, window, workers, out_dir, corpus_file) for window in windows]
+    print('start')
+    if processes > 1:
+        with Pool(processes=processes) as pool:
+            rows = pool.map(train, tasks, chunksize=1)
+    else:
+        rows = [train(task) for task in tasks]
+    print('end')
+    for row in rows:
+        loss = 'n/a' if row['training_loss'] is None else '%.1f' % row['training_loss']
+        print('window=%(window)d workers=%(workers)d seconds=%(seconds).3f vocab=%(vocab)d ' % row +
+              'training_loss=' + loss)
+    if table_path is not None:
+        with open(table_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
 
-time_start = time.time()
-model = Word2Vec(sentences=sentences, vector_size=300, window=9, min_count=0, sg=1, negative=5)
-time_end = time.time()
-print('9_end:', time_end - time_start)
 
-# model.save("word_vector.model")
-print('end')
-# test
-# model = Word2Vec.load("word_vector.model")
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='train the word2vec models of several window sizes')
+    parser.add_argument('corpus', nargs='?', default=CORPUS_PATH, help='corpus file, or folder of corpus shards')
+    parser.add_argument('--windows', default='3,4,5,7,9', help='comma separated window sizes')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='models trained at the same time, default cpu_count() - 1 (at most one per window)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='gensim worker threads per model, default the remaining cores split between processes')
+    parser.add_argument('--out', default=None, help='folder to save word_vector_w<window>.model to')
+    parser.add_argument('--table', default=None, help='csv file for the timing / training loss table')
+    parser.add_argument('--corpus-file', action='store_true',
+                        help='convert the corpus to one sentence per line once and train with gensim corpus_file '
+                             '(gensim reports no training loss in this mode)')
+    parser.add_argument('--line-corpus', default=None,
+                        help='where --corpus-file writes the one sentence per line corpus, '
+                             'default <corpus>.lines.txt next to the corpus')
+    args = parser.parse_args()
+    sweep(args.corpus, [int(w) for w in args.windows.split(',')], processes=args.processes, workers=args.workers,
+          out_dir=args.out, table_path=args.table, corpus_file=args.corpus_file, line_path=args.line_corpus)